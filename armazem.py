@@ -0,0 +1,272 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from grid import LETRAS, VAZIO
+from posicionamento import DIRECOES_TODAS
+
+# Cabeçalho do arquivo: assinatura, versão, lado máximo do grid, máximo de
+# palavras, capacidade (registros), tamanho de cada registro e relógio do LRU
+_CABECALHO = struct.Struct('<4sHHHIIQ')
+_TAMANHO_CABECALHO = 64
+_ASSINATURA = b'CPZ1'
+_VERSAO = 1
+
+# Cabeçalho de cada registro: ocupado, nível, tamanho, nº de palavras,
+# hash da lista de palavras, semente e último uso (para o LRU)
+_REGISTRO = struct.Struct('<BBHHQQQ')
+# Posição de cada palavra: linha, coluna e direção (0xFF = não inserida)
+_POSICAO = struct.Struct('<HHB')
+_NAO_INSERIDA = 0xFF
+
+# Letras viram códigos de 5 bits: A-Z = 0..25 e vazio = 26
+ALFABETO = LETRAS + VAZIO
+_CODIGOS = bytes.maketrans(ALFABETO.encode('ascii'), bytes(range(len(ALFABETO))))
+_LETRAS_POR_CODIGO = bytes.maketrans(bytes(range(len(ALFABETO))), ALFABETO.encode('ascii'))
+_NOMES_DIRECOES = list(DIRECOES_TODAS)
+_CODIGO_DIRECAO = {passo: codigo for codigo, passo in enumerate(DIRECOES_TODAS.values())}
+
+
+def modo_geracao(backend='bytes', sem_duplicatas=False, frequencias=None):
+    """Identifica como o grid foi gerado; a mesma semente dá grids diferentes em cada modo"""
+    return (backend, bool(sem_duplicatas), tuple(sorted(frequencias.items())) if frequencias else ())
+
+
+def modo_jogo(jogo):
+    """modo_geracao de um jogo (CacaPalavras)"""
+    return modo_geracao(jogo.backend, jogo.preenchimento_unico, jogo.frequencias_letras)
+
+
+def hash_palavras(palavras, modo=None):
+    """Hash estável (e independente da ordem) de uma lista de palavras e do modo de geração"""
+    texto = '\n'.join(sorted(set(palavra.upper() for palavra in palavras)))
+    texto += '\0' + repr(modo if modo is not None else modo_geracao())
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def compactar_letras(texto):
+    """Compacta o texto do grid em 5 bits por letra (8 letras em 5 bytes)"""
+    # Letras fora do ASCII viram '?', que também cai fora do alfabeto
+    codigos = texto.encode('ascii', 'replace').translate(_CODIGOS)
+    if any(codigo >= len(ALFABETO) for codigo in codigos):
+        raise ValueError("O grid tem letras fora do alfabeto A-Z")
+    codigos += bytes(-len(codigos) % 8)
+    partes = []
+    for inicio in range(0, len(codigos), 8):
+        valor = 0
+        for deslocamento, codigo in enumerate(codigos[inicio:inicio + 8]):
+            valor |= codigo << (5 * deslocamento)
+        partes.append(valor.to_bytes(5, 'little'))
+    return b''.join(partes)
+
+
+def descompactar_letras(dados, quantidade):
+    """Desfaz compactar_letras, devolvendo as primeiras `quantidade` letras"""
+    codigos = bytearray()
+    for inicio in range(0, len(dados), 5):
+        valor = int.from_bytes(dados[inicio:inicio + 5], 'little')
+        codigos.extend((valor >> (5 * deslocamento)) & 0x1F for deslocamento in range(8))
+        if len(codigos) >= quantidade:
+            break
+    return bytes(codigos[:quantidade]).translate(_LETRAS_POR_CODIGO).decode('ascii')
+
+
+class ArmazemPuzzles:
+    """Puzzles gerados guardados em disco, em registros de tamanho fixo.
+
+    Cada registro é identificado por (nível, tamanho, hash da lista de
+    palavras e do modo de geração, semente). O arquivo é lido por mmap, então
+    um puzzle é servido sem carregar o arquivo inteiro. Quando a capacidade
+    acaba, o registro usado há mais tempo é substituído.
+
+    chance_reuso e sementes_max dizem quando um jogo sem semente pedida
+    reaproveita um puzzle guardado em vez de gerar um novo: com essa
+    probabilidade, ou sempre que já houver sementes_max guardados para a lista.
+    """
+
+    def __init__(self, caminho, tamanho_max=20, palavras_max=16, capacidade=1024,
+                 chance_reuso=0.5, sementes_max=8):
+        self.caminho = caminho
+        self.chance_reuso = chance_reuso
+        self.sementes_max = sementes_max
+        # O jogo pode salvar o nível atual enquanto a thread prepara o próximo
+        self._trava = threading.RLock()
+        if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+            self._criar(tamanho_max, palavras_max, capacidade)
+        self.arquivo = open(caminho, 'r+b')
+        self.mapa = mmap.mmap(self.arquivo.fileno(), 0)
+
+        assinatura, versao, self.tamanho_max, self.palavras_max, self.capacidade, \
+            self.tamanho_registro, self.relogio = _CABECALHO.unpack_from(self.mapa, 0)
+        if assinatura != _ASSINATURA or versao != _VERSAO:
+            self.fechar()
+            raise ValueError(f"{caminho} não é um armazém de puzzles válido")
+        self._bytes_grid = (self.tamanho_max * self.tamanho_max * 5 + 39) // 40 * 5
+
+        # Índice em memória: chave -> registro, na ordem do menos para o mais usado
+        self.indice = OrderedDict()
+        self.livres = []
+        ocupados = []
+        for registro in range(self.capacidade):
+            ocupado, nivel, tamanho, _, hash_lista, semente, uso = _REGISTRO.unpack_from(
+                self.mapa, self._deslocamento(registro))
+            if ocupado:
+                ocupados.append((uso, (nivel, tamanho, hash_lista, semente), registro))
+            else:
+                self.livres.append(registro)
+        for _, chave, registro in sorted(ocupados):
+            self.indice[chave] = registro
+        self.livres.reverse()
+
+    def _criar(self, tamanho_max, palavras_max, capacidade):
+        bytes_grid = (tamanho_max * tamanho_max * 5 + 39) // 40 * 5
+        tamanho_registro = _REGISTRO.size + bytes_grid + palavras_max * _POSICAO.size
+        with open(self.caminho, 'wb') as arquivo:
+            arquivo.write(_CABECALHO.pack(_ASSINATURA, _VERSAO, tamanho_max, palavras_max,
+                                          capacidade, tamanho_registro, 0).ljust(_TAMANHO_CABECALHO, b'\0'))
+            # Arquivo esparso com todos os registros vazios
+            arquivo.truncate(_TAMANHO_CABECALHO + capacidade * tamanho_registro)
+
+    def _deslocamento(self, registro):
+        return _TAMANHO_CABECALHO + registro * self.tamanho_registro
+
+    def _tocar(self, registro):
+        """Marca o registro como recém-usado (no arquivo e no relógio do cabeçalho)"""
+        self.relogio += 1
+        deslocamento = self._deslocamento(registro)
+        self.mapa[deslocamento + _REGISTRO.size - 8:deslocamento + _REGISTRO.size] = \
+            self.relogio.to_bytes(8, 'little')
+        struct.pack_into('<Q', self.mapa, _CABECALHO.size - 8, self.relogio)
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __contains__(self, chave):
+        return chave in self.indice
+
+    def comporta(self, tamanho, quantidade_palavras, linhas_grid=None):
+        """Indica se um puzzle desse tamanho (e, se dado, com essas letras) cabe num registro"""
+        if tamanho > self.tamanho_max or quantidade_palavras > self.palavras_max:
+            return False
+        # Só há código para A-Z e o vazio: grids com outras letras ficam de fora
+        return linhas_grid is None or all(letra in ALFABETO for linha in linhas_grid for letra in linha)
+
+    def chave(self, nivel, palavras, semente, tamanho, modo=None):
+        return (nivel, tamanho, hash_palavras(palavras, modo), semente)
+
+    def sementes(self, nivel, palavras, tamanho, modo=None):
+        """Sementes já guardadas para um nível, tamanho, lista de palavras e modo de geração"""
+        hash_lista = hash_palavras(palavras, modo)
+        with self._trava:
+            return [semente for (n, t, h, semente) in self.indice
+                    if n == nivel and t == tamanho and h == hash_lista]
+
+    def salvar(self, nivel, semente, palavras, tamanho, linhas_grid, posicoes_palavras, modo=None):
+        """Guarda um puzzle; palavras é a lista pedida (colocadas ou não)"""
+        palavras = sorted(set(palavra.upper() for palavra in palavras))
+        if not self.comporta(tamanho, len(palavras)):
+            raise ValueError(f"Puzzle maior que o armazém suporta "
+                             f"({self.tamanho_max}x{self.tamanho_max}, {self.palavras_max} palavras)")
+        chave = self.chave(nivel, palavras, semente, tamanho, modo)
+
+        posicoes = bytearray()
+        for palavra in palavras:
+            celulas = posicoes_palavras.get(palavra)
+            if not celulas:
+                posicoes += _POSICAO.pack(0, 0, _NAO_INSERIDA)
+                continue
+            (l0, c0), (l1, c1) = celulas[0], celulas[-1]
+            passos = max(len(celulas) - 1, 1)
+            direcao = _CODIGO_DIRECAO.get(((l1 - l0) // passos, (c1 - c0) // passos), 0)
+            posicoes += _POSICAO.pack(l0, c0, direcao)
+        letras = compactar_letras(''.join(linhas_grid))
+
+        with self._trava:
+            registro = self.indice.pop(chave, None)
+            if registro is None:
+                if self.livres:
+                    registro = self.livres.pop()
+                else:
+                    # Sem espaço: substitui o registro usado há mais tempo
+                    _, registro = self.indice.popitem(last=False)
+
+            deslocamento = self._deslocamento(registro)
+            # Enquanto os dados são reescritos o registro fica marcado como livre
+            self.mapa[deslocamento] = 0
+            inicio_grid = deslocamento + _REGISTRO.size
+            self.mapa[inicio_grid:inicio_grid + len(letras)] = letras
+            inicio_posicoes = inicio_grid + self._bytes_grid
+            self.mapa[inicio_posicoes:inicio_posicoes + len(posicoes)] = posicoes
+            # O cabeçalho do registro vai por último: só então ele conta como ocupado
+            _REGISTRO.pack_into(self.mapa, deslocamento, 1, nivel, tamanho, len(palavras),
+                                chave[2], semente, 0)
+            self._tocar(registro)
+            self.indice[chave] = registro
+        return chave
+
+    def salvar_jogo(self, jogo):
+        """Guarda o puzzle de um jogo (CacaPalavras) já gerado"""
+        return self.salvar(jogo.nivel, jogo.semente, jogo.palavras_solicitadas, jogo.tamanho,
+                           [jogo.grid.ler_linha(linha) for linha in range(jogo.tamanho)],
+                           jogo.posicoes_palavras, modo_jogo(jogo))
+
+    def carregar(self, nivel, palavras, semente, tamanho, modo=None):
+        """Lê um puzzle guardado, ou None se não houver.
+
+        Retorna tamanho, grid (lista de linhas), posicoes_palavras e as
+        palavras colocadas e não inseridas, na ordem da lista pedida.
+        """
+        chave = self.chave(nivel, palavras, semente, tamanho, modo)
+        with self._trava:
+            registro = self.indice.get(chave)
+            if registro is None:
+                return None
+            self.indice.move_to_end(chave)
+            self._tocar(registro)
+
+            deslocamento = self._deslocamento(registro)
+            _, _, tamanho, quantidade, _, _, _ = _REGISTRO.unpack_from(self.mapa, deslocamento)
+            inicio_grid = deslocamento + _REGISTRO.size
+            letras = self.mapa[inicio_grid:inicio_grid + (tamanho * tamanho * 5 + 39) // 40 * 5]
+            inicio_posicoes = inicio_grid + self._bytes_grid
+            posicoes = self.mapa[inicio_posicoes:inicio_posicoes + quantidade * _POSICAO.size]
+
+        texto = descompactar_letras(letras, tamanho * tamanho)
+        linhas_grid = [texto[linha * tamanho:(linha + 1) * tamanho] for linha in range(tamanho)]
+
+        ordenadas = sorted(set(palavra.upper() for palavra in palavras))
+        posicoes_palavras = {}
+        for indice, palavra in enumerate(ordenadas[:quantidade]):
+            linha, coluna, direcao = _POSICAO.unpack_from(posicoes, indice * _POSICAO.size)
+            if direcao == _NAO_INSERIDA:
+                continue
+            dl, dc = DIRECOES_TODAS[_NOMES_DIRECOES[direcao]]
+            posicoes_palavras[palavra] = [(linha + dl * i, coluna + dc * i) for i in range(len(palavra))]
+
+        pedidas = list(dict.fromkeys(palavra.upper() for palavra in palavras))
+        return {
+            'tamanho': tamanho,
+            'grid': linhas_grid,
+            'posicoes_palavras': posicoes_palavras,
+            'palavras': [palavra for palavra in pedidas if palavra in posicoes_palavras],
+            'nao_inseridas': [palavra for palavra in pedidas if palavra not in posicoes_palavras],
+        }
+
+    def fechar(self):
+        """Grava as alterações pendentes e fecha o arquivo"""
+        if getattr(self, 'mapa', None) is not None:
+            self.mapa.flush()
+            self.mapa.close()
+            self.mapa = None
+        if getattr(self, 'arquivo', None) is not None:
+            self.arquivo.close()
+            self.arquivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
@@ -0,0 +1,204 @@
+import os
+import random
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from grid import LETRAS
+
+_BIT_LETRA = {letra: 1 << indice for indice, letra in enumerate(LETRAS)}
+# Separador opcional entre a palavra e seus temas numa linha do arquivo
+_SEPARADOR_TEMAS = '\t'
+# Quantos baldes filtrados por conjunto de letras ficam guardados (veja BancoPalavras._baldes)
+_FILTROS_MAX = 256
+
+
+def normalizar(palavra):
+    """Remove acentos e passa para maiúsculas (SEGURANÇA -> SEGURANCA).
+
+    Retorna None se sobrar algo fora de A-Z (espaços, hífens, dígitos...),
+    inclusive o caractere de substituição (U+FFFD) de um texto mal decodificado.
+    """
+    palavra = palavra.strip().upper()
+    if '\ufffd' in palavra:
+        return None
+    if not palavra.isascii():
+        palavra = unicodedata.normalize('NFKD', palavra).encode('ascii', 'ignore').decode('ascii')
+    if not palavra.isalpha() or not palavra.isascii():
+        return None
+    return palavra
+
+
+def mascara_letras(palavra):
+    """Conjunto de letras da palavra como um inteiro de 26 bits"""
+    mascara = 0
+    for letra in set(palavra):
+        mascara |= _BIT_LETRA[letra]
+    return mascara
+
+
+def _arquivos(caminho):
+    """Arquivos de palavras de um caminho, com o tema implícito de cada um"""
+    if not os.path.isdir(caminho):
+        yield caminho, None
+        return
+    # Num diretório, o nome de cada arquivo (sem extensão) vira um tema
+    for raiz, diretorios, nomes in os.walk(caminho):
+        diretorios.sort()
+        for nome in sorted(nomes):
+            if not nome.startswith('.'):
+                yield os.path.join(raiz, nome), os.path.splitext(nome)[0].lower()
+
+
+class BancoPalavras:
+    """Banco de palavras externo, indexado por tamanho, tema e conjunto de letras.
+
+    Lê um arquivo UTF-8 (uma palavra por linha, com temas opcionais depois
+    de um TAB, separados por vírgula) ou um diretório desses arquivos, linha
+    a linha. Um arquivo que não seja UTF-8 válido gera ValueError com o
+    arquivo e a linha. Só carrega na primeira consulta; use obter_banco()
+    para que todas as sessões compartilhem a mesma instância.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.carregado = False
+        self._trava = threading.Lock()
+        self.palavras = []
+        self.mascaras = array('I')
+        self.temas = {}
+        # (tema ou None, tamanho) -> índices das palavras
+        self.indice = {}
+        # (tema ou None, tamanho, máscara de letras permitidas) -> índices das palavras que cabem nela
+        self.filtrados = {}
+
+    def __len__(self):
+        self._carregar()
+        return len(self.palavras)
+
+    def _carregar(self):
+        if self.carregado:
+            return
+        with self._trava:
+            if self.carregado:
+                return
+            posicao = {}
+            temas_por_palavra = []
+            for arquivo, tema_arquivo in _arquivos(self.caminho):
+                bit_arquivo = self._bit_tema(tema_arquivo) if tema_arquivo else 0
+                with open(arquivo, 'rb') as entrada:
+                    for numero, bruta in enumerate(entrada, 1):
+                        try:
+                            linha = bruta.decode('utf-8')
+                        except UnicodeDecodeError as erro:
+                            raise ValueError(f"{arquivo}, linha {numero}: não é UTF-8 válido ({erro.reason})") from erro
+                        texto, _, temas = linha.partition(_SEPARADOR_TEMAS)
+                        if texto.startswith('#'):
+                            continue
+                        palavra = normalizar(texto)
+                        if palavra is None:
+                            continue
+                        bits = bit_arquivo
+                        for tema in temas.split(','):
+                            tema = tema.strip().lower()
+                            if tema:
+                                bits |= self._bit_tema(tema)
+                        indice = posicao.get(palavra)
+                        if indice is None:
+                            posicao[palavra] = len(self.palavras)
+                            self.palavras.append(palavra)
+                            temas_por_palavra.append(bits)
+                        else:
+                            temas_por_palavra[indice] |= bits
+            self._indexar(temas_por_palavra)
+            self.carregado = True
+
+    def _bit_tema(self, tema):
+        bit = self.temas.get(tema)
+        if bit is None:
+            bit = self.temas[tema] = 1 << len(self.temas)
+        return bit
+
+    def _indexar(self, temas_por_palavra):
+        nomes_temas = list(self.temas.items())
+        for indice, palavra in enumerate(self.palavras):
+            self.mascaras.append(mascara_letras(palavra))
+            tamanho = len(palavra)
+            self.indice.setdefault((None, tamanho), array('I')).append(indice)
+            bits = temas_por_palavra[indice]
+            if bits:
+                for tema, bit in nomes_temas:
+                    if bits & bit:
+                        self.indice.setdefault((tema, tamanho), array('I')).append(indice)
+
+    def _baldes(self, comprimento, tamanho_grid, tema, permitidas=None):
+        """Listas de índices que atendem ao tamanho, ao tema e (se dada) à máscara de letras"""
+        minimo, maximo = comprimento if comprimento is not None else (1, None)
+        if tamanho_grid is not None:
+            maximo = tamanho_grid if maximo is None else min(maximo, tamanho_grid)
+        tema = tema.lower() if tema else None
+        baldes = []
+        for (tema_balde, tamanho), indices in self.indice.items():
+            if tema_balde != tema or tamanho < minimo or (maximo is not None and tamanho > maximo):
+                continue
+            if permitidas is not None:
+                indices = self._filtrar(tema_balde, tamanho, indices, permitidas)
+            baldes.append(indices)
+        return baldes
+
+    def _filtrar(self, tema, tamanho, indices, permitidas):
+        """Índices do balde escritos só com as letras permitidas; cada filtro é calculado uma vez"""
+        chave = (tema, tamanho, permitidas)
+        filtrados = self.filtrados.get(chave)
+        if filtrados is None:
+            if len(self.filtrados) >= _FILTROS_MAX:
+                self.filtrados.clear()
+            proibidas = ~permitidas
+            mascaras = self.mascaras
+            filtrados = self.filtrados[chave] = array('I', (indice for indice in indices
+                                                            if not mascaras[indice] & proibidas))
+        return filtrados
+
+    def contar(self, comprimento=None, tamanho_grid=None, tema=None):
+        """Quantas palavras atendem às restrições (sem contar o filtro de letras)"""
+        self._carregar()
+        return sum(len(indices) for indices in self._baldes(comprimento, tamanho_grid, tema))
+
+    def amostrar(self, quantidade, comprimento=None, tamanho_grid=None, tema=None, letras=None, rng=None):
+        """Sorteia palavras distintas que atendem às restrições.
+
+        comprimento é um par (mínimo, máximo), inclusivo; tamanho_grid limita o
+        tamanho ao lado do tabuleiro; letras restringe às palavras escritas só
+        com essas letras. Pode devolver menos palavras se não houver o bastante.
+        """
+        self._carregar()
+        rng = rng or random
+        permitidas = mascara_letras(normalizar(letras) or '') if letras else None
+        baldes = self._baldes(comprimento, tamanho_grid, tema, permitidas)
+        acumulados = list(accumulate(len(indices) for indices in baldes))
+        total = acumulados[-1] if acumulados else 0
+
+        def palavra_na_posicao(posicao):
+            balde = bisect_right(acumulados, posicao)
+            inicio = acumulados[balde - 1] if balde else 0
+            return baldes[balde][posicao - inicio]
+
+        # Sorteia posições na concatenação virtual dos baldes, sem montá-la
+        posicoes = rng.sample(range(total), min(quantidade, total))
+        return [self.palavras[palavra_na_posicao(posicao)] for posicao in posicoes]
+
+
+_BANCOS = {}
+_TRAVA_BANCOS = threading.Lock()
+
+
+def obter_banco(caminho):
+    """Banco compartilhado por caminho: o arquivo é lido uma única vez por processo"""
+    chave = os.path.abspath(caminho)
+    with _TRAVA_BANCOS:
+        banco = _BANCOS.get(chave)
+        if banco is None:
+            banco = _BANCOS[chave] = BancoPalavras(caminho)
+    return banco
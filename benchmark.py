@@ -0,0 +1,245 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from grid import LETRAS
+from main import CacaPalavras
+
+# Casos padrão de geração: (lado do grid, quantidade de palavras)
+CASOS_GERACAO = [
+    (10, 10), (20, 40), (50, 200), (100, 500), (100, 1000),
+    (200, 2000), (300, 3000), (500, 5000),
+]
+CASOS_GERACAO_RAPIDOS = [(10, 10), (20, 40), (50, 200), (100, 500)]
+TAMANHOS_RENDER = [10, 20, 50, 100, 200, 500]
+TAMANHOS_RENDER_RAPIDOS = [10, 20, 50]
+
+
+def palavras_sinteticas(quantidade, tamanho, semente):
+    """Palavras aleatórias reproduzíveis, com 3 a 12 letras (limitadas ao grid)"""
+    rng = random.Random(semente)
+    maximo = max(3, min(12, tamanho))
+    palavras = set()
+    while len(palavras) < quantidade:
+        palavras.add(''.join(rng.choice(LETRAS) for _ in range(rng.randint(3, maximo))))
+    return sorted(palavras)
+
+
+def _resumo(amostras):
+    """Estatísticas de uma lista de tempos em segundos"""
+    ordenadas = sorted(amostras)
+    return {
+        'min': ordenadas[0],
+        'mediana': statistics.median(ordenadas),
+        'p99': ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.99))],
+        'amostras': len(ordenadas),
+    }
+
+
+def _novo_jogo(tamanho, palavras, semente, backend):
+    jogo = CacaPalavras(backend=backend, semente=semente)
+    jogo.reiniciar_jogo(1, palavras=palavras, tamanho=tamanho)
+    return jogo
+
+
+def medir_geracao(tamanho, quantidade, repeticoes, semente, backend='bytes'):
+    """Vazão de gerar_caca_palavras, taxa de inserção e chamadas a pode_colocar_palavra"""
+    palavras = palavras_sinteticas(quantidade, tamanho, semente)
+    tempos = []
+    inseridas = 0
+    chamadas = 0
+    for repeticao in range(repeticoes):
+        jogo = _novo_jogo(tamanho, palavras, semente + repeticao, backend)
+        original = jogo.pode_colocar_palavra
+        contador = [0]
+
+        def pode_colocar_contando(*args):
+            contador[0] += 1
+            return original(*args)
+
+        jogo.pode_colocar_palavra = pode_colocar_contando
+        gc.collect()
+        inicio = time.perf_counter()
+        jogo.gerar_caca_palavras()
+        tempos.append(time.perf_counter() - inicio)
+        inseridas += len(jogo.palavras)
+        chamadas += contador[0]
+
+    resumo = _resumo(tempos)
+    return {
+        'tamanho': tamanho,
+        'palavras': quantidade,
+        'segundos': resumo,
+        'puzzles_por_segundo': 1 / resumo['mediana'] if resumo['mediana'] else None,
+        'taxa_insercao': inseridas / (quantidade * repeticoes),
+        'pode_colocar_por_puzzle': chamadas / repeticoes,
+    }
+
+
+def medir_selecao(tamanho, quantidade, repeticoes, semente, backend='bytes'):
+    """Latência média de verificar_selecao para seleções corretas e erradas"""
+    jogo = _novo_jogo(tamanho, palavras_sinteticas(quantidade, tamanho, semente), semente, backend)
+    jogo.gerar_caca_palavras()
+    rng = random.Random(semente)
+    corretas = [(posicoes[0], posicoes[-1]) for posicoes in jogo.posicoes_palavras.values()]
+    erradas = [((rng.randrange(tamanho), rng.randrange(tamanho)), (rng.randrange(tamanho), rng.randrange(tamanho)))
+               for _ in range(len(corretas))]
+
+    resultados = {}
+    for nome, selecoes in (('corretas', corretas), ('erradas', erradas)):
+        tempos = []
+        # Cada chamada leva microssegundos: mede passadas inteiras e divide
+        for _ in range(repeticoes * 5):
+            jogo.palavras_encontradas = set()
+            jogo.marcacoes = set()
+            inicio = time.perf_counter()
+            for inicio_sel, fim_sel in selecoes:
+                jogo.verificar_selecao(inicio_sel, fim_sel)
+            tempos.append((time.perf_counter() - inicio) / len(selecoes))
+        resultados[nome] = _resumo(tempos)
+    return {'tamanho': tamanho, 'palavras': len(jogo.palavras), 'segundos': resultados}
+
+
+def medir_render(tamanho, repeticoes, semente, backend='bytes'):
+    """Tempo de exibir_grid e do quadro completo, com a saída capturada"""
+    jogo = _novo_jogo(tamanho, palavras_sinteticas(max(1, tamanho // 2), tamanho, semente), semente, backend)
+    jogo.gerar_caca_palavras()
+    # Metade das palavras marcadas, para as células destacadas também contarem
+    for palavra in jogo.palavras[::2]:
+        jogo.marcacoes.update(jogo.posicoes_palavras[palavra])
+        jogo.palavras_encontradas.add(palavra)
+
+    resultados = {}
+    for nome, desenhar in (('exibir_grid', jogo.exibir_grid),
+                           ('quadro_completo', lambda: jogo.renderizador.desenhar(jogo.montar_quadro()))):
+        tempos = []
+        bytes_saida = 0
+        for _ in range(repeticoes):
+            saida = io.StringIO()
+            jogo.renderizador.saida = saida
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(saida):
+                desenhar()
+            tempos.append(time.perf_counter() - inicio)
+            bytes_saida = len(saida.getvalue().encode('utf-8'))
+        resultados[nome] = dict(_resumo(tempos), bytes=bytes_saida)
+    return {'tamanho': tamanho, 'segundos': resultados}
+
+
+def _commit_atual():
+    """Commit do git em que o benchmark rodou, se houver um repositório"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(casos_geracao, tamanhos_render, repeticoes=3, semente=0, backend='bytes', registrar=None):
+    """Roda todas as medições e retorna o resultado pronto para virar JSON"""
+    registrar = registrar or (lambda mensagem: None)
+    resultado = {
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semente': semente,
+        'repeticoes': repeticoes,
+        'backend': backend,
+        'geracao': [],
+        'selecao': [],
+        'render': [],
+    }
+    for tamanho, quantidade in casos_geracao:
+        registrar(f"geração {tamanho}x{tamanho}, {quantidade} palavras")
+        resultado['geracao'].append(medir_geracao(tamanho, quantidade, repeticoes, semente, backend))
+    for tamanho, quantidade in casos_geracao:
+        registrar(f"seleção {tamanho}x{tamanho}, {quantidade} palavras")
+        resultado['selecao'].append(medir_selecao(tamanho, quantidade, repeticoes, semente, backend))
+    for tamanho in tamanhos_render:
+        registrar(f"render {tamanho}x{tamanho}")
+        resultado['render'].append(medir_render(tamanho, max(repeticoes, 5), semente, backend))
+    return resultado
+
+
+def _minimos(resultado):
+    """Achata o resultado em {nome da medição: menor tempo em segundos}.
+
+    O mínimo é o tempo menos afetado por ruído da máquina, então é ele que
+    entra na comparação entre execuções.
+    """
+    minimos = {}
+    for caso in resultado['geracao']:
+        minimos[f"geracao {caso['tamanho']}x{caso['palavras']}"] = caso['segundos']['min']
+    for secao in ('selecao', 'render'):
+        for caso in resultado[secao]:
+            for nome, tempos in caso['segundos'].items():
+                minimos[f"{secao} {caso['tamanho']} {nome}"] = tempos['min']
+    return minimos
+
+
+def comparar(base, atual, tolerancia=0.2):
+    """Compara duas execuções; retorna as linhas do relatório e as regressões"""
+    linhas = []
+    regressoes = []
+    minimos_base = _minimos(base)
+    for nome, minimo in _minimos(atual).items():
+        anterior = minimos_base.get(nome)
+        if not anterior:
+            continue
+        razao = minimo / anterior
+        marca = ''
+        if razao > 1 + tolerancia:
+            marca = '  <- REGRESSÃO'
+            regressoes.append(nome)
+        linhas.append(f"{nome:<40} {anterior * 1000:10.4f} ms -> {minimo * 1000:10.4f} ms  x{razao:.2f}{marca}")
+    return linhas, regressoes
+
+
+def main_benchmark(argv=None):
+    """Linha de comando dos benchmarks"""
+    parser = argparse.ArgumentParser(
+        prog='main.py benchmark',
+        description='Mede geração, verificação de seleções e desenho com sementes fixas (saída em JSON).')
+    parser.add_argument('--rapido', action='store_true', help='só os casos pequenos')
+    parser.add_argument('--caso', action='append', metavar='TAMANHOxPALAVRAS',
+                        help='caso de geração específico (pode repetir), ex.: 100x1000')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--backend', default='bytes', help='backend do grid (bytes, numpy ou esparso)')
+    parser.add_argument('-o', '--saida', help='arquivo JSON de saída (padrão: saída padrão)')
+    parser.add_argument('--comparar', metavar='BASE.json', help='compara com um resultado anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='piora relativa aceita antes de acusar regressão (padrão: 0.2)')
+    args = parser.parse_args(argv)
+
+    if args.caso:
+        casos = [tuple(int(parte) for parte in caso.lower().split('x')) for caso in args.caso]
+        tamanhos_render = sorted({tamanho for tamanho, _ in casos})
+    elif args.rapido:
+        casos, tamanhos_render = CASOS_GERACAO_RAPIDOS, TAMANHOS_RENDER_RAPIDOS
+    else:
+        casos, tamanhos_render = CASOS_GERACAO, TAMANHOS_RENDER
+
+    resultado = executar(casos, tamanhos_render, args.repeticoes, args.semente, args.backend,
+                         registrar=lambda mensagem: print(f"  {mensagem}...", file=sys.stderr, flush=True))
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            linhas, regressoes = comparar(json.load(arquivo), resultado, args.tolerancia)
+        print('\n'.join(linhas), file=sys.stderr)
+        return 1 if regressoes else 0
+    return 0
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from solucionador import Solucionador
+
+
+class ClienteJogo:
+    """Cliente do protocolo de linhas do servidor"""
+
+    def __init__(self, leitor, escritor):
+        self.leitor = leitor
+        self.escritor = escritor
+
+    @classmethod
+    async def conectar(cls, host='127.0.0.1', porta=5050):
+        leitor, escritor = await asyncio.open_connection(host, porta, limit=1 << 20)
+        return cls(leitor, escritor)
+
+    async def enviar(self, comando):
+        """Envia um comando e espera a resposta JSON"""
+        self.escritor.write(comando.encode('utf-8') + b'\n')
+        await self.escritor.drain()
+        resposta = await self.leitor.readline()
+        if not resposta:
+            raise ConnectionError("O servidor fechou a conexão")
+        return json.loads(resposta)
+
+    async def fechar(self):
+        try:
+            await self.enviar('SAIR')
+        finally:
+            self.escritor.close()
+            await self.escritor.wait_closed()
+
+
+async def jogar_automatico(host, porta, nivel=1, semente=None):
+    """Joga uma partida inteira resolvendo o grid recebido; retorna quantas seleções fez"""
+    cliente = await ClienteJogo.conectar(host, porta)
+    try:
+        comando = f'NOVO {nivel}' + (f' {semente}' if semente is not None else '')
+        estado = await cliente.enviar(comando)
+        jogadas = 0
+        for ocorrencia in Solucionador(estado['palavras']).resolver(estado['grid']):
+            (l1, c1), (l2, c2) = ocorrencia.inicio, ocorrencia.fim
+            resposta = await cliente.enviar(f'SEL {l1},{c1} {l2},{c2}')
+            jogadas += 1
+            if not resposta['ok']:
+                raise RuntimeError(resposta['erro'])
+        estado = await cliente.enviar('ESTADO')
+        if not estado['completo']:
+            raise RuntimeError(f"Partida terminou incompleta: {estado['encontradas']}")
+        return jogadas
+    finally:
+        await cliente.fechar()
+
+
+async def carga(host, porta, clientes, partidas, nivel):
+    """Roda várias partidas automáticas em paralelo e mede a vazão"""
+    inicio = time.perf_counter()
+    semaforo = asyncio.Semaphore(clientes)
+
+    async def uma_partida(indice):
+        async with semaforo:
+            return await jogar_automatico(host, porta, nivel, semente=indice)
+
+    jogadas = await asyncio.gather(*(uma_partida(indice) for indice in range(partidas)))
+    duracao = time.perf_counter() - inicio
+    return {
+        'partidas': partidas,
+        'clientes_simultaneos': clientes,
+        'selecoes': sum(jogadas),
+        'segundos': round(duracao, 3),
+        'partidas_por_segundo': round(partidas / duracao, 1),
+        'selecoes_por_segundo': round(sum(jogadas) / duracao, 1),
+    }
+
+
+async def interativo(host, porta):
+    """Repassa linhas digitadas para o servidor e mostra as respostas"""
+    cliente = await ClienteJogo.conectar(host, porta)
+    laco = asyncio.get_running_loop()
+    try:
+        while True:
+            linha = await laco.run_in_executor(None, sys.stdin.readline)
+            if not linha:
+                break
+            if not linha.strip():
+                continue
+            resposta = await cliente.enviar(linha.strip())
+            print(json.dumps(resposta, ensure_ascii=False), flush=True)
+            if resposta.get('tchau'):
+                return
+    finally:
+        cliente.escritor.close()
+
+
+def main_cliente(argv=None):
+    """Linha de comando do cliente de teste"""
+    parser = argparse.ArgumentParser(prog='main.py cliente',
+                                     description='Cliente de teste do servidor do caça-palavras.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=5050)
+    parser.add_argument('--nivel', type=int, default=1)
+    parser.add_argument('--partidas', type=int, default=1, help='partidas automáticas a jogar')
+    parser.add_argument('--clientes', type=int, default=1, help='conexões simultâneas')
+    parser.add_argument('--interativo', action='store_true',
+                        help='envia comandos digitados em vez de jogar sozinho')
+    args = parser.parse_args(argv)
+
+    if args.interativo:
+        asyncio.run(interativo(args.host, args.porta))
+    else:
+        resultado = asyncio.run(carga(args.host, args.porta, args.clientes, args.partidas, args.nivel))
+        print(json.dumps(resultado, ensure_ascii=False))
+    return 0
@@ -0,0 +1,287 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+# Cada registro: tamanho e CRC-32 do conteúdo (JSON em UTF-8), seguidos do conteúdo
+_REGISTRO = struct.Struct('<II')
+_ASSINATURA = b'CSD1'
+# Tipos de registro: retrato completo da sessão, resultado de uma jogada, dica dada e nível concluído
+_SESSAO = 'S'
+_JOGADA = 'J'
+_DICA = 'D'
+_CONCLUSAO = 'F'
+# Abaixo deste tamanho o diário nunca é compactado...
+COMPACTAR_ACIMA = 1 << 20
+# ...nem enquanto não passar deste múltiplo do tamanho que teria compactado
+FATOR_COMPACTACAO = 4
+
+
+def pontuar(encontradas, tempo, dicas=0):
+    """Pontos de um nível: 100 por palavra, menos 1 por segundo e 25 por nível de dica.
+
+    dicas soma os níveis dados a cada palavra (no máximo 3 por palavra), no
+    terminal e no servidor.
+    """
+    return max(0, 100 * encontradas - int(tempo) - 25 * dicas)
+
+
+def posicoes_entre(l1, c1, l2, c2):
+    """As células de um segmento reto, da primeira à última"""
+    passos = max(abs(l2 - l1), abs(c2 - c1))
+    sl = (l2 > l1) - (l2 < l1)
+    sc = (c2 > c1) - (c2 < c1)
+    return [(l1 + sl * i, c1 + sc * i) for i in range(passos + 1)]
+
+
+def estado_do_jogo(jogo):
+    """Retrato de um CacaPalavras ou de uma SessaoJogo: tudo o que é preciso para retomá-lo"""
+    tamanho = jogo.tamanho
+    if hasattr(jogo, 'posicoes_palavras'):
+        grid = [jogo.grid.ler_linha(linha) for linha in range(tamanho)]
+        extremos = [[*jogo.posicoes_palavras[palavra][0], *jogo.posicoes_palavras[palavra][-1]]
+                    for palavra in jogo.palavras]
+        encontradas = [palavra for palavra in jogo.palavras if palavra in jogo.palavras_encontradas]
+        niveis = jogo.dicas.niveis if jogo.dicas is not None else {}
+        dicas = [niveis.get(palavra, 0) for palavra in jogo.palavras]
+        atual = jogo.dicas.atual if jogo.dicas is not None else None
+        dica_atual = jogo.palavras.index(atual) if atual is not None else -1
+    else:
+        grid = [jogo.ler_linha(linha) for linha in range(tamanho)]
+        extremos = [[*divmod(jogo.extremos[2 * i], tamanho), *divmod(jogo.extremos[2 * i + 1], tamanho)]
+                    for i in range(len(jogo.palavras))]
+        encontradas = jogo.lista_encontradas()
+        dicas = jogo.niveis_dica
+        dica_atual = jogo.dica_atual
+    return {
+        'nivel': jogo.nivel,
+        'semente': jogo.semente,
+        'tamanho': tamanho,
+        'grid': grid,
+        'palavras': list(jogo.palavras),
+        'solicitadas': list(jogo.palavras_solicitadas),
+        'extremos': extremos,
+        'encontradas': encontradas,
+        # Nível de dica já dado a cada palavra (na ordem de palavras) e o índice da que está recebendo dicas
+        'dicas': dicas,
+        'dica_atual': dica_atual,
+    }
+
+
+def _codificar(registro):
+    conteudo = json.dumps(registro, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return _REGISTRO.pack(len(conteudo), zlib.crc32(conteudo)) + conteudo
+
+
+def _registros(dados, posicao):
+    """Gera (fim, registro) até acabarem os dados ou aparecer um registro cortado ou corrompido"""
+    while posicao + _REGISTRO.size <= len(dados):
+        tamanho, crc = _REGISTRO.unpack_from(dados, posicao)
+        inicio = posicao + _REGISTRO.size
+        conteudo = dados[inicio:inicio + tamanho]
+        if len(conteudo) < tamanho or zlib.crc32(conteudo) != crc:
+            return
+        try:
+            registro = json.loads(conteudo)
+        except ValueError:
+            return
+        posicao = inicio + tamanho
+        yield posicao, registro
+
+
+class DiarioSessoes:
+    """Diário de sessões e pontuações que só recebe acréscimos.
+
+    Cada gravação é um único write() de um registro pequeno no fim do
+    arquivo: um retrato completo no início de cada nível e, depois, só a
+    palavra achada e o tempo de cada jogada e o nível de cada dica. Ao abrir, um último registro
+    cortado (queda no meio de uma gravação) é descartado. Quando o arquivo
+    cresce demais, uma thread reescreve só o estado atual num arquivo novo
+    e o troca de lugar. Um processo por arquivo; as sessões desse processo
+    podem gravar ao mesmo tempo.
+    """
+
+    def __init__(self, caminho, compactar_acima=COMPACTAR_ACIMA, sincronizar=False):
+        self.caminho = caminho
+        self.compactar_acima = compactar_acima
+        # Com sincronizar, cada registro espera o fsync (mais seguro, bem mais lento)
+        self.sincronizar = sincronizar
+        self._trava = threading.Lock()
+        # id da sessão -> estado atual (como estado_do_jogo, mais tempo; ou só nivel e concluida)
+        self.sessoes = {}
+        self.pontuacoes = []
+        # Bytes de um último registro cortado, removidos ao abrir
+        self.descartados = 0
+        self.compactacoes = 0
+        self._compactacao = None
+        self._fd = None
+        self._abrir()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def _abrir(self):
+        self._fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        with open(self.caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+        if not dados:
+            os.write(self._fd, _ASSINATURA)
+            dados = _ASSINATURA
+        elif not dados.startswith(_ASSINATURA):
+            os.close(self._fd)
+            raise ValueError(f"{self.caminho} não é um diário de sessões")
+
+        valido = len(_ASSINATURA)
+        for valido, registro in _registros(dados, valido):
+            self._aplicar(registro)
+        if valido < len(dados):
+            self.descartados = len(dados) - valido
+            os.ftruncate(self._fd, valido)
+        self.tamanho = valido
+        self._tamanho_vivo = len(_ASSINATURA) + sum(len(_codificar(registro)) for registro in self._estado_atual())
+
+    def _aplicar(self, registro):
+        tipo = registro['t']
+        id_sessao = registro['id']
+        if tipo == _SESSAO:
+            estado = {chave: valor for chave, valor in registro.items() if chave not in ('t', 'id')}
+            estado.setdefault('encontradas', [])
+            estado.setdefault('tempo', 0.0)
+            estado.setdefault('dicas', [0] * len(estado['palavras']))
+            estado.setdefault('dica_atual', -1)
+            self.sessoes[id_sessao] = estado
+        elif tipo == _JOGADA:
+            estado = self.sessoes.get(id_sessao)
+            if estado is None or estado.get('concluida'):
+                return
+            if 'p' in registro:
+                estado['encontradas'].append(registro['p'])
+            estado['tempo'] = registro['s']
+        elif tipo == _DICA:
+            estado = self.sessoes.get(id_sessao)
+            if estado is None or estado.get('concluida'):
+                return
+            estado['dicas'][registro['i']] = registro['n']
+            estado['dica_atual'] = registro['i']
+        elif tipo == _CONCLUSAO:
+            self.sessoes[id_sessao] = {'nivel': registro['nivel'], 'concluida': True}
+            self.pontuacoes.append(registro)
+
+    def _estado_atual(self):
+        """Registros que recriam o estado atual: as conclusões e um retrato por sessão em andamento"""
+        registros = list(self.pontuacoes)
+        for id_sessao, estado in self.sessoes.items():
+            if not estado.get('concluida'):
+                registros.append(dict(estado, t=_SESSAO, id=id_sessao, encontradas=list(estado['encontradas']),
+                                      dicas=list(estado['dicas'])))
+        return registros
+
+    def _gravar(self, registro):
+        dados = _codificar(registro)
+        with self._trava:
+            if self._fd is None:
+                raise ValueError("Diário de sessões já fechado")
+            os.write(self._fd, dados)
+            if self.sincronizar:
+                os.fsync(self._fd)
+            self.tamanho += len(dados)
+            self._aplicar(registro)
+            compactar = (self._compactacao is None and self.tamanho >= self.compactar_acima
+                         and self.tamanho >= FATOR_COMPACTACAO * self._tamanho_vivo)
+            if compactar:
+                compactacao = self._compactacao = threading.Thread(
+                    target=self.compactar, name='compactacao-diario', daemon=True)
+        if compactar:
+            compactacao.start()
+
+    def salvar_sessao(self, id_sessao, jogo, tempo=0.0):
+        """Grava o retrato completo da sessão (no início de cada nível)"""
+        self._gravar(dict(estado_do_jogo(jogo), t=_SESSAO, id=id_sessao, tempo=round(tempo, 3)))
+
+    def registrar_jogada(self, id_sessao, resultado, palavra, tempo):
+        """Grava o que mudou com um verificar_selecao: a palavra achada (se houver) e o tempo"""
+        registro = {'t': _JOGADA, 'id': id_sessao, 's': round(tempo, 3)}
+        if resultado == 'CORRETA':
+            registro['p'] = palavra
+        self._gravar(registro)
+
+    def registrar_dica(self, id_sessao, indice, nivel):
+        """Grava o nível de dica dado à palavra de índice `indice` (na lista de palavras da sessão)"""
+        self._gravar({'t': _DICA, 'id': id_sessao, 'i': indice, 'n': nivel})
+
+    def concluir(self, id_sessao, nivel, tempo, pontos):
+        """Grava a pontuação de um nível terminado; a sessão deixa de estar em andamento"""
+        self._gravar({'t': _CONCLUSAO, 'id': id_sessao, 'nivel': nivel, 'tempo': round(tempo, 3),
+                      'pontos': pontos, 'quando': int(time.time())})
+
+    def retomar(self, id_sessao):
+        """Estado salvo da sessão (uma cópia), ou None se ela nunca foi salva"""
+        with self._trava:
+            estado = self.sessoes.get(id_sessao)
+            if estado is None:
+                return None
+            copia = dict(estado, encontradas=list(estado.get('encontradas', ())))
+            if 'dicas' in copia:
+                copia['dicas'] = list(copia['dicas'])
+            return copia
+
+    def placar(self, quantidade=10):
+        """As melhores pontuações, da maior para a menor"""
+        with self._trava:
+            pontuacoes = list(self.pontuacoes)
+        pontuacoes.sort(key=lambda registro: (-registro['pontos'], registro['tempo']))
+        return [{chave: valor for chave, valor in registro.items() if chave != 't'}
+                for registro in pontuacoes[:quantidade]]
+
+    def compactar(self):
+        """Reescreve o diário só com o estado atual, sem bloquear as gravações enquanto escreve"""
+        compactacao = self._compactacao
+        if compactacao is not None and compactacao is not threading.current_thread():
+            # Pedido fora da thread de compactação: espera a que já está em andamento
+            compactacao.join()
+        temporario = self.caminho + '.compactando'
+        try:
+            with self._trava:
+                if self._fd is None:
+                    return
+                registros = self._estado_atual()
+                corte = self.tamanho
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(_ASSINATURA)
+                for registro in registros:
+                    arquivo.write(_codificar(registro))
+                compactado = arquivo.tell()
+                with self._trava:
+                    # O que foi gravado enquanto isso vai junto, depois dos retratos
+                    with open(self.caminho, 'rb') as original:
+                        original.seek(corte)
+                        arquivo.write(original.read())
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                    os.replace(temporario, self.caminho)
+                    os.close(self._fd)
+                    self._fd = os.open(self.caminho, os.O_RDWR | os.O_APPEND)
+                    self.tamanho = arquivo.tell()
+                    self._tamanho_vivo = compactado
+                    self.compactacoes += 1
+        finally:
+            if self._compactacao is threading.current_thread():
+                self._compactacao = None
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    def fechar(self):
+        """Espera uma compactação em andamento e fecha o arquivo"""
+        compactacao = self._compactacao
+        if compactacao is not None and compactacao is not threading.current_thread():
+            compactacao.join()
+        with self._trava:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,144 @@
+from collections import namedtuple
+
+from posicionamento import DIRECOES_TODAS
+
+# Cada pedido para a mesma palavra sobe um nível, até revelar a palavra
+NIVEIS_DICA = {1: 'PRIMEIRA_LETRA', 2: 'DIRECAO', 3: 'PALAVRA'}
+NIVEL_MAXIMO = 3
+
+NOMES_DIRECOES = {
+    'H': 'para a direita →',
+    'HR': 'para a esquerda ←',
+    'V': 'para baixo ↓',
+    'VR': 'para cima ↑',
+    'D': 'na diagonal ↘',
+    'DR': 'na diagonal ↖',
+    'A': 'na diagonal ↗',
+    'AR': 'na diagonal ↙',
+}
+_DIRECAO_POR_PASSO = {passo: direcao for direcao, passo in DIRECOES_TODAS.items()}
+
+# celula é a da primeira letra; direcao só a partir do nível 2; palavra e posicoes completas só no 3
+Dica = namedtuple('Dica', ['nivel', 'celula', 'direcao', 'palavra', 'posicoes'])
+
+
+def direcao_entre(inicio, fim):
+    """Nome da direção (como em DIRECOES_TODAS) de um segmento reto"""
+    dl, dc = fim[0] - inicio[0], fim[1] - inicio[1]
+    return _DIRECAO_POR_PASSO[((dl > 0) - (dl < 0), (dc > 0) - (dc < 0))]
+
+
+def montar_dica(nivel, palavra, inicio, fim):
+    """Monta a dica de um nível a partir das pontas da palavra"""
+    if nivel < 2:
+        return Dica(nivel, inicio, None, None, [inicio])
+    direcao = direcao_entre(inicio, fim)
+    if nivel < NIVEL_MAXIMO:
+        return Dica(nivel, inicio, direcao, None, [inicio])
+    dl, dc = DIRECOES_TODAS[direcao]
+    posicoes = [(inicio[0] + dl * i, inicio[1] + dc * i) for i in range(len(palavra))]
+    return Dica(nivel, inicio, direcao, palavra, posicoes)
+
+
+def texto_dica(dica):
+    """Descreve a dica para o jogador"""
+    linha, coluna = dica.celula
+    if dica.nivel == 1:
+        return f"Uma palavra começa na célula {linha},{coluna}"
+    if dica.nivel == 2:
+        return f"Ela começa em {linha},{coluna} e segue {NOMES_DIRECOES[dica.direcao]}"
+    fim_linha, fim_coluna = dica.posicoes[-1]
+    return f"É {dica.palavra}, de {linha},{coluna} até {fim_linha},{fim_coluna}"
+
+
+class _Fila:
+    """Palavras em ordem fixa com um cursor que só avança: a primeira pendente sai em O(1) amortizado"""
+
+    __slots__ = ('palavras', 'cursor')
+
+    def __init__(self):
+        self.palavras = []
+        self.cursor = 0
+
+    def primeira(self, pendentes):
+        while self.cursor < len(self.palavras) and self.palavras[self.cursor] not in pendentes:
+            self.cursor += 1
+        return self.palavras[self.cursor] if self.cursor < len(self.palavras) else None
+
+
+class IndiceDicas:
+    """Responde pedidos de dica em tempo constante, sem varrer o grid.
+
+    Guarda um índice invertido da letra inicial para as palavras pendentes
+    que começam com ela (e daí, por posicoes_palavras, para a célula), o
+    nível de dica já dado a cada palavra e a palavra que está recebendo
+    dicas. É montado junto com o resto da geração e atualizado a cada
+    palavra encontrada.
+    """
+
+    def __init__(self, posicoes_palavras, palavras, encontradas=()):
+        self.posicoes_palavras = posicoes_palavras
+        self.pendentes = set()
+        self.todas = _Fila()
+        # letra -> palavras pendentes que começam com ela
+        self.por_letra = {}
+        self.niveis = {}
+        self.atual = None
+        # Pedidos atendidos e níveis dados somando as palavras (o que a pontuação desconta,
+        # como SessaoJogo.dicas_dadas: repetir o último nível de uma palavra não conta de novo)
+        self.dadas = 0
+        self.niveis_dados = 0
+        for palavra in palavras:
+            if palavra in encontradas or palavra not in posicoes_palavras or palavra in self.pendentes:
+                continue
+            self.pendentes.add(palavra)
+            self.todas.palavras.append(palavra)
+            fila = self.por_letra.get(palavra[0])
+            if fila is None:
+                fila = self.por_letra[palavra[0]] = _Fila()
+            fila.palavras.append(palavra)
+
+    def marcar_encontrada(self, palavra):
+        """Tira a palavra das dicas (as filas pulam as encontradas quando chegam nelas).
+
+        O nível dado a ela fica em niveis: ainda conta na pontuação e vai para o retrato da sessão.
+        """
+        self.pendentes.discard(palavra)
+        if self.atual == palavra:
+            self.atual = None
+
+    def restaurar(self, niveis, atual=None):
+        """Volta aos níveis de dica (palavra -> nível) e à palavra atual de uma sessão retomada"""
+        for palavra, nivel in niveis.items():
+            if nivel:
+                self.niveis_dados += nivel - self.niveis.get(palavra, 0)
+                self.niveis[palavra] = nivel
+        if atual in self.pendentes:
+            self.atual = atual
+
+    def escolher(self, letra=None):
+        """A palavra da próxima dica: a que já está recebendo dicas ou a primeira pendente"""
+        if letra is not None:
+            letra = letra.upper()
+            if self.atual is not None and self.atual.startswith(letra):
+                return self.atual
+            fila = self.por_letra.get(letra)
+            return fila.primeira(self.pendentes) if fila is not None else None
+        if self.atual is not None:
+            return self.atual
+        return self.todas.primeira(self.pendentes)
+
+    def dica(self, palavra=None, letra=None):
+        """Próxima dica (da palavra pedida, ou escolhida); None se não houver o que dizer"""
+        if palavra is None:
+            palavra = self.escolher(letra)
+        if palavra is None or palavra not in self.pendentes:
+            return None
+        anterior = self.niveis.get(palavra, 0)
+        nivel = min(anterior + 1, NIVEL_MAXIMO)
+        self.niveis[palavra] = nivel
+        self.atual = palavra
+        self.dadas += 1
+        self.niveis_dados += nivel - anterior
+        posicoes = self.posicoes_palavras[palavra]
+        return montar_dica(nivel, palavra, posicoes[0], posicoes[-1])
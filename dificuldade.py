@@ -0,0 +1,236 @@
+import argparse
+import json
+import math
+import sys
+import time
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional para o jogo, mas a pontuação em lote depende dele
+    np = None
+
+from grid import CODIFICACAO, LETRAS
+
+# Letras iniciais que uma sequência precisa repetir para contar como isca
+COMPRIMENTO_ISCA = 3
+# Faixa aceita: a tabela de prefixos tem 27 ** comprimento colunas por puzzle
+COMPRIMENTOS_ISCA = range(2, 5)
+# Peso de cada métrica (todas normalizadas entre 0 e 1) na pontuação final
+PESOS = {
+    'diagonais': 0.25,
+    'mistura_direcoes': 0.10,
+    'sobreposicao': 0.05,
+    'iscas': 0.25,
+    'vazio': 0.10,
+    'area': 0.25,
+}
+# Células em que a métrica de área chega a 1 - 1/e: tabuleiros bem maiores que isso já contam como enormes
+ESCALA_AREA = 400
+# Pontuações de corte entre os níveis 1 e 2 e entre 2 e 3: os tercis de 3000 puzzles
+# gerados com as palavras padrão dos três níveis do jogo
+LIMITES_NIVEIS = (0.27, 0.33)
+# Eixos de leitura das palavras, na ordem das colunas da contagem de direções
+EIXOS = ('horizontal', 'vertical', 'diagonal', 'antidiagonal')
+# Células com algo fora de A-Z recebem o código 26, que nenhuma palavra usa
+_BASE = len(LETRAS) + 1
+_PASSOS = ((0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1))
+# Limite de células da tabela de prefixos de um bloco (puzzles x prefixos possíveis)
+_CELULAS_TABELA = 1 << 22
+
+
+def _tabela_codigos():
+    tabela = np.full(256, len(LETRAS), dtype=np.int32)
+    tabela[np.frombuffer(LETRAS.encode(CODIFICACAO), dtype=np.uint8)] = np.arange(len(LETRAS))
+    return tabela
+
+
+def _codigo_prefixo(palavra, comprimento):
+    codigo = 0
+    for letra in palavra[:comprimento]:
+        codigo = codigo * _BASE + (ord(letra) - ord('A') if 'A' <= letra <= 'Z' else len(LETRAS))
+    return codigo
+
+
+def nivel_por_pontuacao(pontuacao, limites=LIMITES_NIVEIS):
+    """Nível (1, 2, 3, ...) em que a pontuação cai"""
+    return bisect_right(limites, pontuacao) + 1
+
+
+def _pontuar_bloco(puzzles, tamanho, comprimento_isca, tabela_codigos):
+    """Métricas de puzzles do mesmo tamanho, calculadas de uma vez para o bloco todo"""
+    quantidade = len(puzzles)
+    celulas = tamanho * tamanho
+    texto = ''.join(''.join(puzzle['grid']) for puzzle in puzzles).encode(CODIFICACAO)
+    codigos = tabela_codigos[np.frombuffer(texto, dtype=np.uint8)].reshape(quantidade, tamanho, tamanho)
+
+    # Pontas de todas as palavras do bloco num só conjunto de vetores
+    donos, inicios, fins, comprimentos = [], [], [], []
+    donos_prefixo, prefixos = [], []
+    for indice, puzzle in enumerate(puzzles):
+        for palavra, posicoes in puzzle['posicoes_palavras'].items():
+            donos.append(indice)
+            inicios.append(posicoes[0])
+            fins.append(posicoes[-1])
+            comprimentos.append(len(posicoes))
+            if len(palavra) >= comprimento_isca:
+                donos_prefixo.append(indice)
+                prefixos.append(_codigo_prefixo(palavra, comprimento_isca))
+    donos = np.array(donos, dtype=np.int64)
+    inicios = np.array(inicios, dtype=np.int64).reshape(-1, 2)
+    fins = np.array(fins, dtype=np.int64).reshape(-1, 2)
+    comprimentos = np.array(comprimentos, dtype=np.int64)
+    dl = np.sign(fins[:, 0] - inicios[:, 0])
+    dc = np.sign(fins[:, 1] - inicios[:, 1])
+
+    # Mistura de direções: sentidos opostos contam no mesmo eixo
+    eixos = np.select([dl == 0, dc == 0, dl == dc], [0, 1, 2], 3)
+    por_eixo = np.bincount(donos * 4 + eixos, minlength=quantidade * 4).reshape(quantidade, 4)
+    palavras = por_eixo.sum(axis=1)
+
+    # Células cobertas por palavras: letras demais em relação a elas são sobreposições
+    total = int(comprimentos.sum())
+    passo = np.arange(total) - np.repeat(np.cumsum(comprimentos) - comprimentos, comprimentos)
+    cobertas = np.zeros((quantidade, tamanho, tamanho), dtype=bool)
+    cobertas[np.repeat(donos, comprimentos),
+             np.repeat(inicios[:, 0], comprimentos) + np.repeat(dl, comprimentos) * passo,
+             np.repeat(inicios[:, 1], comprimentos) + np.repeat(dc, comprimentos) * passo] = True
+    celulas_cobertas = cobertas.sum(axis=(1, 2))
+    letras = np.bincount(donos, weights=comprimentos, minlength=quantidade)
+
+    # Iscas: sequências, em qualquer das 8 direções, que começam como alguma palavra do puzzle
+    tabela = np.zeros((quantidade, _BASE ** comprimento_isca), dtype=bool)
+    tabela[np.array(donos_prefixo, dtype=np.int64), np.array(prefixos, dtype=np.int64)] = True
+    linhas_tabela = np.arange(quantidade)[:, None, None]
+    achados = np.zeros(quantidade, dtype=np.int64)
+    extensao = comprimento_isca - 1
+    for pl, pc in _PASSOS:
+        if extensao * max(abs(pl), abs(pc)) >= tamanho:
+            continue
+        linhas_inicio = slice(max(0, -pl * extensao), tamanho - max(0, pl * extensao))
+        colunas_inicio = slice(max(0, -pc * extensao), tamanho - max(0, pc * extensao))
+        sequencia = np.zeros((quantidade, linhas_inicio.stop - linhas_inicio.start,
+                              colunas_inicio.stop - colunas_inicio.start), dtype=np.int64)
+        for t in range(comprimento_isca):
+            sequencia = sequencia * _BASE + codigos[
+                :, linhas_inicio.start + pl * t:linhas_inicio.stop + pl * t,
+                colunas_inicio.start + pc * t:colunas_inicio.stop + pc * t]
+        achados += tabela[linhas_tabela, sequencia].sum(axis=(1, 2))
+    # Cada palavra escondida casa com o próprio prefixo uma vez; o resto é isca
+    verdadeiros = np.bincount(np.array(donos_prefixo, dtype=np.int64), minlength=quantidade)
+    iscas = np.maximum(achados - verdadeiros, 0)
+
+    resultados = []
+    for indice, puzzle in enumerate(puzzles):
+        n_palavras = int(palavras[indice])
+        proporcoes = por_eixo[indice] / n_palavras if n_palavras else np.zeros(4)
+        entropia = -sum(p * math.log(p) for p in proporcoes if p > 0) / math.log(4)
+        metricas = {
+            'tamanho': tamanho,
+            'palavras': n_palavras,
+            'direcoes': {eixo: int(contagem) for eixo, contagem in zip(EIXOS, por_eixo[indice])},
+            'diagonais': round(float(proporcoes[2]), 4),
+            'antidiagonais': round(float(proporcoes[3]), 4),
+            'mistura_direcoes': round(entropia, 4),
+            'sobreposicoes': int(letras[indice] - celulas_cobertas[indice]),
+            'iscas': int(iscas[indice]),
+            'densidade_iscas': round(float(iscas[indice]) / celulas, 6),
+            'preenchimento': round(float(celulas_cobertas[indice]) / celulas, 4),
+        }
+        normalizadas = {
+            'diagonais': proporcoes[2] + proporcoes[3],
+            'mistura_direcoes': entropia,
+            'sobreposicao': (letras[indice] - celulas_cobertas[indice]) / letras[indice] if letras[indice] else 0,
+            # Iscas por palavra, achatadas em [0, 1)
+            'iscas': iscas[indice] / (iscas[indice] + n_palavras) if n_palavras else 0,
+            'vazio': 1 - celulas_cobertas[indice] / celulas,
+            'area': 1 - math.exp(-celulas / ESCALA_AREA),
+        }
+        metricas['pontuacao'] = round(float(sum(PESOS[nome] * valor for nome, valor in normalizadas.items())), 4)
+        resultados.append(metricas)
+    return resultados
+
+
+def pontuar_lote(puzzles, comprimento_isca=COMPRIMENTO_ISCA, limites=LIMITES_NIVEIS):
+    """Pontua a dificuldade de vários puzzles (no formato da saída de 'main.py gerar').
+
+    Os puzzles são agrupados por tamanho e cada grupo é processado em blocos
+    com operações do NumPy sobre todos os grids do bloco. Retorna, na ordem
+    de entrada, um dicionário de métricas por puzzle, com a pontuação e o
+    nível em que ela cai.
+    """
+    if np is None:
+        raise ImportError("A pontuação de dificuldade precisa do pacote numpy instalado")
+    if comprimento_isca not in COMPRIMENTOS_ISCA:
+        raise ValueError(f"O comprimento da isca precisa estar entre {COMPRIMENTOS_ISCA.start} "
+                         f"e {COMPRIMENTOS_ISCA.stop - 1}, não {comprimento_isca}")
+    puzzles = list(puzzles)
+    tabela_codigos = _tabela_codigos()
+    por_tamanho = {}
+    for indice, puzzle in enumerate(puzzles):
+        por_tamanho.setdefault(puzzle['tamanho'], []).append(indice)
+
+    bloco = max(1, _CELULAS_TABELA // _BASE ** comprimento_isca)
+    resultados = [None] * len(puzzles)
+    for tamanho, indices in por_tamanho.items():
+        for inicio in range(0, len(indices), bloco):
+            parte = indices[inicio:inicio + bloco]
+            metricas = _pontuar_bloco([puzzles[indice] for indice in parte], tamanho,
+                                      comprimento_isca, tabela_codigos)
+            for indice, valores in zip(parte, metricas):
+                valores['nivel'] = nivel_por_pontuacao(valores['pontuacao'], limites)
+                resultados[indice] = valores
+    return resultados
+
+
+def ler_puzzles(caminho):
+    """Lê os puzzles de um arquivo JSONL ('-' para a entrada padrão)"""
+    arquivo = sys.stdin if caminho == '-' else open(caminho, encoding='utf-8')
+    try:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+    finally:
+        if arquivo is not sys.stdin:
+            arquivo.close()
+
+
+def main_dificuldade(argv=None):
+    """Linha de comando da pontuação de dificuldade"""
+    parser = argparse.ArgumentParser(
+        prog='main.py dificuldade',
+        description='Pontua a dificuldade de puzzles já gerados (JSONL de "main.py gerar") e os separa em níveis.')
+    parser.add_argument('arquivo', help="puzzles a pontuar, um JSON por linha ('-' para a entrada padrão)")
+    parser.add_argument('--nivel', type=int, help='devolve só os puzzles deste nível, completos e com as métricas')
+    parser.add_argument('--limites', help='pontuações de corte entre os níveis, separadas por vírgula '
+                                          f'(padrão: {",".join(map(str, LIMITES_NIVEIS))})')
+    parser.add_argument('--isca', type=int, default=COMPRIMENTO_ISCA, choices=COMPRIMENTOS_ISCA,
+                        help='letras iniciais que uma sequência repete para contar como isca (de 2 a 4)')
+    parser.add_argument('-o', '--saida', help='arquivo JSONL de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    limites = tuple(float(valor) for valor in args.limites.split(',')) if args.limites else LIMITES_NIVEIS
+    puzzles = ler_puzzles(args.arquivo)
+    inicio = time.perf_counter()
+    resultados = pontuar_lote(puzzles, args.isca, limites)
+    duracao = time.perf_counter() - inicio
+
+    saida = open(args.saida, 'w', encoding='utf-8') if args.saida else sys.stdout
+    try:
+        for indice, (puzzle, metricas) in enumerate(zip(puzzles, resultados)):
+            if args.nivel is None:
+                linha = dict(indice=puzzle.get('indice', indice), semente=puzzle.get('semente'), **metricas)
+            elif metricas['nivel'] == args.nivel:
+                linha = dict(puzzle, dificuldade=metricas)
+            else:
+                continue
+            saida.write(json.dumps(linha, ensure_ascii=False) + '\n')
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    contagem = {}
+    for metricas in resultados:
+        contagem[metricas['nivel']] = contagem.get(metricas['nivel'], 0) + 1
+    print(f"{len(puzzles)} puzzles em {duracao:.3f} s "
+          f"({len(puzzles) / duracao if duracao else 0:.0f}/s); por nível: "
+          + ', '.join(f"{nivel}: {contagem[nivel]}" for nivel in sorted(contagem)), file=sys.stderr)
+    return 0
@@ -0,0 +1,315 @@
+import random
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele fica só o backend de bytes
+    np = None
+
+LETRAS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+VAZIO = ' '
+CODIFICACAO = 'latin-1'
+
+_VAZIO_BYTE = ord(VAZIO)
+# Tabela que transforma cada célula vazia em 0xFF e as demais em 0x00.
+# Somando (letra - vazio) só onde a máscara vale 0xFF, o vazio vira a letra sem
+# "vai um" entre bytes, então um inteiro grande processa o segmento inteiro.
+_MASCARA_VAZIOS = bytes(0xFF if i == _VAZIO_BYTE else 0x00 for i in range(256))
+
+
+@lru_cache(maxsize=4096)
+def _codificar(palavra):
+    """Retorna a palavra como inteiro e como inteiro das diferenças para o vazio"""
+    codigos = palavra.encode(CODIFICACAO)
+    deslocada = bytes(codigo - _VAZIO_BYTE for codigo in codigos)
+    return int.from_bytes(codigos, 'little'), int.from_bytes(deslocada, 'little')
+
+
+class _LinhaGrid:
+    """Visão de uma linha do grid, para manter o acesso grid[linha][coluna]"""
+
+    __slots__ = ('_grid', '_linha')
+
+    def __init__(self, grid, linha):
+        self._grid = grid
+        self._linha = linha
+
+    def __getitem__(self, coluna):
+        return self._grid.celula(self._linha, coluna)
+
+    def __setitem__(self, coluna, letra):
+        self._grid.definir(self._linha, coluna, letra)
+
+    def __len__(self):
+        return self._grid.colunas
+
+    def __iter__(self):
+        return iter(self._grid.ler_linha(self._linha))
+
+
+class GridBytes:
+    """Grid guardado num único bytearray (um byte por célula, linha após linha).
+
+    Também pode ser uma janela sobre um buffer externo (por exemplo um
+    memoryview de memória compartilhada), usando origem e passo.
+    """
+
+    def __init__(self, linhas, colunas=None, buffer=None, passo=None, origem=0):
+        self.linhas = linhas
+        self.colunas = colunas if colunas is not None else linhas
+        self.passo = passo if passo is not None else self.colunas
+        self.origem = origem
+        if buffer is None:
+            buffer = bytearray(VAZIO.encode(CODIFICACAO) * (self.linhas * self.colunas))
+        self.dados = buffer
+
+    def __getitem__(self, linha):
+        return _LinhaGrid(self, linha)
+
+    def __iter__(self):
+        for linha in range(self.linhas):
+            yield _LinhaGrid(self, linha)
+
+    def __len__(self):
+        return self.linhas
+
+    def _indice(self, linha, coluna):
+        return self.origem + linha * self.passo + coluna
+
+    def _fatia(self, linha, coluna, dl, dc, tamanho):
+        inicio = self._indice(linha, coluna)
+        salto = dl * self.passo + dc
+        if tamanho == 1 or salto == 0:
+            return slice(inicio, inicio + 1)
+        fim = inicio + salto * (tamanho - 1) + (1 if salto > 0 else -1)
+        return slice(inicio, fim if fim >= 0 else None, salto)
+
+    def dentro(self, linha, coluna):
+        """Verifica se a coordenada está dentro do grid"""
+        return 0 <= linha < self.linhas and 0 <= coluna < self.colunas
+
+    def celula(self, linha, coluna):
+        """Retorna a letra de uma célula"""
+        return chr(self.dados[self._indice(linha, coluna)])
+
+    def definir(self, linha, coluna, letra):
+        """Escreve uma letra numa célula"""
+        self.dados[self._indice(linha, coluna)] = ord(letra)
+
+    def ler(self, linha, coluna, dl, dc, tamanho):
+        """Lê de uma vez as letras de um segmento reto"""
+        return bytes(self.dados[self._fatia(linha, coluna, dl, dc, tamanho)]).decode(CODIFICACAO)
+
+    def ler_linha(self, linha):
+        """Lê uma linha inteira como texto"""
+        return self.ler(linha, 0, 0, 1, self.colunas)
+
+    def cabe(self, palavra, linha, coluna, dl, dc):
+        """Verifica se a palavra cabe no segmento (fora dos limites, não cabe)"""
+        tamanho = len(palavra)
+        linha_final = linha + dl * (tamanho - 1)
+        coluna_final = coluna + dc * (tamanho - 1)
+        if not (0 <= linha < self.linhas and 0 <= linha_final < self.linhas
+                and 0 <= coluna < self.colunas and 0 <= coluna_final < self.colunas):
+            return False
+        # Completa os vazios do segmento com a palavra e compara tudo de uma vez
+        segmento = bytes(self.dados[self._fatia(linha, coluna, dl, dc, tamanho)])
+        alvo, deslocada = _codificar(palavra)
+        mescla = (int.from_bytes(segmento, 'little')
+                  + (deslocada & int.from_bytes(segmento.translate(_MASCARA_VAZIOS), 'little')))
+        return mescla == alvo
+
+    def escrever(self, palavra, linha, coluna, dl, dc):
+        """Escreve a palavra inteira no segmento com uma única atribuição"""
+        self.dados[self._fatia(linha, coluna, dl, dc, len(palavra))] = palavra.encode(CODIFICACAO)
+
+    def _preencher_bloco(self, bloco, rng, letras, pesos):
+        """Troca os vazios de um bloco de bytes por letras sorteadas, sem laço por célula"""
+        if _VAZIO_BYTE not in bloco:
+            return bloco
+        # Mesma ideia de cabe(): somar (letra - vazio) só nas posições vazias dá a letra
+        deslocados = bytes(rng.choices([ord(letra) - _VAZIO_BYTE for letra in letras], pesos, k=len(bloco)))
+        mascara = bloco.translate(_MASCARA_VAZIOS)
+        soma = (int.from_bytes(bloco, 'little')
+                + (int.from_bytes(deslocados, 'little') & int.from_bytes(mascara, 'little')))
+        return soma.to_bytes(len(bloco), 'little')
+
+    def preencher(self, rng, letras=LETRAS, pesos=None):
+        """Preenche todas as células vazias com letras aleatórias (pesos opcionais por letra)"""
+        if self.origem == 0 and self.passo == self.colunas and len(self.dados) == self.linhas * self.colunas:
+            self.dados[:] = self._preencher_bloco(bytes(self.dados), rng, letras, pesos)
+            return
+        for linha in range(self.linhas):
+            inicio = self._indice(linha, 0)
+            fatia = slice(inicio, inicio + self.colunas)
+            self.dados[fatia] = self._preencher_bloco(bytes(self.dados[fatia]), rng, letras, pesos)
+
+    def texto(self):
+        """Retorna o grid inteiro como um único texto, linha após linha"""
+        return ''.join(self.ler_linha(linha) for linha in range(self.linhas))
+
+    def vazias(self):
+        """Conta as células ainda vazias"""
+        return sum(self.ler_linha(linha).count(VAZIO) for linha in range(self.linhas))
+
+    def como_lista(self):
+        """Retorna uma cópia do grid como lista de listas de letras"""
+        return [list(self.ler_linha(linha)) for linha in range(self.linhas)]
+
+
+class GridNumPy(GridBytes):
+    """Grid guardado numa matriz uint8 do NumPy, com verificações vetorizadas"""
+
+    def __init__(self, linhas, colunas=None):
+        if np is None:
+            raise ImportError("O backend 'numpy' precisa do pacote numpy instalado")
+        colunas = colunas if colunas is not None else linhas
+        super().__init__(linhas, colunas, buffer=np.full(linhas * colunas, _VAZIO_BYTE, dtype=np.uint8))
+        self._palavras = {}
+
+    def _codigos(self, palavra):
+        codigos = self._palavras.get(palavra)
+        if codigos is None:
+            codigos = np.frombuffer(palavra.encode(CODIFICACAO), dtype=np.uint8)
+            self._palavras[palavra] = codigos
+        return codigos
+
+    def ler(self, linha, coluna, dl, dc, tamanho):
+        return self.dados[self._fatia(linha, coluna, dl, dc, tamanho)].tobytes().decode(CODIFICACAO)
+
+    def cabe(self, palavra, linha, coluna, dl, dc):
+        tamanho = len(palavra)
+        if not (self.dentro(linha, coluna)
+                and self.dentro(linha + dl * (tamanho - 1), coluna + dc * (tamanho - 1))):
+            return False
+        segmento = self.dados[self._fatia(linha, coluna, dl, dc, tamanho)]
+        return bool(np.all((segmento == _VAZIO_BYTE) | (segmento == self._codigos(palavra))))
+
+    def escrever(self, palavra, linha, coluna, dl, dc):
+        self.dados[self._fatia(linha, coluna, dl, dc, len(palavra))] = self._codigos(palavra)
+
+    def preencher(self, rng, letras=LETRAS, pesos=None):
+        vazios = self.dados == _VAZIO_BYTE
+        quantidade = int(vazios.sum())
+        if quantidade:
+            # O gerador do NumPy é semeado pelo rng do jogo para manter o sorteio reproduzível
+            gerador = np.random.default_rng(rng.getrandbits(64))
+            codigos = np.frombuffer(letras.encode(CODIFICACAO), dtype=np.uint8)
+            probabilidades = None
+            if pesos is not None:
+                probabilidades = np.asarray(pesos, dtype=float) / sum(pesos)
+            self.dados[vazios] = gerador.choice(codigos, size=quantidade, p=probabilidades)
+
+    def vazias(self):
+        return int((self.dados == _VAZIO_BYTE).sum())
+
+
+class GridEsparso(GridBytes):
+    """Grid dividido em blocos quadrados, alocados só quando alguém escreve neles.
+
+    Blocos nunca tocados contam como vazios. Depois de preencher(), cada bloco
+    é completado com letras na primeira vez que é lido, com um sorteio próprio
+    do bloco; assim, desenhar só uma janela de um tabuleiro enorme aloca só
+    os blocos visíveis, e o resultado não depende da ordem de leitura.
+    """
+
+    LADO_BLOCO = 64
+
+    def __init__(self, linhas, colunas=None, lado_bloco=None):
+        self.linhas = linhas
+        self.colunas = colunas if colunas is not None else linhas
+        self.lado = lado_bloco or self.LADO_BLOCO
+        self.blocos = {}
+        # (semente, letras, pesos) depois de preencher(); None antes
+        self._preenchimento = None
+
+    def _bloco(self, bloco_l, bloco_c, criar):
+        """Retorna o bytearray do bloco (None se não existe e não deve ser criado)"""
+        bloco = self.blocos.get((bloco_l, bloco_c))
+        if bloco is None and (criar or self._preenchimento is not None):
+            bloco = bytearray(VAZIO.encode(CODIFICACAO) * (self.lado * self.lado))
+            if self._preenchimento is not None:
+                self._preencher_bloco_esparso(bloco, bloco_l, bloco_c)
+            self.blocos[(bloco_l, bloco_c)] = bloco
+        return bloco
+
+    def _preencher_bloco_esparso(self, bloco, bloco_l, bloco_c):
+        semente, letras, pesos = self._preenchimento
+        rng = random.Random(f'{semente}:{bloco_l}:{bloco_c}')
+        bloco[:] = self._preencher_bloco(bytes(bloco), rng, letras, pesos)
+
+    def celula(self, linha, coluna):
+        lado = self.lado
+        bloco = self._bloco(linha // lado, coluna // lado, False)
+        if bloco is None:
+            return VAZIO
+        return chr(bloco[(linha % lado) * lado + coluna % lado])
+
+    def definir(self, linha, coluna, letra):
+        lado = self.lado
+        self._bloco(linha // lado, coluna // lado, True)[(linha % lado) * lado + coluna % lado] = ord(letra)
+
+    def ler(self, linha, coluna, dl, dc, tamanho):
+        if dl == 0 and dc == 1:
+            return self._ler_horizontal(linha, coluna, tamanho)
+        return ''.join(self.celula(linha + dl * i, coluna + dc * i) for i in range(tamanho))
+
+    def _ler_horizontal(self, linha, coluna, tamanho):
+        """Lê um trecho de linha fatiando cada bloco atravessado"""
+        lado = self.lado
+        bloco_l, deslocamento = divmod(linha, lado)
+        partes = []
+        fim = coluna + tamanho
+        while coluna < fim:
+            bloco_c, inicio = divmod(coluna, lado)
+            quantidade = min(lado - inicio, fim - coluna)
+            bloco = self._bloco(bloco_l, bloco_c, False)
+            if bloco is None:
+                partes.append(VAZIO * quantidade)
+            else:
+                base = deslocamento * lado + inicio
+                partes.append(bytes(bloco[base:base + quantidade]).decode(CODIFICACAO))
+            coluna += quantidade
+        return ''.join(partes)
+
+    def ler_linha(self, linha):
+        return self._ler_horizontal(linha, 0, self.colunas)
+
+    def cabe(self, palavra, linha, coluna, dl, dc):
+        tamanho = len(palavra)
+        if not (self.dentro(linha, coluna)
+                and self.dentro(linha + dl * (tamanho - 1), coluna + dc * (tamanho - 1))):
+            return False
+        segmento = self.ler(linha, coluna, dl, dc, tamanho).encode(CODIFICACAO)
+        alvo, deslocada = _codificar(palavra)
+        mescla = (int.from_bytes(segmento, 'little')
+                  + (deslocada & int.from_bytes(segmento.translate(_MASCARA_VAZIOS), 'little')))
+        return mescla == alvo
+
+    def escrever(self, palavra, linha, coluna, dl, dc):
+        for i, letra in enumerate(palavra):
+            self.definir(linha + dl * i, coluna + dc * i, letra)
+
+    def preencher(self, rng, letras=LETRAS, pesos=None):
+        """Completa os blocos já alocados agora e os demais quando forem lidos"""
+        self._preenchimento = (rng.getrandbits(64), letras, pesos)
+        for (bloco_l, bloco_c), bloco in self.blocos.items():
+            self._preencher_bloco_esparso(bloco, bloco_l, bloco_c)
+
+    def vazias(self):
+        # Depois de preencher() não sobra vazio, e contar alocaria todos os blocos
+        return 0 if self._preenchimento is not None else super().vazias()
+
+
+BACKENDS = {
+    'bytes': GridBytes,
+    'numpy': GridNumPy,
+    'esparso': GridEsparso,
+}
+
+
+def criar_grid(linhas, colunas=None, backend='bytes'):
+    """Cria um grid vazio com o backend escolhido"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de grid desconhecido: {backend!r} (use {', '.join(BACKENDS)})")
+    return BACKENDS[backend](linhas, colunas)
@@ -0,0 +1,224 @@
+import heapq
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+from grid import CODIFICACAO, LETRAS, VAZIO, GridBytes, criar_grid
+from metricas import mapear_em_processos
+from posicionamento import DIRECOES, PosicionadorPalavras
+
+# Lado padrão de cada ladrilho (os da última linha e coluna podem ser menores)
+LADO_LADRILHO = 128
+# Fração da área de um ladrilho que as palavras dele podem ocupar antes de ele ser considerado cheio
+OCUPACAO_MAXIMA = 0.6
+
+
+class _Ladrilho:
+    """Tabuleiro mínimo sobre uma janela do grid compartilhado, no formato do PosicionadorPalavras.
+
+    As posições ficam relativas à janela; linha0 e coluna0 dizem onde ela
+    começa no grid inteiro.
+    """
+
+    def __init__(self, grid, linha0=0, coluna0=0):
+        self.grid = grid
+        self.linhas = grid.linhas
+        self.colunas = grid.colunas
+        self.tamanho = max(grid.linhas, grid.colunas)
+        self.linha0 = linha0
+        self.coluna0 = coluna0
+        self.posicoes_palavras = {}
+
+    def pode_colocar_palavra(self, palavra, linha, coluna, direcao):
+        dl, dc = DIRECOES[direcao]
+        return self.grid.cabe(palavra, linha, coluna, dl, dc)
+
+    def colocar_palavra(self, palavra, linha, coluna, direcao):
+        dl, dc = DIRECOES[direcao]
+        anterior = self.grid.ler(linha, coluna, dl, dc, len(palavra))
+        posicoes = [(linha + dl * i, coluna + dc * i) for i in range(len(palavra))]
+        self.grid.escrever(palavra, linha, coluna, dl, dc)
+        self.posicoes_palavras[palavra] = posicoes
+        return [posicao for posicao, letra in zip(posicoes, anterior) if letra == VAZIO]
+
+    def remover_palavra(self, palavra, escritas):
+        for linha, coluna in escritas:
+            self.grid.definir(linha, coluna, VAZIO)
+        self.posicoes_palavras.pop(palavra, None)
+
+    def posicoes_absolutas(self):
+        """As posições das palavras nas coordenadas do grid inteiro"""
+        return {palavra: [(linha + self.linha0, coluna + self.coluna0) for linha, coluna in posicoes]
+                for palavra, posicoes in self.posicoes_palavras.items()}
+
+
+def dividir(tamanho, lado=LADO_LADRILHO):
+    """Retângulos (linha0, coluna0, altura, largura) que cobrem o grid, linha após linha"""
+    return [(linha0, coluna0, min(lado, tamanho - linha0), min(lado, tamanho - coluna0))
+            for linha0 in range(0, tamanho, lado)
+            for coluna0 in range(0, tamanho, lado)]
+
+
+def distribuir(palavras, ladrilhos, rng, limite, ocupadas=None):
+    """Reparte as palavras entre os ladrilhos equilibrando as letras por área.
+
+    Palavras maiores que limite ficam de fora: vão para a costura, em que
+    podem atravessar as bordas. ocupadas diz quantas células de cada
+    ladrilho já têm letra. Retorna (palavras de cada ladrilho, longas).
+    """
+    palavras = list(palavras)
+    rng.shuffle(palavras)
+    # As maiores primeiro: as pequenas que vêm depois acertam o equilíbrio
+    palavras.sort(key=len, reverse=True)
+    por_ladrilho = [[] for _ in ladrilhos]
+    longas = []
+    cargas = list(ocupadas) if ocupadas is not None else [0] * len(ladrilhos)
+    # (letras / área, índice): o ladrilho proporcionalmente mais vazio fica no topo
+    fila = [(carga / (altura * largura), indice)
+            for indice, (carga, (_, _, altura, largura)) in enumerate(zip(cargas, ladrilhos))]
+    heapq.heapify(fila)
+    for palavra in palavras:
+        if len(palavra) > limite:
+            longas.append(palavra)
+            continue
+        ocupacao, indice = heapq.heappop(fila)
+        _, _, altura, largura = ladrilhos[indice]
+        if ocupacao >= OCUPACAO_MAXIMA or len(palavra) > max(altura, largura):
+            # Sem espaço (ou o ladrilho de borda é estreito demais): fica para a costura
+            heapq.heappush(fila, (ocupacao, indice))
+            longas.append(palavra)
+            continue
+        por_ladrilho[indice].append(palavra)
+        cargas[indice] += len(palavra)
+        heapq.heappush(fila, (cargas[indice] / (altura * largura), indice))
+    return por_ladrilho, longas
+
+
+def _janela(memoria, colunas_total, linha0, coluna0, altura, largura):
+    return GridBytes(altura, largura, buffer=memoria.buf, passo=colunas_total,
+                     origem=linha0 * colunas_total + coluna0)
+
+
+def _posicionar_ladrilho(tarefa):
+    """Trabalho de um processo: posiciona as palavras de um ladrilho direto na memória compartilhada"""
+    nome, colunas_total, (linha0, coluna0, altura, largura), palavras, semente = tarefa
+    memoria = shared_memory.SharedMemory(name=nome)
+    try:
+        tabuleiro = _Ladrilho(_janela(memoria, colunas_total, linha0, coluna0, altura, largura),
+                              linha0, coluna0)
+        posicionador = PosicionadorPalavras(tabuleiro, rng=random.Random(semente))
+        nao_inseridas = posicionador.posicionar(palavras)
+        resultado = (tabuleiro.posicoes_absolutas(), nao_inseridas, posicionador.candidatos_avaliados)
+        # A janela segura o buffer: precisa sumir antes de fechar a memória
+        del tabuleiro, posicionador
+        return resultado
+    finally:
+        memoria.close()
+
+
+def _preencher_ladrilho(tarefa):
+    """Trabalho de um processo: preenche os vazios de um ladrilho"""
+    nome, colunas_total, (linha0, coluna0, altura, largura), pesos, semente = tarefa
+    memoria = shared_memory.SharedMemory(name=nome)
+    try:
+        grid = _janela(memoria, colunas_total, linha0, coluna0, altura, largura)
+        grid.preencher(random.Random(semente), pesos=pesos)
+        del grid
+    finally:
+        memoria.close()
+
+
+def gerar_em_ladrilhos(jogo, lado=LADO_LADRILHO, processos=None, progresso=None):
+    """Gera o caça-palavras de um jogo já reiniciado dividindo o grid em ladrilhos.
+
+    As palavras longas (mais de meio ladrilho) são posicionadas primeiro, no
+    grid inteiro ainda vazio. As outras são repartidas entre os ladrilhos,
+    que são posicionados e depois preenchidos em paralelo sobre um único grid
+    em memória compartilhada, já com as longas. Entre as duas fases, a
+    costura posiciona no grid inteiro as que não couberam no seu ladrilho.
+    As sementes saem todas do rng do jogo, então o resultado não depende de
+    quantos processos foram usados. O preenchimento sem duplicatas não é
+    suportado.
+    """
+    if jogo.preenchimento_unico:
+        raise ValueError("A geração em ladrilhos não faz o preenchimento sem duplicatas")
+    tamanho = jogo.tamanho
+    palavras = list(jogo.palavras)
+    ladrilhos = dividir(tamanho, lado)
+    limite = lado // 2
+    longas = [palavra for palavra in palavras if len(palavra) > limite]
+    pesos = None
+    if jogo.frequencias_letras:
+        pesos = [jogo.frequencias_letras.get(letra, 0) for letra in LETRAS]
+
+    processos = min(processos or os.cpu_count() or 1, len(ladrilhos))
+    memoria = shared_memory.SharedMemory(create=True, size=tamanho * tamanho)
+    executor = ProcessPoolExecutor(max_workers=processos) if processos > 1 else None
+    mapear = partial(mapear_em_processos, executor) if executor is not None else map
+    try:
+        memoria.buf[:tamanho * tamanho] = VAZIO.encode(CODIFICACAO) * (tamanho * tamanho)
+        tabuleiro = _Ladrilho(_janela(memoria, tamanho, 0, 0, tamanho, tamanho))
+
+        # Longas primeiro, enquanto ainda há linhas retas livres; os ladrilhos as enxergam pela memória
+        if progresso is not None:
+            progresso('longas', 0, len(longas))
+        posicionador = PosicionadorPalavras(tabuleiro, rng=jogo.rng)
+        longas_fora = posicionador.posicionar(longas)
+        posicoes = dict(tabuleiro.posicoes_palavras)
+        candidatos = posicionador.candidatos_avaliados
+
+        ocupadas = [altura * largura - _janela(memoria, tamanho, linha0, coluna0, altura, largura).vazias()
+                    for linha0, coluna0, altura, largura in ladrilhos]
+        por_ladrilho, sobras = distribuir([palavra for palavra in palavras if len(palavra) <= limite],
+                                          ladrilhos, jogo.rng, limite, ocupadas)
+        sementes_posicionamento = [jogo.rng.getrandbits(63) for _ in ladrilhos]
+        sementes_preenchimento = [jogo.rng.getrandbits(63) for _ in ladrilhos]
+
+        tarefas = [(memoria.name, tamanho, ladrilho, palavras_ladrilho, semente)
+                   for ladrilho, palavras_ladrilho, semente
+                   in zip(ladrilhos, por_ladrilho, sementes_posicionamento)]
+        for feito, (posicoes_ladrilho, nao_inseridas, avaliados) in enumerate(
+                mapear(_posicionar_ladrilho, tarefas), 1):
+            posicoes.update(posicoes_ladrilho)
+            sobras.extend(nao_inseridas)
+            candidatos += avaliados
+            if progresso is not None:
+                progresso('ladrilhos', feito, len(tarefas))
+
+        # Costura: o grid inteiro, com os ladrilhos já posicionados, recebe o que sobrou
+        if progresso is not None:
+            progresso('costurando', 0, len(sobras))
+        posicionador = PosicionadorPalavras(tabuleiro, rng=jogo.rng)
+        nao_inseridas = longas_fora + posicionador.posicionar(sobras)
+        posicoes.update(tabuleiro.posicoes_palavras)
+        candidatos += posicionador.candidatos_avaliados
+        del tabuleiro, posicionador
+
+        if progresso is not None:
+            progresso('preenchendo', 0, 0)
+        tarefas = [(memoria.name, tamanho, ladrilho, pesos, semente)
+                   for ladrilho, semente in zip(ladrilhos, sementes_preenchimento)]
+        for _ in mapear(_preencher_ladrilho, tarefas):
+            pass
+
+        jogo.grid = criar_grid(tamanho, backend=jogo.backend)
+        for linha in range(tamanho):
+            inicio = linha * tamanho
+            jogo.grid.escrever(bytes(memoria.buf[inicio:inicio + tamanho]).decode(CODIFICACAO), linha, 0, 0, 1)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        memoria.close()
+        memoria.unlink()
+
+    jogo.palavras_nao_inseridas = nao_inseridas
+    jogo.palavras = [palavra for palavra in palavras if palavra in posicoes]
+    jogo.posicoes_palavras = {palavra: posicoes[palavra] for palavra in jogo.palavras}
+    jogo.candidatos_avaliados = candidatos
+    jogo.indexar_extremos()
+    jogo.gerado = True
+    if progresso is not None:
+        progresso('pronto', len(jogo.palavras), len(jogo.palavras))
+    return jogo
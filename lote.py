@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from armazem import ArmazemPuzzles, modo_geracao
+from banco_palavras import obter_banco
+from ladrilhos import gerar_em_ladrilhos
+from main import CacaPalavras
+from metricas import mapear_em_processos
+from preenchimento import FREQUENCIAS_PORTUGUES
+from solucionador import validar as validar_puzzle
+
+
+def gerar_puzzle(tarefa):
+    """Gera um caça-palavras completo a partir de uma tarefa do lote"""
+    indice, semente, opcoes = tarefa
+    nivel = opcoes.get('nivel', 1)
+    jogo = CacaPalavras(backend=opcoes.get('backend', 'bytes'), semente=semente)
+    banco = obter_banco(opcoes['banco']) if opcoes.get('banco') else None
+    jogo.reiniciar_jogo(nivel, palavras=opcoes.get('palavras'), tamanho=opcoes.get('tamanho'),
+                        semente=semente, banco=banco, tema=opcoes.get('tema'))
+    jogo.preenchimento_unico = opcoes.get('sem_duplicatas', False)
+    jogo.frequencias_letras = opcoes.get('frequencias')
+    if opcoes.get('ladrilhos'):
+        gerar_em_ladrilhos(jogo, opcoes['ladrilhos'], opcoes.get('processos_ladrilhos'))
+    else:
+        jogo.gerar_caca_palavras()
+    puzzle = {
+        'indice': indice,
+        'semente': semente,
+        'nivel': nivel,
+        'tamanho': jogo.tamanho,
+        'grid': [jogo.grid.ler_linha(linha) for linha in range(jogo.tamanho)],
+        'palavras': jogo.palavras,
+        'posicoes_palavras': {palavra: [list(posicao) for posicao in posicoes]
+                              for palavra, posicoes in jogo.posicoes_palavras.items()},
+        'nao_inseridas': jogo.palavras_nao_inseridas,
+        'candidatos_avaliados': jogo.candidatos_avaliados,
+    }
+    if jogo.preenchimento_unico:
+        # Cópias extras que não havia como evitar (palavras repetidas dentro de outras, células sem letra segura)
+        puzzle['duplicatas'] = jogo.duplicatas_restantes
+    if opcoes.get('validar'):
+        # Palavras ausentes ou repetidas deixam a resposta ambígua
+        puzzle['problemas'] = validar_puzzle(jogo)
+    return puzzle
+
+
+def gerar_lote(quantidade, semente=0, processos=None, tamanho_bloco=None, **opcoes):
+    """Gera vários caça-palavras em paralelo, devolvendo-os em ordem à medida que ficam prontos.
+
+    As opções de cada puzzle são: nivel, palavras, tamanho, backend, validar,
+    sem_duplicatas, frequencias, banco (caminho de um banco de palavras), tema e
+    ladrilhos (lado dos ladrilhos, para gerar cada puzzle em paralelo por partes).
+    """
+    # As sementes de cada puzzle saem de uma única semente base, então o lote é
+    # reproduzível independentemente de quantos processos forem usados
+    gerador_sementes = random.Random(semente)
+    tarefas = [(indice, gerador_sementes.getrandbits(63), opcoes) for indice in range(quantidade)]
+
+    processos = processos or os.cpu_count() or 1
+    if opcoes.get('ladrilhos'):
+        # Cada puzzle já ocupa todos os processos com seus ladrilhos: um de cada vez
+        opcoes['processos_ladrilhos'] = processos
+        processos = 1
+    if processos == 1 or quantidade <= 1:
+        for tarefa in tarefas:
+            yield gerar_puzzle(tarefa)
+        return
+
+    if tamanho_bloco is None:
+        tamanho_bloco = max(1, quantidade // (processos * 8))
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        yield from mapear_em_processos(executor, gerar_puzzle, tarefas, chunksize=tamanho_bloco)
+
+
+def ler_palavras(args):
+    """Monta a lista de palavras personalizada a partir dos argumentos, se houver"""
+    palavras = []
+    if args.palavras:
+        palavras.extend(p.strip() for p in args.palavras.split(','))
+    if args.arquivo_palavras:
+        with open(args.arquivo_palavras, encoding='utf-8') as arquivo:
+            palavras.extend(linha.strip() for linha in arquivo)
+    palavras = [p for p in palavras if p]
+    return palavras or None
+
+
+def main_lote(argv=None):
+    """Linha de comando da geração em lote (saída em JSONL)"""
+    parser = argparse.ArgumentParser(
+        prog='main.py generate',
+        description='Gera vários caça-palavras sem interação, um JSON por linha.')
+    parser.add_argument('-n', '--quantidade', type=int, default=1, help='quantos puzzles gerar')
+    parser.add_argument('--nivel', type=int, default=1, help='nível base (tamanho e palavras)')
+    parser.add_argument('--palavras', help='lista de palavras separadas por vírgula')
+    parser.add_argument('--arquivo-palavras', help='arquivo com uma palavra por linha')
+    parser.add_argument('--banco', help='arquivo ou diretório de palavras de onde sortear as de cada puzzle')
+    parser.add_argument('--tema', help='tema das palavras sorteadas do banco')
+    parser.add_argument('--tamanho', type=int, help='tamanho do grid (padrão: o do nível)')
+    parser.add_argument('--semente', type=int, default=0, help='semente base do lote')
+    parser.add_argument('--processos', type=int, help='processos de trabalho (padrão: núcleos da CPU)')
+    parser.add_argument('--backend', default='bytes', help='backend do grid (bytes, numpy ou esparso)')
+    parser.add_argument('--validar', action='store_true',
+                        help='resolve cada puzzle e informa palavras ausentes ou repetidas')
+    parser.add_argument('--sem-duplicatas', action='store_true',
+                        help='preenche sem formar cópias extras das palavras')
+    parser.add_argument('--frequencias-portugues', action='store_true',
+                        help='sorteia as letras de preenchimento com a frequência do português')
+    parser.add_argument('-o', '--saida', help='arquivo JSONL de saída (padrão: saída padrão)')
+    parser.add_argument('--armazem', help='guarda também cada puzzle neste armazém em disco')
+    parser.add_argument('--ladrilhos', type=int, metavar='LADO',
+                        help='gera cada puzzle em ladrilhos deste lado, em paralelo (para grids enormes)')
+    args = parser.parse_args(argv)
+    if args.ladrilhos and args.sem_duplicatas:
+        # O preenchimento de cada ladrilho não enxerga as palavras que atravessam as bordas
+        parser.error('--sem-duplicatas não funciona com --ladrilhos')
+
+    saida = open(args.saida, 'w', encoding='utf-8') if args.saida else sys.stdout
+    armazem = ArmazemPuzzles(args.armazem) if args.armazem else None
+    frequencias = FREQUENCIAS_PORTUGUES if args.frequencias_portugues else None
+    modo = modo_geracao(args.backend, args.sem_duplicatas, frequencias)
+    try:
+        for puzzle in gerar_lote(args.quantidade, nivel=args.nivel, palavras=ler_palavras(args),
+                                 tamanho=args.tamanho, semente=args.semente,
+                                 banco=args.banco, tema=args.tema,
+                                 processos=args.processos, backend=args.backend,
+                                 validar=args.validar, sem_duplicatas=args.sem_duplicatas,
+                                 ladrilhos=args.ladrilhos, frequencias=frequencias):
+            saida.write(json.dumps(puzzle, ensure_ascii=False) + '\n')
+            if armazem is not None:
+                # Só o processo principal escreve no armazém; grids que não cabem ficam só no JSONL
+                pedidas = puzzle['palavras'] + puzzle['nao_inseridas']
+                if armazem.comporta(puzzle['tamanho'], len(pedidas), puzzle['grid']):
+                    armazem.salvar(puzzle['nivel'], puzzle['semente'], pedidas, puzzle['tamanho'],
+                                   puzzle['grid'], puzzle['posicoes_palavras'], modo)
+    finally:
+        if armazem is not None:
+            armazem.fechar()
+        if saida is not sys.stdout:
+            saida.close()
+    return 0
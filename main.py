@@ -1,84 +1,247 @@
+import argparse
+import importlib
+import json
 import random
-import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-class CacaPalavras:
-    def __init__(self, tamanho=12):
+from armazem import modo_jogo
+from diario import DiarioSessoes, pontuar, posicoes_entre
+from dicas import IndiceDicas, texto_dica
+from grid import BACKENDS, LETRAS, criar_grid
+from metricas import LIMITES_CONTAGEM, METRICAS
+from posicionamento import DIRECOES, PosicionadorPalavras
+from preenchimento import VerificadorCopias, copias_internas, palavras_contidas, preencher_sem_duplicatas
+from renderizador import IndicadorProgresso, Janela, Quadro, RenderizadorTerminal
+
+# Devolvido por obter_coordenada quando o jogador moveu a janela do tabuleiro
+MOVER_JANELA = 'MOVER_JANELA'
+# Devolvido por obter_coordenada quando o jogador pediu uma dica
+PEDIR_DICA = 'PEDIR_DICA'
+# Sessão do jogo de terminal no diário (main.py --sessao ARQUIVO)
+ID_SESSAO_TERMINAL = 'terminal'
+# Comandos de movimento da janela: letra -> (linhas, colunas) em meias janelas
+_MOVIMENTOS_JANELA = {'w': (-1, 0), 's': (1, 0), 'a': (0, -1), 'd': (0, 1)}
+
+# Palavras organizadas por nível de dificuldade (tema: Computação).
+# Tabela única do módulo: todos os jogos compartilham as mesmas tuplas.
+PALAVRAS_POR_NIVEL = {
+    1: {  # Nível Iniciante - Palavras simples
+        'tamanho': 10,
+        'palavras': ('MOUSE', 'TELA', 'TECLADO', 'PASTA', 'ARQUIVO',
+                     'REDE', 'WIFI', 'DISCO', 'MEMORIA', 'SISTEMA')
+    },
+    2: {  # Nível Intermediário - Palavras médias
+        'tamanho': 12,
+        'palavras': ('INTERNET', 'PROGRAMA', 'WINDOWS', 'BACKUP', 'SERVIDOR',
+                     'FIREWALL', 'ANTIVIRUS', 'NAVEGADOR', 'EMAIL', 'DOWNLOAD')
+    },
+    3: {  # Nível Avançado - Palavras mais complexas
+        'tamanho': 14,
+        'palavras': ('PROCESSADOR', 'APLICATIVO', 'SOFTWARE', 'HARDWARE', 'SEGURANCA',
+                     'IMPRESSORA', 'COMPUTADOR', 'BLUETOOTH', 'PENDRIVE', 'NOTEBOOK')
+    }
+}
+
+NOMES_NIVEIS = {
+    1: "INICIANTE",
+    2: "INTERMEDIÁRIO",
+    3: "AVANÇADO"
+}
+
+
+class CoresTerminal:
+    """Cores ANSI - ESQUEMA FOGO/ENERGIA (Vermelho/Laranja), como atributos de classe"""
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+    GREEN = '\033[38;5;208m'  # Laranja para sucesso
+    YELLOW = '\033[38;5;220m'  # Amarelo-laranja
+    RED = '\033[91m'  # Vermelho vibrante
+    CYAN = '\033[38;5;202m'  # Laranja-avermelhado
+    MAGENTA = '\033[38;5;196m'  # Vermelho intenso
+    BLUE = '\033[38;5;166m'  # Laranja escuro
+    WHITE = '\033[38;5;255m'  # Branco brilhante
+    BG_BLUE = '\033[48;5;88m'  # Fundo vermelho escuro
+    BG_GREEN = '\033[48;5;208m'  # Fundo laranja para palavras encontradas
+    BG_YELLOW = '\033[48;5;166m'  # Fundo laranja escuro
+
+
+class CacaPalavras(CoresTerminal):
+    # Compartilhada entre instâncias; atribuir self.palavras_por_nivel personaliza um jogo só
+    palavras_por_nivel = PALAVRAS_POR_NIVEL
+    
+    def __init__(self, tamanho=12, backend='bytes', semente=None):
         self.tamanho = tamanho
-        self.grid = [[' ' for _ in range(tamanho)] for _ in range(tamanho)]
+        self.backend = backend
+        self.semente = semente
+        self.rng = random.Random(semente)
+        self.grid = criar_grid(tamanho, backend=backend)
         self.palavras = []
         self.palavras_encontradas = set()
         self.posicoes_palavras = {}
         self.marcacoes = set()
         self.nivel = 1
-        
-        # Palavras organizadas por nível de dificuldade (tema: Computação)
-        self.palavras_por_nivel = {
-            1: {  # Nível Iniciante - Palavras simples
-                'tamanho': 10,
-                'palavras': ['MOUSE', 'TELA', 'TECLADO', 'PASTA', 'ARQUIVO', 
-                           'REDE', 'WIFI', 'DISCO', 'MEMORIA', 'SISTEMA']
-            },
-            2: {  # Nível Intermediário - Palavras médias
-                'tamanho': 12,
-                'palavras': ['INTERNET', 'PROGRAMA', 'WINDOWS', 'BACKUP', 'SERVIDOR',
-                           'FIREWALL', 'ANTIVIRUS', 'NAVEGADOR', 'EMAIL', 'DOWNLOAD']
-            },
-            3: {  # Nível Avançado - Palavras mais complexas
-                'tamanho': 14,
-                'palavras': ['PROCESSADOR', 'APLICATIVO', 'SOFTWARE', 'HARDWARE', 'SEGURANCA',
-                           'IMPRESSORA', 'COMPUTADOR', 'BLUETOOTH', 'PENDRIVE', 'NOTEBOOK']
-            }
-        }
-        
-        # Cores ANSI - ESQUEMA FOGO/ENERGIA (Vermelho/Laranja)
-        self.RESET = '\033[0m'
-        self.BOLD = '\033[1m'
-        self.GREEN = '\033[38;5;208m'  # Laranja para sucesso
-        self.YELLOW = '\033[38;5;220m'  # Amarelo-laranja
-        self.RED = '\033[91m'  # Vermelho vibrante
-        self.CYAN = '\033[38;5;202m'  # Laranja-avermelhado
-        self.MAGENTA = '\033[38;5;196m'  # Vermelho intenso
-        self.BLUE = '\033[38;5;166m'  # Laranja escuro
-        self.WHITE = '\033[38;5;255m'  # Branco brilhante
-        self.BG_BLUE = '\033[48;5;88m'  # Fundo vermelho escuro
-        self.BG_GREEN = '\033[48;5;208m'  # Fundo laranja para palavras encontradas
-        self.BG_YELLOW = '\033[48;5;166m'  # Fundo laranja escuro
+        self.gerado = False
+        self.palavras_nao_inseridas = []
+        self.candidatos_avaliados = 0
+        # (início, fim) e (fim, início) de cada palavra -> palavra; montado sob demanda
+        self.indice_extremos = None
+        self.conjunto_palavras = set()
+        # Armazém de puzzles prontos em disco (opcional) e a lista pedida de palavras
+        self.armazem = None
+        self.palavras_solicitadas = []
+        # Seleções feitas na partida e seus resultados (veja reproducao.py)
+        self.jogadas = []
+        # Parte visível de tabuleiros maiores que a tela (None: mostra tudo)
+        self.janela = None
+        # Índice das dicas (montado com indexar_extremos) e as células que a última dica destaca
+        self.dicas = None
+        self.destaques_dica = set()
+        # Diário de sessões (opcional): cada seleção é gravada nele (veja diario.py)
+        self.diario = None
+        self.id_sessao = ID_SESSAO_TERMINAL
+        # Tempo de jogo já acumulado (de uma sessão retomada) e o início da contagem atual
+        self.tempo_acumulado = 0.0
+        self.inicio_relogio = None
+        
+        # Modo de preenchimento: sem cópias extras das palavras e pesos opcionais por letra
+        self.preenchimento_unico = False
+        self.frequencias_letras = None
+        self.conflitos_preenchimento = 0
+        # Cópias extras que nem o posicionamento nem o preenchimento conseguiram evitar
+        self.duplicatas_restantes = 0
+        # No modo sem duplicatas, confere cada posição candidata durante o posicionamento
+        self.verificador_copias = None
+        
+        # Monta cada quadro num buffer e redesenha só o que mudou
+        self.renderizador = RenderizadorTerminal(self)
         
     def limpar_tela(self):
         """Limpa a tela do terminal"""
-        os.system('clear' if os.name != 'nt' else 'cls')
+        self.renderizador.limpar()
     
-    def reiniciar_jogo(self, nivel):
-        """Reinicia o jogo com um novo nível"""
+    def reiniciar_jogo(self, nivel, palavras=None, tamanho=None, semente=None, armazem=None,
+                       banco=None, tema=None):
+        """Reinicia o jogo com um novo nível (palavras e tamanho podem ser personalizados).
+        
+        Com um banco de palavras, as palavras do nível são sorteadas dele
+        (mesma quantidade e faixa de tamanhos do nível, opcionalmente de um
+        tema) em vez de vir da lista fixa. Sem semente, uma nova é sorteada e
+        fica em self.semente. Com um armazém, o puzzle da semente é carregado
+        pronto em vez de gerado; se nenhuma semente for dada, às vezes um já
+        guardado para o nível é reaproveitado (veja ArmazemPuzzles). Se não
+        houver, o puzzle gerado depois é guardado nele. O modo de
+        preenchimento entra na chave, então deve ser definido antes.
+        """
         self.nivel = nivel
         
         # Atualiza tamanho do grid baseado no nível
         config_nivel = self.palavras_por_nivel.get(nivel, self.palavras_por_nivel[3])
-        self.tamanho = config_nivel['tamanho']
+        self.tamanho = tamanho if tamanho is not None else config_nivel['tamanho']
         
         # Reinicia o grid
-        self.grid = [[' ' for _ in range(self.tamanho)] for _ in range(self.tamanho)]
+        self.grid = criar_grid(self.tamanho, backend=self.backend)
         self.palavras = []
         self.palavras_encontradas = set()
         self.posicoes_palavras = {}
         self.marcacoes = set()
+        self.gerado = False
+        self.palavras_nao_inseridas = []
+        self.candidatos_avaliados = 0
+        self.indice_extremos = None
+        self.jogadas = []
+        self.janela = None
+        self.dicas = None
+        self.destaques_dica = set()
+        self.tempo_acumulado = 0.0
+        self.inicio_relogio = None
+        
+        # Cada partida tem sua própria semente: sem uma explícita, ela é sorteada
+        # do gerador do jogo, e (nível, palavras, tamanho, semente) reproduz o grid
+        semente_pedida = semente
+        # O gerador anterior também decide se um puzzle guardado é reaproveitado,
+        # sem gastar números do novo (que precisa chegar intacto ao posicionamento)
+        sorteio = self.rng
+        if semente is None:
+            semente = sorteio.getrandbits(63)
+        self.semente = semente
+        self.rng = random.Random(semente)
+        
+        if palavras is None and banco is not None:
+            # Sorteio com um gerador à parte: o do jogo chega intacto ao posicionamento,
+            # então as palavras sorteadas passadas de volta com a semente refazem o mesmo grid
+            comprimentos = [len(palavra) for palavra in config_nivel['palavras']]
+            palavras = banco.amostrar(len(comprimentos), comprimento=(min(comprimentos), max(comprimentos)),
+                                      tamanho_grid=self.tamanho, tema=tema, rng=random.Random(semente))
         
         # Define novas palavras
-        self.definir_palavras(config_nivel['palavras'])
+        self.definir_palavras(palavras if palavras is not None else config_nivel['palavras'])
+        
+        if armazem is not None:
+            self.armazem = armazem
+            if semente_pedida is None:
+                guardadas = armazem.sementes(nivel, self.palavras_solicitadas, self.tamanho, modo_jogo(self))
+                # Reaproveita com alguma chance, ou sempre que a lista já tem puzzles suficientes
+                if guardadas and (len(guardadas) >= armazem.sementes_max
+                                  or sorteio.random() < armazem.chance_reuso):
+                    self.semente = sorteio.choice(guardadas)
+                    self.rng = random.Random(self.semente)
+        
+        if self.armazem is not None:
+            puzzle = self.armazem.carregar(nivel, self.palavras_solicitadas, self.semente,
+                                           self.tamanho, modo_jogo(self))
+            if puzzle is not None:
+                self.carregar_puzzle(puzzle)
+    
+    def carregar_puzzle(self, puzzle):
+        """Usa um puzzle já pronto (grid, palavras e posições) sem gerar nada"""
+        self.grid = criar_grid(self.tamanho, backend=self.backend)
+        for linha, texto in enumerate(puzzle['grid']):
+            self.grid.escrever(texto, linha, 0, 0, 1)
+        self.palavras = list(puzzle['palavras'])
+        self.palavras_nao_inseridas = list(puzzle['nao_inseridas'])
+        self.posicoes_palavras = {palavra: list(posicoes) for palavra, posicoes in puzzle['posicoes_palavras'].items()}
+        self.indexar_extremos()
+        self.gerado = True
+    
+    def retomar_sessao(self, estado):
+        """Volta a uma sessão salva num diário (veja DiarioSessoes.retomar)"""
+        self.reiniciar_jogo(estado['nivel'], palavras=estado['solicitadas'], tamanho=estado['tamanho'],
+                            semente=estado['semente'])
+        self.carregar_puzzle({
+            'grid': estado['grid'],
+            'palavras': estado['palavras'],
+            'nao_inseridas': [palavra for palavra in estado['solicitadas'] if palavra not in estado['palavras']],
+            'posicoes_palavras': {palavra: posicoes_entre(*extremos)
+                                  for palavra, extremos in zip(estado['palavras'], estado['extremos'])},
+        })
+        self.palavras_encontradas = set(estado['encontradas'])
+        for palavra in self.palavras_encontradas:
+            self.marcacoes.update(self.posicoes_palavras[palavra])
+        # As dicas não valem para as palavras já encontradas
+        self.indexar_extremos()
+        atual = estado.get('dica_atual', -1)
+        self.dicas.restaurar(dict(zip(estado['palavras'], estado.get('dicas', ()))),
+                             estado['palavras'][atual] if atual >= 0 else None)
+        self.tempo_acumulado = estado['tempo']
+    
+    def tempo_decorrido(self):
+        """Segundos de jogo neste nível, somando os de antes de retomar a sessão"""
+        if self.inicio_relogio is None:
+            return self.tempo_acumulado
+        return self.tempo_acumulado + time.perf_counter() - self.inicio_relogio
     
     def get_nome_nivel(self):
         """Retorna o nome do nível atual"""
-        nomes = {
-            1: "INICIANTE",
-            2: "INTERMEDIÁRIO",
-            3: "AVANÇADO"
-        }
-        return nomes.get(self.nivel, "DESCONHECIDO")
+        return NOMES_NIVEIS.get(self.nivel, "DESCONHECIDO")
     
     def banner_titulo(self):
         """Exibe um banner ASCII art bonito"""
+        print(self.texto_banner_titulo())
+    
+    def texto_banner_titulo(self):
+        """Monta o banner ASCII art com o nível atual"""
         banner = f"""
 {self.RED}{self.BOLD}
     ╔═══════════════════════════════════════════════════════════════╗
@@ -94,14 +257,16 @@ class CacaPalavras:
     ║                                                               ║
     ╚═══════════════════════════════════════════════════════════════╝
 {self.RESET}"""
-        print(banner)
         
         # Exibe nível atual
         nivel_cor = self.YELLOW if self.nivel == 1 else self.CYAN if self.nivel == 2 else self.MAGENTA
-        print(f"\n    {nivel_cor}{self.BOLD}╔════════════════════════════════════════╗{self.RESET}")
-        print(f"    {nivel_cor}{self.BOLD}║     NÍVEL {self.nivel}: {self.get_nome_nivel():<24}  ║{self.RESET}")
-        print(f"    {nivel_cor}{self.BOLD}║     Tema: Sistema Operacional          ║{self.RESET}")
-        print(f"    {nivel_cor}{self.BOLD}╚════════════════════════════════════════╝{self.RESET}")
+        return "\n".join([
+            banner,
+            f"\n    {nivel_cor}{self.BOLD}╔════════════════════════════════════════╗{self.RESET}",
+            f"    {nivel_cor}{self.BOLD}║     NÍVEL {self.nivel}: {self.get_nome_nivel():<24}  ║{self.RESET}",
+            f"    {nivel_cor}{self.BOLD}║     Tema: Sistema Operacional          ║{self.RESET}",
+            f"    {nivel_cor}{self.BOLD}╚════════════════════════════════════════╝{self.RESET}",
+        ])
     
     def banner_vitoria(self):
         """Banner de vitória"""
@@ -132,127 +297,126 @@ class CacaPalavras:
     def definir_palavras(self, palavras):
         """Define as palavras a serem escondidas"""
         self.palavras = [p.upper() for p in palavras]
+        self.palavras_solicitadas = list(self.palavras)
+        self.indice_extremos = None
         
     def pode_colocar_palavra(self, palavra, linha, coluna, direcao):
         """Verifica se pode colocar uma palavra na posição e direção especificadas"""
-        direcoes = {
-            'H': (0, 1),
-            'V': (1, 0),
-            'D': (1, 1),
-            'A': (-1, 1),
-        }
-        
-        if direcao not in direcoes:
+        if direcao not in DIRECOES:
             return False
         
-        dx, dy = direcoes[direcao]
-        tam = len(palavra)
-        
-        linha_final = linha + dx * (tam - 1)
-        coluna_final = coluna + dy * (tam - 1)
+        dx, dy = DIRECOES[direcao]
         
-        if linha_final < 0 or linha_final >= self.tamanho:
+        # O grid verifica limites e o segmento inteiro de uma vez
+        if not self.grid.cabe(palavra, linha, coluna, dx, dy):
             return False
-        if coluna_final < 0 or coluna_final >= self.tamanho:
-            return False
-        
-        for i in range(tam):
-            l = linha + dx * i
-            c = coluna + dy * i
-            if self.grid[l][c] != ' ' and self.grid[l][c] != palavra[i]:
-                return False
-        
-        return True
+        # No modo sem duplicatas, a sobreposição não pode completar outra cópia de uma palavra
+        return self.verificador_copias is None or not self.verificador_copias.forma_copia(palavra, linha, coluna, dx, dy)
     
     def colocar_palavra(self, palavra, linha, coluna, direcao):
-        """Coloca uma palavra no grid"""
-        direcoes = {
-            'H': (0, 1),
-            'V': (1, 0),
-            'D': (1, 1),
-            'A': (-1, 1),
-        }
-        
-        dx, dy = direcoes[direcao]
-        posicoes = []
-        
-        for i, letra in enumerate(palavra):
-            l = linha + dx * i
-            c = coluna + dy * i
-            self.grid[l][c] = letra
-            posicoes.append((l, c))
+        """Coloca uma palavra no grid e retorna as células que estavam vazias"""
+        dx, dy = DIRECOES[direcao]
+        anterior = self.grid.ler(linha, coluna, dx, dy, len(palavra))
+        posicoes = [(linha + dx * i, coluna + dy * i) for i in range(len(palavra))]
+        escritas = [posicao for posicao, letra in zip(posicoes, anterior) if letra == ' ']
         
+        self.grid.escrever(palavra, linha, coluna, dx, dy)
         self.posicoes_palavras[palavra] = posicoes
+        self.indice_extremos = None
+        return escritas
+    
+    def remover_palavra(self, palavra, escritas):
+        """Desfaz colocar_palavra, limpando só as células que a palavra ocupou sozinha"""
+        for l, c in escritas:
+            self.grid[l][c] = ' '
+        self.posicoes_palavras.pop(palavra, None)
+        self.indice_extremos = None
     
-    def preencher_grid(self):
+    def preencher_grid(self, sem_duplicatas=None, frequencias=None):
         """Preenche espaços vazios com letras aleatórias"""
-        letras = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-        for i in range(self.tamanho):
-            for j in range(self.tamanho):
-                if self.grid[i][j] == ' ':
-                    self.grid[i][j] = random.choice(letras)
-    
-    def gerar_caca_palavras(self):
-        """Gera o caça-palavras colocando todas as palavras"""
-        direcoes = ['H', 'V', 'D', 'A']
-        palavras_nao_inseridas = []
-        
-        for palavra in self.palavras:
-            colocada = False
-            tentativas = 0
-            max_tentativas = 100
-            
-            while not colocada and tentativas < max_tentativas:
-                linha = random.randint(0, self.tamanho - 1)
-                coluna = random.randint(0, self.tamanho - 1)
-                direcao = random.choice(direcoes)
-                
-                if self.pode_colocar_palavra(palavra, linha, coluna, direcao):
-                    self.colocar_palavra(palavra, linha, coluna, direcao)
-                    colocada = True
-                
-                tentativas += 1
-            
-            # Se não conseguiu colocar a palavra, adiciona à lista de não inseridas
-            if not colocada:
-                palavras_nao_inseridas.append(palavra)
+        if sem_duplicatas is None:
+            sem_duplicatas = self.preenchimento_unico
+        if frequencias is None:
+            frequencias = self.frequencias_letras
+        pesos = [frequencias.get(letra, 0) for letra in LETRAS] if frequencias else None
+        
+        with METRICAS.cronometro('preenchimento_segundos', 'Tempo de preencher_grid',
+                                 modo='sem_duplicatas' if sem_duplicatas else 'aleatorio'):
+            if sem_duplicatas:
+                # Garante que cada palavra apareça uma única vez no grid
+                self.conflitos_preenchimento = preencher_sem_duplicatas(
+                    self.grid, self.palavras, self.rng, pesos=pesos)
+            else:
+                self.grid.preencher(self.rng, pesos=pesos)
+    
+    def gerar_caca_palavras(self, progresso=None):
+        """Gera o caça-palavras colocando todas as palavras (progresso recebe os eventos reais)"""
+        inicio = time.perf_counter()
+        self.conflitos_preenchimento = 0
+        self.duplicatas_restantes = 0
+        contidas = {}
+        if self.preenchimento_unico:
+            # Uma palavra que é trecho de outra fica exatamente dentro dela
+            contidas = palavras_contidas(self.palavras)
+            self.verificador_copias = VerificadorCopias(self.grid, self.palavras)
+        
+        posicionador = PosicionadorPalavras(self, rng=self.rng)
+        try:
+            self.palavras_nao_inseridas = posicionador.posicionar(
+                [palavra for palavra in self.palavras if palavra not in contidas], progresso)
+        finally:
+            self.verificador_copias = None
+        self.candidatos_avaliados = posicionador.candidatos_avaliados
+        for palavra, (maior, inicio, invertida) in contidas.items():
+            if maior in self.posicoes_palavras:
+                posicoes = self.posicoes_palavras[maior][inicio:inicio + len(palavra)]
+                self.posicoes_palavras[palavra] = posicoes[::-1] if invertida else posicoes
+            else:
+                self.palavras_nao_inseridas.append(palavra)
         
-        # Remove palavras que não foram inseridas da lista de palavras do jogo
-        for palavra in palavras_nao_inseridas:
+        # Remove palavras que não couberam nem com backtracking da lista de palavras do jogo
+        for palavra in self.palavras_nao_inseridas:
             self.palavras.remove(palavra)
-    
+        
+        if progresso is not None:
+            progresso('preenchendo', 0, 0)
         self.preencher_grid()
+        if self.preenchimento_unico:
+            # Só sobram as palavras que são trecho de outra e as células sem letra segura
+            self.duplicatas_restantes = copias_internas(self.posicoes_palavras) + self.conflitos_preenchimento
+        self.indexar_extremos()
+        self.gerado = True
+        if METRICAS.ativo:
+            METRICAS.observar('geracao_segundos', time.perf_counter() - inicio,
+                              'Tempo de gerar_caca_palavras', tamanho=self.tamanho)
+            METRICAS.incrementar('geracoes_total', descricao='Caça-palavras gerados')
+            METRICAS.incrementar('duplicatas_restantes_total', self.duplicatas_restantes,
+                                 'Cópias extras que o modo sem duplicatas não conseguiu evitar')
+            METRICAS.incrementar('palavras_descartadas_total', len(self.palavras_nao_inseridas),
+                                 'Palavras que não couberam no grid')
+            for quantidade in posicionador.tentativas.values():
+                METRICAS.observar('candidatos_por_palavra', quantidade,
+                                  'Candidatos avaliados para posicionar cada palavra', LIMITES_CONTAGEM)
+        if self.armazem is not None:
+            linhas_grid = [self.grid.ler_linha(linha) for linha in range(self.tamanho)]
+            if self.armazem.comporta(self.tamanho, len(self.palavras_solicitadas), linhas_grid):
+                self.armazem.salvar_jogo(self)
+        if progresso is not None:
+            progresso('pronto', len(self.palavras), len(self.palavras))
     
     def exibir_grid(self):
         """Exibe o grid com design moderno"""
-        print(f"\n{self.RED}{self.BOLD}    ╔═══════════════ TABULEIRO ═══════════════╗{self.RESET}\n")
-        
-        # Cabeçalho com números das colunas
-        print(f"    {self.YELLOW}    ", end="")
-        for i in range(self.tamanho):
-            print(f" {i:2}", end="")
-        print(f"{self.RESET}")
-        
-        print(f"    {self.RED}    ╔{'═══' * self.tamanho}═╗{self.RESET}")
-        
-        # Linhas do grid
-        for i in range(self.tamanho):
-            print(f"    {self.YELLOW} {i:2} {self.RED}║{self.RESET}", end="")
-            for j in range(self.tamanho):
-                letra = self.grid[i][j]
-                
-                # Destaca letras encontradas
-                if (i, j) in self.marcacoes:
-                    print(f"{self.BG_GREEN}{self.BOLD}{self.WHITE} {letra} {self.RESET}", end="")
-                else:
-                    print(f" {self.WHITE}{letra}{self.RESET} ", end="")
-            print(f"{self.RED}║{self.RESET}")
-        
-        print(f"    {self.RED}    ╚{'═══' * self.tamanho}═╝{self.RESET}")
+        quadro = Quadro()
+        self.renderizador.adicionar_grid(quadro, self)
+        print("\n".join(quadro.linhas))
     
     def exibir_palavras(self):
         """Exibe a lista de palavras com design bonito"""
-        print(f"\n{self.MAGENTA}{self.BOLD}    ╔═════════════ PALAVRAS PARA ENCONTRAR ═════════════╗{self.RESET}")
+        print(self.texto_palavras())
+    
+    def texto_palavras(self):
+        """Monta a lista de palavras com design bonito"""
+        linhas = [f"\n{self.MAGENTA}{self.BOLD}    ╔═════════════ PALAVRAS PARA ENCONTRAR ═════════════╗{self.RESET}"]
         
         # Calcula quantas colunas cabem
         colunas = 3
@@ -268,28 +432,98 @@ class CacaPalavras:
                         linha += f"{self.GREEN}✓ {palavra:<12}{self.RESET} "
                     else:
                         linha += f"{self.WHITE}□ {palavra:<12}{self.RESET} "
-            print(linha)
+            linhas.append(linha)
         
-        print(f"{self.MAGENTA}{self.BOLD}    ╚════════════════════════════════════════════════════╝{self.RESET}")
+        linhas.append(f"{self.MAGENTA}{self.BOLD}    ╚════════════════════════════════════════════════════╝{self.RESET}")
+        return "\n".join(linhas)
+    
+    def texto_instrucoes(self):
+        """Monta a caixa de instruções do turno"""
+        return "\n".join([
+            f"\n{self.CYAN}{self.BOLD}    ╔════════════════ INSTRUÇÕES ════════════════╗{self.RESET}",
+            f"    {self.CYAN}║{self.RESET}  📍 Digite coordenadas: {self.YELLOW}linha,coluna{self.RESET}    {self.CYAN}║{self.RESET}",
+            f"    {self.CYAN}║{self.RESET}  💡 Exemplo: {self.YELLOW}3,5{self.RESET} ou {self.YELLOW}3 5{self.RESET}             {self.CYAN}║{self.RESET}",
+            f"    {self.CYAN}║{self.RESET}  🚪 Digite {self.RED}'sair'{self.RESET} para desistir          {self.CYAN}║{self.RESET}",
+            f"    {self.CYAN}║{self.RESET}  🔎 Digite {self.YELLOW}'dica'{self.RESET} para pedir uma dica    {self.CYAN}║{self.RESET}",
+            f"    {self.CYAN}╚════════════════════════════════════════════╝{self.RESET}\n",
+        ])
+    
+    def montar_quadro(self):
+        """Monta o quadro completo de um turno (banner, progresso, grid, palavras e instruções)"""
+        quadro = Quadro()
+        quadro.texto(self.texto_banner_titulo())
+        quadro.texto(self.barra_progresso())
+        self.renderizador.adicionar_grid(quadro, self)
+        quadro.texto(self.texto_palavras())
+        quadro.texto(self.texto_instrucoes())
+        return quadro
+    
+    def ativar_janela(self, altura=None, largura=None):
+        """Passa a mostrar só uma janela do tabuleiro, do tamanho que couber no terminal"""
+        if largura is None:
+            largura = self.renderizador.colunas_visiveis()
+        if altura is None:
+            # Mede o resto do quadro com uma janela de uma linha só
+            self.janela = Janela(1, largura)
+            altura = self.renderizador.linhas_visiveis(len(self.montar_quadro().linhas) - 1)
+        self.janela = Janela(altura, largura)
+        self.janela.limitar(self.tamanho, self.tamanho)
+    
+    def comando_janela(self, entrada):
+        """Aplica um comando de movimento da janela; retorna False se não for um"""
+        comando = entrada.lower()
+        if comando and set(comando) <= set(_MOVIMENTOS_JANELA):
+            # 'dd' anda duas vezes para a direita
+            for letra in comando:
+                self.janela.mover(*_MOVIMENTOS_JANELA[letra], self.tamanho, self.tamanho)
+            return True
+        if comando.startswith('ir '):
+            partes = comando[3:].replace(',', ' ').split()
+            if len(partes) != 2:
+                raise ValueError(comando)
+            self.janela.centralizar(int(partes[0]), int(partes[1]), self.tamanho, self.tamanho)
+            return True
+        return False
+    
+    def exibir(self, texto=''):
+        """print() que avisa o renderizador das linhas escritas abaixo do quadro"""
+        print(texto)
+        self.renderizador.contar_linhas(texto)
+    
+    def perguntar(self, mensagem):
+        """input() que avisa o renderizador da linha do prompt"""
+        resposta = input(mensagem)
+        self.renderizador.contar_linhas(mensagem + resposta)
+        return resposta
     
     def obter_coordenada(self, mensagem, cor=None):
-        """Obtém uma coordenada do usuário"""
+        """Obtém uma coordenada do usuário (ou MOVER_JANELA/PEDIR_DICA para esses comandos)"""
         if cor is None:
             cor = self.CYAN
         while True:
             try:
-                entrada = input(f"    {cor}{self.BOLD}➤ {mensagem}{self.RESET}").strip()
+                inicio = time.perf_counter()
+                entrada = self.perguntar(f"    {cor}{self.BOLD}➤ {mensagem}{self.RESET}").strip()
+                METRICAS.observar('entrada_segundos', time.perf_counter() - inicio,
+                                  'Tempo até o jogador digitar uma coordenada')
                 
                 if entrada.lower() == 'sair':
                     return None
                 
+                if entrada.lower() == 'dica':
+                    return PEDIR_DICA
+                
+                if self.janela is not None and self.comando_janela(entrada):
+                    return MOVER_JANELA
+                
                 if ',' in entrada:
                     partes = entrada.split(',')
                 else:
                     partes = entrada.split()
                 
                 if len(partes) != 2:
-                    print(f"    {self.RED}✗ Formato inválido! Use: linha,coluna (ex: 3,5){self.RESET}")
+                    METRICAS.incrementar('entradas_invalidas_total', descricao='Coordenadas digitadas inválidas')
+                    self.exibir(f"    {self.RED}✗ Formato inválido! Use: linha,coluna (ex: 3,5){self.RESET}")
                     continue
                 
                 linha = int(partes[0].strip())
@@ -298,9 +532,11 @@ class CacaPalavras:
                 if 0 <= linha < self.tamanho and 0 <= coluna < self.tamanho:
                     return (linha, coluna)
                 else:
-                    print(f"    {self.RED}✗ Coordenadas fora do grid! Use valores de 0 a {self.tamanho-1}{self.RESET}")
+                    METRICAS.incrementar('entradas_invalidas_total', descricao='Coordenadas digitadas inválidas')
+                    self.exibir(f"    {self.RED}✗ Coordenadas fora do grid! Use valores de 0 a {self.tamanho-1}{self.RESET}")
             except ValueError:
-                print(f"    {self.RED}✗ Digite números válidos!{self.RESET}")
+                METRICAS.incrementar('entradas_invalidas_total', descricao='Coordenadas digitadas inválidas')
+                self.exibir(f"    {self.RED}✗ Digite números válidos!{self.RESET}")
             except KeyboardInterrupt:
                 return None
     
@@ -323,121 +559,191 @@ class CacaPalavras:
         step_l = 0 if dl == 0 else dl // abs(dl)
         step_c = 0 if dc == 0 else dc // abs(dc)
         
-        palavra = ""
-        posicoes = []
-        l, c = l1, c1
+        # Com as duas pontas dentro do grid, a linha reta inteira também está
+        if not (self.grid.dentro(l1, c1) and self.grid.dentro(l2, c2)):
+            return None, []
         
-        for _ in range(passos + 1):
-            if 0 <= l < self.tamanho and 0 <= c < self.tamanho:
-                palavra += self.grid[l][c]
-                posicoes.append((l, c))
-                l += step_l
-                c += step_c
-            else:
-                return None, []
+        palavra = self.grid.ler(l1, c1, step_l, step_c, passos + 1)
+        posicoes = [(l1 + step_l * i, c1 + step_c * i) for i in range(passos + 1)]
         
         return palavra, posicoes
     
+    def indexar_extremos(self):
+        """Indexa as palavras pelas coordenadas das pontas, nos dois sentidos"""
+        self.indice_extremos = {}
+        self.conjunto_palavras = set(self.palavras)
+        for palavra, posicoes in self.posicoes_palavras.items():
+            if palavra in self.conjunto_palavras:
+                self.indice_extremos[(posicoes[0], posicoes[-1])] = palavra
+        # Uma palavra e a sua inversa podem ocupar as mesmas células: cada uma fica com o próprio sentido
+        for palavra, posicoes in self.posicoes_palavras.items():
+            if palavra in self.conjunto_palavras:
+                self.indice_extremos.setdefault((posicoes[-1], posicoes[0]), palavra)
+        self.dicas = IndiceDicas(self.posicoes_palavras, self.palavras, self.palavras_encontradas)
+    
     def verificar_selecao(self, coord_inicial, coord_final):
-        """Verifica se a seleção corresponde a uma palavra"""
-        palavra, posicoes = self.extrair_palavra_entre_coordenadas(coord_inicial, coord_final)
-        
-        if palavra is None:
-            return "INVALIDA", None, []
-        
-        # Verifica apenas palavras na direção correta (sem reverso)
-        if palavra in self.palavras:
-            if palavra in self.palavras_encontradas:
-                return "JÁ_ENCONTRADA", palavra, posicoes
-            else:
-                self.palavras_encontradas.add(palavra)
-                self.marcacoes.update(posicoes)
-                return "CORRETA", palavra, posicoes
+        """Verifica se a seleção corresponde a uma palavra (em qualquer sentido)"""
+        resposta = self._avaliar_selecao(coord_inicial, coord_final)
+        # Registro compacto da partida: (l1, c1, l2, c2, resultado)
+        self.jogadas.append((coord_inicial[0], coord_inicial[1], coord_final[0], coord_final[1], resposta[0]))
+        if self.diario is not None:
+            self.diario.registrar_jogada(self.id_sessao, resposta[0], resposta[1], self.tempo_decorrido())
+        return resposta
+    
+    def _avaliar_selecao(self, coord_inicial, coord_final):
+        if self.indice_extremos is None:
+            self.indexar_extremos()
+        
+        # Caso comum: as pontas de uma palavra escondida resolvem com uma consulta
+        palavra = self.indice_extremos.get((tuple(coord_inicial), tuple(coord_final)))
+        if palavra is not None:
+            posicoes = self.posicoes_palavras[palavra]
+            if posicoes[0] != tuple(coord_inicial):
+                posicoes = posicoes[::-1]
         else:
-            return "INCORRETA", palavra, posicoes
+            palavra, posicoes = self.extrair_palavra_entre_coordenadas(coord_inicial, coord_final)
+            
+            if palavra is None:
+                return "INVALIDA", None, []
+            
+            # Cópias formadas por acaso no grid também valem, lidas em qualquer sentido
+            if palavra not in self.conjunto_palavras:
+                if palavra[::-1] not in self.conjunto_palavras:
+                    return "INCORRETA", palavra, posicoes
+                palavra = palavra[::-1]
+        
+        if palavra in self.palavras_encontradas:
+            return "JÁ_ENCONTRADA", palavra, posicoes
+        self.palavras_encontradas.add(palavra)
+        self.marcacoes.update(posicoes)
+        self.dicas.marcar_encontrada(palavra)
+        self.destaques_dica = set()
+        return "CORRETA", palavra, posicoes
     
     def jogo_completo(self):
         """Verifica se todas as palavras foram encontradas"""
         return len(self.palavras_encontradas) == len(self.palavras)
     
-    def animacao_carregamento(self):
-        """Animação de carregamento"""
-        frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-        print(f"\n    {self.RED}Gerando caça-palavras ", end="", flush=True)
-        for _ in range(20):
-            for frame in frames:
-                print(f"{frame}", end="", flush=True)
-                time.sleep(0.05)
-                print("\b", end="", flush=True)
-        print(f"✓{self.RESET}\n")
+    def pedir_dica(self, palavra=None, letra=None):
+        """Dá a próxima dica (primeira letra, depois direção, depois a palavra) ou None"""
+        if self.dicas is None:
+            self.indexar_extremos()
+        dica = self.dicas.dica(palavra.upper() if palavra else None, letra)
+        if dica is not None:
+            self.destaques_dica = set(dica.posicoes)
+            METRICAS.incrementar('dicas_total', descricao='Dicas dadas', nivel=dica.nivel)
+            if self.diario is not None:
+                self.diario.registrar_dica(self.id_sessao, self.palavras.index(self.dicas.atual), dica.nivel)
+        return dica
+    
+    def mostrar_dica(self):
+        """Dá uma dica no jogo de terminal, levando a janela até ela"""
+        dica = self.pedir_dica()
+        if dica is None:
+            self.caixa_mensagem("★ DICA", "Não há mais palavras para dar dica.", self.YELLOW)
+        else:
+            if self.janela is not None:
+                self.janela.centralizar(*dica.celula, self.tamanho, self.tamanho)
+            self.caixa_mensagem("★ DICA", texto_dica(dica), self.YELLOW)
+        self.perguntar(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
     
     def caixa_mensagem(self, titulo, mensagem, cor):
         """Exibe uma mensagem em uma caixa bonita"""
         largura = 60
-        print(f"\n    {cor}╔{'═' * largura}╗{self.RESET}")
-        print(f"    {cor}║{self.BOLD}{titulo.center(largura)}{self.RESET}{cor}║{self.RESET}")
-        print(f"    {cor}╠{'═' * largura}╣{self.RESET}")
-        print(f"    {cor}║  {mensagem:<{largura-2}}║{self.RESET}")
-        print(f"    {cor}╚{'═' * largura}╝{self.RESET}\n")
+        with METRICAS.cronometro('render_segundos', 'Tempo de cada fase do desenho de um turno', fase='mensagem'):
+            self.exibir(f"\n    {cor}╔{'═' * largura}╗{self.RESET}")
+            self.exibir(f"    {cor}║{self.BOLD}{titulo.center(largura)}{self.RESET}{cor}║{self.RESET}")
+            self.exibir(f"    {cor}╠{'═' * largura}╣{self.RESET}")
+            self.exibir(f"    {cor}║  {mensagem:<{largura-2}}║{self.RESET}")
+            self.exibir(f"    {cor}╚{'═' * largura}╝{self.RESET}\n")
     
     def jogar(self):
         """Loop principal do jogo"""
-        self.limpar_tela()
-        self.banner_titulo()
-        self.animacao_carregamento()
-        self.gerar_caca_palavras()
+        with METRICAS.cronometro('render_segundos', 'Tempo de cada fase do desenho de um turno', fase='abertura'):
+            self.limpar_tela()
+            self.banner_titulo()
+        if not self.gerado:
+            # Sem pré-geração: gera agora, mostrando o progresso real
+            indicador = IndicadorProgresso(self, desenhar_direto=True)
+            self.gerar_caca_palavras(progresso=indicador)
+            indicador.finalizar()
+        
+        if self.janela is None and self.tamanho > self.renderizador.colunas_visiveis():
+            # Tabuleiro mais largo que o terminal: mostra uma janela com rolagem
+            self.ativar_janela()
+        
+        if self.diario is not None:
+            # Retrato do nível; daqui em diante cada seleção grava só o que mudou
+            self.diario.salvar_sessao(self.id_sessao, self, self.tempo_acumulado)
+        
+        self.perguntar(f"    {self.YELLOW}Pressione ENTER para começar...{self.RESET}")
+        self.inicio_relogio = time.perf_counter()
         
-        input(f"    {self.YELLOW}Pressione ENTER para começar...{self.RESET}")
+        # A tela do "Pressione ENTER" não é um quadro: o primeiro turno desenha tudo
+        self.renderizador.invalidar()
         
+        coord_inicial = None
         while not self.jogo_completo():
-            self.limpar_tela()
-            self.banner_titulo()
-            print(self.barra_progresso())
-            self.exibir_grid()
-            self.exibir_palavras()
-            
-            print(f"\n{self.CYAN}{self.BOLD}    ╔════════════════ INSTRUÇÕES ════════════════╗{self.RESET}")
-            print(f"    {self.CYAN}║{self.RESET}  📍 Digite coordenadas: {self.YELLOW}linha,coluna{self.RESET}    {self.CYAN}║{self.RESET}")
-            print(f"    {self.CYAN}║{self.RESET}  💡 Exemplo: {self.YELLOW}3,5{self.RESET} ou {self.YELLOW}3 5{self.RESET}             {self.CYAN}║{self.RESET}")
-            print(f"    {self.CYAN}║{self.RESET}  🚪 Digite {self.RED}'sair'{self.RESET} para desistir          {self.CYAN}║{self.RESET}")
-            print(f"    {self.CYAN}╚════════════════════════════════════════════╝{self.RESET}\n")
-            
-            coord_inicial = self.obter_coordenada("Coordenada INICIAL: ")
+            # Um único write por turno; depois do primeiro, só as diferenças
+            with METRICAS.cronometro('render_segundos', 'Tempo de cada fase do desenho de um turno', fase='montar'):
+                quadro = self.montar_quadro()
+            with METRICAS.cronometro('render_segundos', 'Tempo de cada fase do desenho de um turno', fase='desenhar'):
+                self.renderizador.desenhar(quadro)
             
             if coord_inicial is None:
-                self.caixa_mensagem("GAME OVER", "Você desistiu do jogo!", self.RED)
-                faltantes = set(self.palavras) - self.palavras_encontradas
-                print(f"    {self.YELLOW}Palavras que faltavam:{self.RESET}")
-                for palavra in faltantes:
-                    print(f"      {self.RED}• {palavra}{self.RESET}")
-                print()
-                return False  # Retorna False quando desistiu
+                coord_inicial = self.obter_coordenada("Coordenada INICIAL: ")
+                
+                if coord_inicial is None:
+                    self.caixa_mensagem("GAME OVER", "Você desistiu do jogo!", self.RED)
+                    faltantes = set(self.palavras) - self.palavras_encontradas
+                    self.exibir(f"    {self.YELLOW}Palavras que faltavam:{self.RESET}")
+                    for palavra in faltantes:
+                        self.exibir(f"      {self.RED}• {palavra}{self.RESET}")
+                    self.exibir()
+                    return False  # Retorna False quando desistiu
+                
+                if coord_inicial in (MOVER_JANELA, PEDIR_DICA):
+                    if coord_inicial == PEDIR_DICA:
+                        self.mostrar_dica()
+                    coord_inicial = None
+                    continue
+            else:
+                # A janela foi movida (ou veio uma dica) entre as duas coordenadas: a inicial continua valendo
+                self.exibir(f"    {self.CYAN}{self.BOLD}➤ Coordenada INICIAL: {coord_inicial[0]},{coord_inicial[1]}{self.RESET}")
             
             coord_final = self.obter_coordenada("Coordenada FINAL: ")
             
             if coord_final is None:
                 self.caixa_mensagem("GAME OVER", "Você desistiu do jogo!", self.RED)
                 faltantes = set(self.palavras) - self.palavras_encontradas
-                print(f"    {self.YELLOW}Palavras que faltavam:{self.RESET}")
+                self.exibir(f"    {self.YELLOW}Palavras que faltavam:{self.RESET}")
                 for palavra in faltantes:
-                    print(f"      {self.RED}• {palavra}{self.RESET}")
-                print()
+                    self.exibir(f"      {self.RED}• {palavra}{self.RESET}")
+                self.exibir()
                 return False  # Retorna False quando desistiu
             
+            if coord_final == PEDIR_DICA:
+                self.mostrar_dica()
+                continue
+            
+            if coord_final == MOVER_JANELA:
+                continue
+            
             resultado, palavra, posicoes = self.verificar_selecao(coord_inicial, coord_final)
+            coord_inicial = None
             
             if resultado == "CORRETA":
                 self.caixa_mensagem("✓ CORRETO!", f"Você encontrou: {palavra}", self.GREEN)
-                input(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
+                self.perguntar(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
             elif resultado == "JÁ_ENCONTRADA":
                 self.caixa_mensagem("⚠ ATENÇÃO", f"Você já encontrou: {palavra}", self.YELLOW)
-                input(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
+                self.perguntar(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
             elif resultado == "INVALIDA":
                 self.caixa_mensagem("✗ ERRO", "Seleção inválida! Use uma linha reta.", self.RED)
-                input(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
+                self.perguntar(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
             else:
                 self.caixa_mensagem("✗ INCORRETO", f"'{palavra}' não está na lista!", self.RED)
-                input(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
+                self.perguntar(f"    {self.WHITE}Pressione ENTER para continuar...{self.RESET}")
         
         if self.jogo_completo():
             self.limpar_tela()
@@ -445,23 +751,111 @@ class CacaPalavras:
             print(self.barra_progresso())
             self.exibir_grid()
             print(f"\n    {self.GREEN}{self.BOLD}🔥 Parabéns! Você completou o NÍVEL {self.nivel}! 🔥{self.RESET}\n")
+            if self.diario is not None:
+                tempo = self.tempo_decorrido()
+                pontos = pontuar(len(self.palavras_encontradas), tempo, self.dicas.niveis_dados)
+                self.diario.concluir(self.id_sessao, self.nivel, tempo, pontos)
+                print(f"    {self.YELLOW}{self.BOLD}Tempo: {tempo:.0f} s    Pontos: {pontos}{self.RESET}\n")
             return True  # Retorna True quando completou o nível
 
 
-def main():
+def preparar_nivel(nivel, progresso=None, tamanho=None, backend='bytes'):
+    """Cria e gera o jogo de um nível (pode rodar em segundo plano)"""
+    jogo = CacaPalavras(backend=backend)
+    jogo.reiniciar_jogo(nivel, tamanho=tamanho)
+    jogo.gerar_caca_palavras(progresso=progresso)
+    return jogo
+
+
+# Subcomandos que rodam sem o loop interativo: nome -> (módulo, função)
+SUBCOMANDOS = {
+    'generate': ('lote', 'main_lote'),
+    'gerar': ('lote', 'main_lote'),
+    'servidor': ('servidor', 'main_servidor'),
+    'cliente': ('cliente', 'main_cliente'),
+    'benchmark': ('benchmark', 'main_benchmark'),
+    'reproduzir': ('reproducao', 'main_reproduzir'),
+    'dificuldade': ('dificuldade', 'main_dificuldade'),
+}
+
+
+def main(argv=None, diario=None, registros=None):
     """Função principal"""
-    jogo = CacaPalavras()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMANDOS:
+        # Importa só quando usado: esses módulos importam este aqui
+        modulo, funcao = SUBCOMANDOS[argv[0]]
+        return getattr(importlib.import_module(modulo), funcao)(argv[1:])
+    if argv[:1] == ['--metricas'] and len(argv) > 1:
+        # Liga a instrumentação e grava as métricas ao sair (.json ou formato do Prometheus)
+        METRICAS.ativar()
+        try:
+            return main(argv[2:], diario, registros)
+        finally:
+            METRICAS.salvar(argv[1])
+    if argv[:1] == ['--sessao'] and len(argv) > 1:
+        # Guarda o progresso num diário e continua dele a sessão anterior, se houver
+        with DiarioSessoes(argv[1]) as diario:
+            return main(argv[2:], diario, registros)
+    if argv[:1] == ['--registro'] and len(argv) > 1:
+        # Acrescenta ao arquivo o registro de cada nível jogado (JSONL, para main.py reproduzir)
+        with open(argv[1], 'a', encoding='utf-8') as registros:
+            return main(argv[2:], diario, registros)
+    
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='Caça-palavras no terminal. --metricas, --sessao e --registro ARQUIVO vêm antes '
+                    'destas opções; os subcomandos são ' + ', '.join(SUBCOMANDOS) + '.')
+    parser.add_argument('--tamanho', type=int, help='lado do grid em todos os níveis (padrão: o de cada nível)')
+    parser.add_argument('--grid', choices=list(BACKENDS), default='bytes',
+                        help='armazenamento do grid (esparso para tabuleiros enormes)')
+    args = parser.parse_args(argv)
+    if args.tamanho is not None and args.tamanho < 1:
+        parser.error('--tamanho precisa ser positivo')
+    
+    jogo = CacaPalavras(backend=args.grid)
     nivel_atual = 1
+    estado = diario.retomar(ID_SESSAO_TERMINAL) if diario is not None else None
+    if estado is not None and estado.get('concluida'):
+        # Nível terminado: a sessão segue no próximo (depois do último, recomeça do 1)
+        nivel_atual = estado['nivel'] + 1 if estado['nivel'] < 3 else 1
+        estado = None
+    elif estado is not None:
+        nivel_atual = estado['nivel']
     
     continuar = True
     
+    # O próximo nível é gerado numa thread enquanto o jogador está no atual
+    executor = ThreadPoolExecutor(max_workers=1)
+    indicador = IndicadorProgresso(jogo)
+    proximo = None
+    
     while continuar and nivel_atual <= 3:
-        # Reinicia o jogo com o nível atual
-        jogo.reiniciar_jogo(nivel_atual)
+        retomada = estado is not None
+        if estado is not None:
+            # Sessão salva pela metade: volta ao mesmo grid, com as palavras já encontradas
+            jogo.retomar_sessao(estado)
+            estado = None
+        elif proximo is None:
+            # Reinicia o jogo com o nível atual (jogar() gera na hora)
+            jogo.reiniciar_jogo(nivel_atual, tamanho=args.tamanho)
+        else:
+            # Normalmente já está pronto; se não, mostra o progresso real até ficar
+            jogo = indicador.aguardar(proximo)
+        jogo.diario = diario
+        
+        if nivel_atual < 3:
+            proximo = executor.submit(preparar_nivel, nivel_atual + 1, indicador, args.tamanho, args.grid)
         
         # Joga o nível
         completou = jogo.jogar()
         
+        # Uma sessão retomada não tem as jogadas de antes: o registro dela não se reproduz
+        if registros is not None and jogo.jogadas and not retomada:
+            from reproducao import registrar_partida  # reproducao importa este módulo
+            registros.write(json.dumps(registrar_partida(jogo), ensure_ascii=False) + '\n')
+            registros.flush()
+        
         if not completou:
             # Jogador desistiu
             continuar = False
@@ -470,8 +864,7 @@ def main():
             if nivel_atual < 3:
                 # Obtém o nome do próximo nível
                 proximo_nivel = nivel_atual + 1
-                nomes_niveis = {1: "INICIANTE", 2: "INTERMEDIÁRIO", 3: "AVANÇADO"}
-                nome_proximo = nomes_niveis.get(proximo_nivel, "")
+                nome_proximo = NOMES_NIVEIS.get(proximo_nivel, "")
                 
                 print(f"\n{jogo.YELLOW}{jogo.BOLD}  ╔════════════════════════════════════════════╗{jogo.RESET}")
                 print(f"    {jogo.YELLOW}{jogo.BOLD}║     Deseja ir para o próximo nível?        ║{jogo.RESET}")
@@ -483,7 +876,6 @@ def main():
                 if resposta in ['sim', 's', 'yes', 'y']:
                     nivel_atual += 1
                     print(f"\n    {jogo.GREEN}🔥 Avançando para o nível {nivel_atual}!{jogo.RESET}")
-                    time.sleep(2)
                 else:
                     continuar = False
                     print(f"\n    {jogo.RED}Você completou {nivel_atual} nível(is)! Parabéns! 🔥{jogo.RESET}\n")
@@ -509,8 +901,15 @@ def main():
                 """)
                 continuar = False
     
+    executor.shutdown(wait=False, cancel_futures=True)
+    if diario is not None and diario.pontuacoes:
+        print(f"    {jogo.YELLOW}{jogo.BOLD}Melhores pontuações:{jogo.RESET}")
+        for posicao, pontuacao in enumerate(diario.placar(5), 1):
+            print(f"      {posicao}. {pontuacao['pontos']:>5} pontos - nível {pontuacao['nivel']} "
+                  f"em {pontuacao['tempo']:.0f} s")
+        print()
     print(f"    {jogo.RED}Obrigado por jogar! 🔥{jogo.RESET}\n")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import partial
+
+PREFIXO = 'cacapalavras_'
+
+# Limites dos histogramas de tempo, em segundos (100 µs a 30 s)
+LIMITES_TEMPO = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Limites dos histogramas de contagem (ex.: candidatos avaliados por palavra)
+LIMITES_CONTAGEM = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 100000)
+
+_NULO = nullcontext()
+
+
+def _rotulos(rotulos, extra=None):
+    """Formata os rótulos no padrão do Prometheus: {a="1",b="2"}"""
+    itens = list(rotulos) + ([extra] if extra else [])
+    if not itens:
+        return ''
+    return '{' + ','.join(f'{nome}="{valor}"' for nome, valor in itens) + '}'
+
+
+class Contador:
+    def __init__(self, descricao=''):
+        self.descricao = descricao
+        self.valores = {}
+
+    def incrementar(self, rotulos=(), quantidade=1):
+        self.valores[rotulos] = self.valores.get(rotulos, 0) + quantidade
+
+    def texto(self, nome):
+        linhas = [f'# HELP {nome} {self.descricao}', f'# TYPE {nome} counter']
+        for rotulos, valor in sorted(self.valores.items()):
+            linhas.append(f'{nome}{_rotulos(rotulos)} {valor}')
+        return linhas
+
+    def instantaneo(self):
+        return [{'rotulos': dict(rotulos), 'valor': valor} for rotulos, valor in sorted(self.valores.items())]
+
+
+class Histograma:
+    def __init__(self, descricao='', limites=LIMITES_TEMPO):
+        self.descricao = descricao
+        self.limites = tuple(limites)
+        # rótulos -> [contagens por faixa (+ a faixa acima do último limite), soma]
+        self.series = {}
+
+    def observar(self, valor, rotulos=()):
+        serie = self.series.get(rotulos)
+        if serie is None:
+            serie = self.series[rotulos] = [[0] * (len(self.limites) + 1), 0]
+        serie[0][bisect_left(self.limites, valor)] += 1
+        serie[1] += valor
+
+    def texto(self, nome):
+        linhas = [f'# HELP {nome} {self.descricao}', f'# TYPE {nome} histogram']
+        for rotulos, (contagens, soma) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ('+Inf',), contagens):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{_rotulos(rotulos, ("le", limite))} {acumulado}')
+            linhas.append(f'{nome}_sum{_rotulos(rotulos)} {soma}')
+            linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+        return linhas
+
+    def instantaneo(self):
+        return [{'rotulos': dict(rotulos), 'limites': list(self.limites), 'contagens': list(contagens),
+                 'soma': soma, 'total': sum(contagens)}
+                for rotulos, (contagens, soma) in sorted(self.series.items())]
+
+
+class Metricas:
+    """Registro de contadores e histogramas, desligado por padrão.
+
+    Desligado, cronometro() devolve um contexto vazio e observar()/incrementar()
+    retornam logo na primeira linha, então a instrumentação pode ficar no
+    código do jogo sem custo perceptível.
+    """
+
+    def __init__(self):
+        self.ativo = False
+        self._trava = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+
+    def ativar(self, ativo=True):
+        self.ativo = ativo
+
+    def zerar(self):
+        with self._trava:
+            self.contadores = {}
+            self.histogramas = {}
+
+    def incrementar(self, nome, quantidade=1, descricao='', **rotulos):
+        if not self.ativo:
+            return
+        with self._trava:
+            contador = self.contadores.get(nome)
+            if contador is None:
+                contador = self.contadores[nome] = Contador(descricao)
+            contador.incrementar(tuple(sorted(rotulos.items())), quantidade)
+
+    def observar(self, nome, valor, descricao='', limites=LIMITES_TEMPO, **rotulos):
+        if not self.ativo:
+            return
+        with self._trava:
+            histograma = self.histogramas.get(nome)
+            if histograma is None:
+                histograma = self.histogramas[nome] = Histograma(descricao, limites)
+            histograma.observar(valor, tuple(sorted(rotulos.items())))
+
+    def cronometro(self, nome, descricao='', **rotulos):
+        """Contexto que mede o tempo do bloco num histograma (em segundos)"""
+        if not self.ativo:
+            return _NULO
+        return _Cronometro(self, nome, descricao, rotulos)
+
+    def texto_prometheus(self):
+        """Exporta tudo no formato de texto do Prometheus"""
+        linhas = []
+        with self._trava:
+            for nome, contador in sorted(self.contadores.items()):
+                linhas.extend(contador.texto(PREFIXO + nome))
+            for nome, histograma in sorted(self.histogramas.items()):
+                linhas.extend(histograma.texto(PREFIXO + nome))
+        return '\n'.join(linhas) + '\n'
+
+    def instantaneo(self):
+        """Exporta tudo como um dicionário pronto para virar JSON"""
+        with self._trava:
+            return {
+                'contadores': {PREFIXO + nome: contador.instantaneo()
+                               for nome, contador in sorted(self.contadores.items())},
+                'histogramas': {PREFIXO + nome: histograma.instantaneo()
+                                for nome, histograma in sorted(self.histogramas.items())},
+            }
+
+    def retirar(self):
+        """Devolve o que foi registrado até agora (num formato que mesclar() aceita) e zera o registro"""
+        with self._trava:
+            parcial = {
+                'contadores': {nome: (contador.descricao, contador.valores)
+                               for nome, contador in self.contadores.items()},
+                'histogramas': {nome: (histograma.descricao, histograma.limites, histograma.series)
+                                for nome, histograma in self.histogramas.items()},
+            }
+            self.contadores = {}
+            self.histogramas = {}
+        return parcial
+
+    def mesclar(self, parcial):
+        """Soma ao registro o que outro processo retirou (veja mapear_em_processos)"""
+        with self._trava:
+            for nome, (descricao, valores) in parcial['contadores'].items():
+                contador = self.contadores.get(nome)
+                if contador is None:
+                    contador = self.contadores[nome] = Contador(descricao)
+                for rotulos, valor in valores.items():
+                    contador.incrementar(rotulos, valor)
+            for nome, (descricao, limites, series) in parcial['histogramas'].items():
+                histograma = self.histogramas.get(nome)
+                if histograma is None:
+                    histograma = self.histogramas[nome] = Histograma(descricao, limites)
+                if histograma.limites != tuple(limites):
+                    raise ValueError(f"O histograma {nome} tem limites diferentes em outro processo")
+                for rotulos, (contagens, soma) in series.items():
+                    serie = histograma.series.get(rotulos)
+                    if serie is None:
+                        serie = histograma.series[rotulos] = [[0] * len(contagens), 0]
+                    serie[0] = [atual + nova for atual, nova in zip(serie[0], contagens)]
+                    serie[1] += soma
+
+    def salvar(self, caminho):
+        """Grava em JSON se o arquivo terminar em .json; senão, no formato do Prometheus"""
+        if caminho.endswith('.json'):
+            texto = json.dumps(self.instantaneo(), ensure_ascii=False, indent=2) + '\n'
+        else:
+            texto = self.texto_prometheus()
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+
+
+class _Cronometro:
+    __slots__ = ('metricas', 'nome', 'descricao', 'rotulos', 'inicio')
+
+    def __init__(self, metricas, nome, descricao, rotulos):
+        self.metricas = metricas
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.metricas.observar(self.nome, time.perf_counter() - self.inicio, self.descricao, **self.rotulos)
+
+
+# Registro único do processo, usado pelo jogo, pelo servidor e pelos benchmarks
+METRICAS = Metricas()
+
+
+def _executar_medindo(funcao, ativo, tarefa):
+    """Roda uma tarefa num processo de trabalho e devolve (resultado, métricas registradas nela)"""
+    if not ativo:
+        return funcao(tarefa), None
+    METRICAS.ativar()
+    # Descarta o que veio do processo principal (fork) ou já foi devolvido com outra tarefa
+    METRICAS.retirar()
+    resultado = funcao(tarefa)
+    return resultado, METRICAS.retirar()
+
+
+def mapear_em_processos(executor, funcao, tarefas, chunksize=1):
+    """executor.map que traz de volta as métricas registradas nos processos de trabalho.
+
+    Cada processo liga a instrumentação se ela estiver ligada aqui, e o que
+    ele registra em cada tarefa é mesclado em METRICAS à medida que os
+    resultados chegam (na ordem das tarefas, como no map).
+    """
+    for resultado, parcial in executor.map(partial(_executar_medindo, funcao, METRICAS.ativo), tarefas,
+                                           chunksize=chunksize):
+        if parcial is not None:
+            METRICAS.mesclar(parcial)
+        yield resultado
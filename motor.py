@@ -0,0 +1,116 @@
+import time
+
+from diario import pontuar
+from dicas import NIVEIS_DICA
+from main import CacaPalavras
+from reproducao import registrar_partida
+from sessao import SessaoJogo
+
+
+class MotorJogo:
+    """API do jogo sem nenhuma entrada ou saída: novo jogo, seleção e estado.
+
+    Gera com o mesmo CacaPalavras do jogo de terminal, mas mantém só uma
+    SessaoJogo enxuta durante a partida; as respostas são dicionários
+    prontos para virar JSON.
+    """
+
+    def __init__(self, backend='bytes', diario=None, id_sessao=None):
+        self.backend = backend
+        self.jogo = None
+        # Com um diário, a sessão é salva a cada seleção e pode ser retomada pelo id
+        self.diario = diario
+        self.id_sessao = id_sessao
+        self.tempo_acumulado = 0.0
+        self.inicio = None
+
+    def novo_jogo(self, nivel=1, semente=None, palavras=None, tamanho=None):
+        """Gera um novo caça-palavras e retorna o estado inicial"""
+        jogo = CacaPalavras(backend=self.backend, semente=semente)
+        jogo.reiniciar_jogo(nivel, palavras=palavras, tamanho=tamanho, semente=semente)
+        jogo.gerar_caca_palavras()
+        self.jogo = SessaoJogo.de_jogo(jogo)
+        self.tempo_acumulado = 0.0
+        self.inicio = time.perf_counter()
+        if self.diario is not None:
+            self.diario.salvar_sessao(self.id_sessao, self.jogo)
+        return self.estado()
+
+    def retomar(self, id_sessao):
+        """Continua uma sessão salva no diário e retorna o estado dela"""
+        estado = self.diario.retomar(id_sessao) if self.diario is not None else None
+        if estado is None or estado.get('concluida'):
+            raise ValueError(f"Nenhuma sessão em andamento com o id {id_sessao}")
+        self.id_sessao = id_sessao
+        self.jogo = SessaoJogo.de_estado(estado)
+        self.tempo_acumulado = estado['tempo']
+        self.inicio = time.perf_counter()
+        return self.estado()
+
+    def tempo_decorrido(self):
+        """Segundos de jogo da sessão, contando os de antes de retomá-la"""
+        return self.tempo_acumulado + time.perf_counter() - self.inicio
+
+    def _exigir_jogo(self):
+        if self.jogo is None:
+            raise ValueError("Nenhum jogo em andamento: comece um novo jogo")
+        return self.jogo
+
+    def enviar_selecao(self, coord_inicial, coord_final):
+        """Verifica uma seleção e retorna o resultado"""
+        jogo = self._exigir_jogo()
+        for linha, coluna in (coord_inicial, coord_final):
+            if not (0 <= linha < jogo.tamanho and 0 <= coluna < jogo.tamanho):
+                raise ValueError(f"Coordenadas fora do grid! Use valores de 0 a {jogo.tamanho - 1}")
+        resultado, palavra, posicoes = jogo.verificar_selecao(tuple(coord_inicial), tuple(coord_final))
+        if self.diario is not None:
+            tempo = self.tempo_decorrido()
+            self.diario.registrar_jogada(self.id_sessao, resultado, palavra, tempo)
+            if resultado == 'CORRETA' and jogo.jogo_completo():
+                self.diario.concluir(self.id_sessao, jogo.nivel, tempo,
+                                     pontuar(len(jogo.palavras), tempo, jogo.dicas_dadas))
+        return {
+            'resultado': resultado,
+            'palavra': palavra,
+            'posicoes': [list(posicao) for posicao in posicoes],
+            'encontradas': bin(jogo.encontradas).count('1'),
+            'total': len(jogo.palavras),
+            'completo': jogo.jogo_completo(),
+        }
+
+    def dica(self, palavra=None):
+        """Dá a próxima dica (primeira letra, direção e então a palavra)"""
+        jogo = self._exigir_jogo()
+        dica = jogo.dica(palavra)
+        if dica is None:
+            return {'dica': None}
+        if self.diario is not None:
+            self.diario.registrar_dica(self.id_sessao, jogo.dica_atual, dica.nivel)
+        return {
+            'dica': NIVEIS_DICA[dica.nivel],
+            'nivel': dica.nivel,
+            'celula': list(dica.celula),
+            'direcao': dica.direcao,
+            'palavra': dica.palavra,
+            'posicoes': [list(posicao) for posicao in dica.posicoes],
+        }
+
+    def registro(self):
+        """Retorna o registro da partida atual, para ser reproduzido depois"""
+        return registrar_partida(self._exigir_jogo(), self.backend)
+
+    def estado(self):
+        """Retorna o estado atual do jogo"""
+        jogo = self._exigir_jogo()
+        return {
+            'sessao': self.id_sessao,
+            'nivel': jogo.nivel,
+            'nome_nivel': jogo.get_nome_nivel(),
+            'semente': jogo.semente,
+            'tamanho': jogo.tamanho,
+            'grid': [jogo.ler_linha(linha) for linha in range(jogo.tamanho)],
+            'palavras': list(jogo.palavras),
+            'encontradas': sorted(jogo.lista_encontradas()),
+            'marcacoes': [list(posicao) for posicao in jogo.celulas_marcadas()],
+            'completo': jogo.jogo_completo(),
+        }
@@ -0,0 +1,189 @@
+import random
+from math import gcd
+
+# Direções de posicionamento: (passo na linha, passo na coluna)
+DIRECOES = {
+    'H': (0, 1),
+    'V': (1, 0),
+    'D': (1, 1),
+    'A': (-1, 1),
+}
+
+# Todas as 8 direções de leitura: as de posicionamento e seus reversos
+DIRECOES_TODAS = dict(DIRECOES)
+DIRECOES_TODAS.update({
+    'HR': (0, -1),
+    'VR': (-1, 0),
+    'DR': (-1, -1),
+    'AR': (1, -1),
+})
+
+
+def segmentos_validos(tamanho_palavra, linhas, colunas, direcoes):
+    """Calcula, por direção, o retângulo de posições iniciais em que a palavra cabe"""
+    segmentos = []
+    for direcao in direcoes:
+        dl, dc = DIRECOES[direcao]
+        extensao_l = dl * (tamanho_palavra - 1)
+        extensao_c = dc * (tamanho_palavra - 1)
+        l_min, l_max = max(0, -extensao_l), min(linhas - 1, linhas - 1 - extensao_l)
+        c_min, c_max = max(0, -extensao_c), min(colunas - 1, colunas - 1 - extensao_c)
+        if l_max >= l_min and c_max >= c_min:
+            segmentos.append((direcao, l_min, c_min, l_max - l_min + 1, c_max - c_min + 1))
+    return segmentos
+
+
+class _FluxoCandidatos:
+    """Percorre todas as posições iniciais válidas de uma palavra em ordem embaralhada"""
+
+    def __init__(self, tamanho_palavra, linhas, colunas, direcoes, rng):
+        self.segmentos = []
+        self.total = 0
+        for direcao, l_min, c_min, altura, largura in segmentos_validos(
+                tamanho_palavra, linhas, colunas, direcoes):
+            quantidade = altura * largura
+            self.segmentos.append((self.total, quantidade, direcao, l_min, c_min, largura))
+            self.total += quantidade
+
+        # Permutação afim (a * i + b) mod total: embaralha sem materializar a lista
+        self.passo = 1
+        self.deslocamento = 0
+        if self.total > 1:
+            self.passo = rng.randrange(1, self.total)
+            while gcd(self.passo, self.total) != 1:
+                self.passo = rng.randrange(1, self.total)
+            self.deslocamento = rng.randrange(self.total)
+        self.indice = 0
+
+    def proximo(self):
+        """Retorna o próximo candidato (linha, coluna, direcao) ou None se acabaram"""
+        if self.indice >= self.total:
+            return None
+        posicao = (self.passo * self.indice + self.deslocamento) % self.total
+        self.indice += 1
+        for inicio, quantidade, direcao, l_min, c_min, largura in self.segmentos:
+            if posicao < inicio + quantidade:
+                relativo = posicao - inicio
+                return (l_min + relativo // largura, c_min + relativo % largura, direcao)
+        return None
+
+
+class PosicionadorPalavras:
+    """Posiciona palavras no tabuleiro com busca por restrições e backtracking.
+
+    O tabuleiro precisa oferecer tamanho, grid (criado por grid.criar_grid),
+    pode_colocar_palavra, colocar_palavra e remover_palavra (como a classe
+    CacaPalavras).
+    """
+
+    def __init__(self, tabuleiro, rng=None, direcoes=None, opcoes_por_palavra=8,
+                 limite_candidatos=200000):
+        self.tabuleiro = tabuleiro
+        self.rng = rng if rng is not None else random
+        self.direcoes = list(direcoes) if direcoes is not None else list(DIRECOES)
+        self.opcoes_por_palavra = opcoes_por_palavra
+        # Orçamento de candidatos para o backtracking; depois dele, palavras sem espaço são descartadas
+        self.limite_candidatos = limite_candidatos
+        self.candidatos_avaliados = 0
+        self.retrocessos = 0
+        # Candidatos avaliados por palavra (somando as voltas do backtracking)
+        self.tentativas = {}
+
+    def _dimensoes(self):
+        linhas = getattr(self.tabuleiro, 'linhas', self.tabuleiro.tamanho)
+        colunas = getattr(self.tabuleiro, 'colunas', self.tabuleiro.tamanho)
+        return linhas, colunas
+
+    def _ordenar(self, palavras, linhas, colunas):
+        """Ordena as palavras da mais restrita (menos posições possíveis) para a menos"""
+        frequencia = {}
+        for palavra in palavras:
+            for letra in palavra:
+                frequencia[letra] = frequencia.get(letra, 0) + 1
+
+        def chave(palavra):
+            total = sum(altura * largura for _, _, _, altura, largura in
+                        segmentos_validos(len(palavra), linhas, colunas, self.direcoes))
+            raridade = sum(1.0 / frequencia[letra] for letra in palavra)
+            return (total, -len(palavra), -raridade)
+
+        return sorted(palavras, key=lambda palavra: (chave(palavra), palavra))
+
+    def _sobreposicoes(self, palavra, linha, coluna, direcao):
+        """Conta quantas letras da palavra já estão no grid na posição"""
+        dl, dc = DIRECOES[direcao]
+        segmento = self.tabuleiro.grid.ler(linha, coluna, dl, dc, len(palavra))
+        return sum(1 for atual, letra in zip(segmento, palavra) if atual == letra)
+
+    def _estourou_orcamento(self):
+        return (self.limite_candidatos is not None
+                and self.candidatos_avaliados >= self.limite_candidatos)
+
+    def _buscar_opcoes(self, palavra, fluxo):
+        """Coleta as próximas opções válidas, priorizando sobreposição de letras"""
+        opcoes = []
+        avaliados = self.candidatos_avaliados
+        while len(opcoes) < self.opcoes_por_palavra:
+            candidato = fluxo.proximo()
+            if candidato is None:
+                break
+            self.candidatos_avaliados += 1
+            if self.tabuleiro.pode_colocar_palavra(palavra, *candidato):
+                opcoes.append((self._sobreposicoes(palavra, *candidato), self.rng.random(), candidato))
+        self.tentativas[palavra] = self.tentativas.get(palavra, 0) + self.candidatos_avaliados - avaliados
+        # Ordena do pior para o melhor para consumir com pop()
+        opcoes.sort()
+        return [candidato for _, _, candidato in opcoes]
+
+    def posicionar(self, palavras, progresso=None):
+        """Posiciona as palavras e retorna a lista das que não couberam.
+
+        Se dado, progresso(etapa, feito, total) é chamado a cada palavra posicionada.
+        """
+        linhas, colunas = self._dimensoes()
+        nao_inseridas = []
+        pendentes = []
+        for palavra in self._ordenar(palavras, linhas, colunas):
+            if not segmentos_validos(len(palavra), linhas, colunas, self.direcoes):
+                nao_inseridas.append(palavra)
+            else:
+                pendentes.append(palavra)
+
+        # Cada quadro da pilha: [palavra, fluxo, opções restantes, células escritas]
+        pilha = []
+        indice = 0
+        while indice < len(pendentes):
+            if len(pilha) == indice:
+                palavra = pendentes[indice]
+                fluxo = _FluxoCandidatos(len(palavra), linhas, colunas, self.direcoes, self.rng)
+                pilha.append([palavra, fluxo, [], None])
+            quadro = pilha[indice]
+            palavra, fluxo, opcoes, escritas = quadro
+
+            if escritas is not None:
+                # Voltamos a esta palavra pelo backtracking: desfaz a posição atual
+                self.tabuleiro.remover_palavra(palavra, escritas)
+                quadro[3] = None
+
+            if not opcoes:
+                opcoes.extend(self._buscar_opcoes(palavra, fluxo))
+
+            if opcoes:
+                linha, coluna, direcao = opcoes.pop()
+                quadro[3] = self.tabuleiro.colocar_palavra(palavra, linha, coluna, direcao)
+                indice += 1
+                if progresso is not None:
+                    progresso('posicionando', indice, len(pendentes))
+                continue
+
+            # Sem opções para esta palavra
+            pilha.pop()
+            if indice == 0 or self._estourou_orcamento():
+                # Não há como retroceder (ou o orçamento acabou): desiste só desta palavra
+                nao_inseridas.append(palavra)
+                del pendentes[indice]
+                continue
+            self.retrocessos += 1
+            indice -= 1
+
+        return nao_inseridas
@@ -0,0 +1,231 @@
+from grid import LETRAS, VAZIO
+from posicionamento import DIRECOES_TODAS
+from solucionador import AhoCorasick
+
+# Frequência aproximada das letras no português (%), para um preenchimento mais natural
+FREQUENCIAS_PORTUGUES = {
+    'A': 14.63, 'B': 1.04, 'C': 3.88, 'D': 4.99, 'E': 12.57, 'F': 1.02, 'G': 1.30,
+    'H': 1.28, 'I': 6.18, 'J': 0.40, 'K': 0.02, 'L': 2.78, 'M': 4.74, 'N': 5.05,
+    'O': 10.73, 'P': 2.52, 'Q': 1.20, 'R': 6.53, 'S': 7.81, 'T': 4.34, 'U': 4.63,
+    'V': 1.67, 'W': 0.01, 'X': 0.21, 'Y': 0.01, 'Z': 0.47,
+}
+
+# Marca posições fora do grid ou ainda vazias; nunca casa com uma letra
+_FORA = '\0'
+
+
+class _IndiceJanelas:
+    """Índice das palavras pelas letras vizinhas de cada posição.
+
+    Cada letra k de uma palavra é indexada por uma janela de até 3 letras da
+    palavra que a contém, junto com o deslocamento dessa janela em relação a
+    k. Assim só as palavras cuja vizinhança já bate com o grid são conferidas
+    por inteiro.
+    """
+
+    def __init__(self, palavras):
+        self.janelas = {}
+        self.tamanhos_janela = set()
+        # Palavras de uma letra casam com qualquer célula que tenha essa letra
+        self.unitarias = set()
+        for palavra in set(palavras):
+            tamanho = len(palavra)
+            if tamanho == 1:
+                self.unitarias.add(palavra)
+                continue
+            largura = min(3, tamanho)
+            self.tamanhos_janela.add(largura)
+            for k in range(tamanho):
+                inicio = min(max(k - 1, 0), tamanho - largura)
+                chave = (inicio - k, palavra[inicio:inicio + largura])
+                self.janelas.setdefault(chave, []).append((palavra, k))
+
+        # Consultas possíveis: (deslocamento da janela, largura)
+        self.consultas = [(deslocamento, largura) for largura in sorted(self.tamanhos_janela)
+                          for deslocamento in range(1 - largura, 1)]
+
+
+class VerificadorCopias:
+    """Impede, já no posicionamento, que sobreposições completem cópias extras das palavras alvo.
+
+    Antes de aceitar uma posição, confere só as 8 linhas que passam por
+    cada célula que a palavra escreveria, com o mesmo índice de janelas do
+    preenchimento sem duplicatas. Cópias inteiras dentro da própria palavra
+    (uma palavra alvo que é trecho de outra) não têm como ser evitadas: ficam
+    para copias_internas.
+    """
+
+    def __init__(self, grid, palavras):
+        self.grid = grid
+        self.indice = _IndiceJanelas(palavras)
+
+    def forma_copia(self, palavra, linha, coluna, dl, dc):
+        """Verifica se escrever a palavra nessa posição completaria alguma cópia extra"""
+        grid = self.grid
+        linhas, colunas = grid.linhas, grid.colunas
+        anterior = grid.ler(linha, coluna, dl, dc, len(palavra))
+        # A palavra sobreposta ao grid, sem escrevê-la de fato
+        novas = {(linha + dl * i, coluna + dc * i): letra for i, letra in enumerate(palavra)}
+
+        def letra_em(l, c):
+            letra = novas.get((l, c))
+            if letra is not None:
+                return letra
+            if not (0 <= l < linhas and 0 <= c < colunas):
+                return _FORA
+            letra = grid.celula(l, c)
+            return _FORA if letra == VAZIO else letra
+
+        janelas = self.indice.janelas
+        consultas = self.indice.consultas
+        for i, letra in enumerate(palavra):
+            if anterior[i] != VAZIO:
+                # Célula já ocupada: o que passa por ela já estava no grid
+                continue
+            l, c = linha + dl * i, coluna + dc * i
+            for pl, pc in DIRECOES_TODAS.values():
+                faixa = ''.join(letra_em(l + pl * d, c + pc * d) for d in (-2, -1, 0, 1, 2))
+                if faixa[1] == _FORA and faixa[3] == _FORA:
+                    continue
+                for deslocamento, tamanho_janela in consultas:
+                    candidatas = janelas.get((deslocamento, faixa[2 + deslocamento:2 + deslocamento + tamanho_janela]))
+                    if not candidatas:
+                        continue
+                    for alvo, k in candidatas:
+                        tamanho = len(alvo)
+                        l0, c0 = l - pl * k, c - pc * k
+                        l1, c1 = l0 + pl * (tamanho - 1), c0 + pc * (tamanho - 1)
+                        if not (0 <= l0 < linhas and 0 <= l1 < linhas and 0 <= c0 < colunas and 0 <= c1 < colunas):
+                            continue
+                        celulas = [(l0 + pl * j, c0 + pc * j) for j in range(tamanho)]
+                        if all(celula in novas for celula in celulas):
+                            continue
+                        if all(letra_em(*celula) == alvo[j] for j, celula in enumerate(celulas)):
+                            return True
+        return False
+
+
+def palavras_contidas(palavras):
+    """Palavras que aparecem dentro de outra, em qualquer sentido.
+
+    Retorna palavra -> (a maior palavra que a contém, índice da primeira
+    célula dela nessa palavra, se está invertida). A única posição sem cópia
+    extra de uma palavra assim é dentro da que a contém.
+    """
+    palavras = list(dict.fromkeys(palavras))
+    automato = AhoCorasick(palavras)
+    contidas = {}
+    # As maiores primeiro: a primeira que contém uma palavra não está dentro de nenhuma outra
+    for palavra in sorted(palavras, key=len, reverse=True):
+        for texto, invertida in ((palavra, False), (palavra[::-1], True)):
+            for fim, indice in automato.buscar(texto):
+                alvo = automato.palavras[indice]
+                # Do mesmo tamanho, só uma palavra ao contrário: a maior das duas fica na menor
+                if alvo not in contidas and (len(alvo) < len(palavra) or alvo > palavra):
+                    inicio = len(palavra) - 1 - fim if invertida else fim - len(alvo) + 1
+                    contidas[alvo] = (palavra, inicio, invertida)
+    return contidas
+
+
+def copias_internas(posicoes_palavras):
+    """Conta as cópias extras de palavras alvo que ficam dentro de outra palavra posicionada"""
+    automato = AhoCorasick(posicoes_palavras)
+    achadas = set()
+    for palavra, posicoes in posicoes_palavras.items():
+        for texto, celulas in ((palavra, posicoes), (palavra[::-1], posicoes[::-1])):
+            for fim, indice in automato.buscar(texto):
+                alvo = automato.palavras[indice]
+                achadas.add((alvo, frozenset((celulas[fim - len(alvo) + 1], celulas[fim]))))
+    # A própria posição de cada palavra também é achada, e não conta
+    return sum(1 for alvo, pontas in achadas
+               if pontas != frozenset((posicoes_palavras[alvo][0], posicoes_palavras[alvo][-1])))
+
+
+def _ordem_letras(rng, letras, pesos):
+    """Sorteia a ordem de tentativa das letras, sem reposição e respeitando os pesos"""
+    if pesos is None:
+        ordem = list(letras)
+        rng.shuffle(ordem)
+        return ordem
+    chaves = [(rng.random() ** (1.0 / peso) if peso > 0 else 0.0, letra) for letra, peso in zip(letras, pesos)]
+    return [letra for _, letra in sorted(chaves, reverse=True)]
+
+
+def preencher_sem_duplicatas(grid, palavras, rng, letras=LETRAS, pesos=None):
+    """Preenche as células vazias sem formar nenhuma cópia nova das palavras alvo.
+
+    A cada célula preenchida, confere apenas as linhas das 8 direções que
+    passam por ela. Retorna quantas células não tinham nenhuma letra segura
+    (nesse caso a célula recebe a primeira letra sorteada).
+    """
+    indice = _IndiceJanelas(palavras)
+    if indice.unitarias:
+        permitidas = [(letra, peso) for letra, peso in zip(letras, pesos or [1] * len(letras))
+                      if letra not in indice.unitarias]
+        if permitidas:
+            letras = ''.join(letra for letra, _ in permitidas)
+            pesos = [peso for _, peso in permitidas] if pesos is not None else None
+
+    linhas, colunas = grid.linhas, grid.colunas
+    # Cópia local do grid com uma borda de 2 células fora do grid: o preenchimento
+    # lê muito, escreve uma célula por vez e assim dispensa checar limites dos vizinhos
+    largura = colunas + 4
+    celulas = [_FORA] * (largura * (linhas + 4))
+    texto = grid.texto()
+    for linha in range(linhas):
+        inicio = (linha + 2) * largura + 2
+        celulas[inicio:inicio + colunas] = [_FORA if letra == VAZIO else letra
+                                            for letra in texto[linha * colunas:(linha + 1) * colunas]]
+    janelas = indice.janelas
+    consultas = indice.consultas
+    saltos = [(dl, dc, dl * largura + dc) for dl, dc in DIRECOES_TODAS.values()]
+
+    def forma_palavra(linha, coluna, letra, vizinhos):
+        """Verifica se a letra na célula completa alguma palavra alvo"""
+        for dl, dc, salto, esquerda, direita in vizinhos:
+            faixa = esquerda + letra + direita
+            for deslocamento, tamanho_janela in consultas:
+                candidatas = janelas.get((deslocamento, faixa[2 + deslocamento:2 + deslocamento + tamanho_janela]))
+                if not candidatas:
+                    continue
+                for palavra, k in candidatas:
+                    tamanho = len(palavra)
+                    l0, c0 = linha - dl * k, coluna - dc * k
+                    l1, c1 = l0 + dl * (tamanho - 1), c0 + dc * (tamanho - 1)
+                    if not (0 <= l0 < linhas and 0 <= l1 < linhas and 0 <= c0 < colunas and 0 <= c1 < colunas):
+                        continue
+                    # Só a linha que passa pela célula nova é relida
+                    inicio = (l0 + 2) * largura + c0 + 2
+                    if all(celulas[inicio + salto * i] == palavra[i] for i in range(tamanho) if i != k):
+                        return True
+        return False
+
+    conflitos = 0
+    for linha in range(linhas):
+        for coluna in range(colunas):
+            posicao = (linha + 2) * largura + coluna + 2
+            if celulas[posicao] != _FORA:
+                continue
+            vizinhos = []
+            for dl, dc, salto in saltos:
+                antes_1 = celulas[posicao - salto]
+                depois_1 = celulas[posicao + salto]
+                if antes_1 != _FORA or depois_1 != _FORA:
+                    vizinhos.append((dl, dc, salto, celulas[posicao - 2 * salto] + antes_1,
+                                     depois_1 + celulas[posicao + 2 * salto]))
+
+            # Na maioria das vezes a primeira letra sorteada já serve
+            escolhida = rng.choices(letras, pesos)[0]
+            if vizinhos and forma_palavra(linha, coluna, escolhida, vizinhos):
+                for letra in _ordem_letras(rng, letras, pesos):
+                    if letra != escolhida and not forma_palavra(linha, coluna, letra, vizinhos):
+                        escolhida = letra
+                        break
+                else:
+                    conflitos += 1
+            celulas[posicao] = escolhida
+
+    for linha in range(linhas):
+        inicio = (linha + 2) * largura + 2
+        grid.escrever(''.join(celulas[inicio:inicio + colunas]), linha, 0, 0, 1)
+    return conflitos
@@ -0,0 +1,310 @@
+import os
+import re
+import shutil
+import sys
+import time
+import unicodedata
+
+# Sequências ANSI usadas no lugar de chamar 'clear'/'cls' num subprocesso
+LIMPAR_TELA = '\033[H\033[2J\033[3J'
+LIMPAR_ATE_FIM_LINHA = '\033[K'
+LIMPAR_ATE_FIM_TELA = '\033[J'
+
+# Largura visível do prefixo de cada linha do grid ("    " + " 12 " + "║")
+_LARGURA_PREFIXO = 9
+_LARGURA_CELULA = 3
+# Linhas reservadas abaixo do quadro para prompts e mensagens do turno
+_RESERVA_PROMPTS = 12
+# Estado de uma célula destacada por uma dica (as marcadas são True e as demais False)
+DICA = 'dica'
+_SEQUENCIA_ANSI = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
+
+if os.name == 'nt' and sys.stdout is not None and sys.stdout.isatty():
+    # Habilita o processamento de sequências ANSI no console do Windows (uma vez por processo)
+    os.system('')
+
+
+def largura_visivel(texto):
+    """Colunas que o texto ocupa no terminal: sem as sequências ANSI e com emojis ocupando duas"""
+    texto = _SEQUENCIA_ANSI.sub('', texto)
+    if texto.isascii():
+        return len(texto)
+    return sum(0 if unicodedata.combining(letra) else 2 if unicodedata.east_asian_width(letra) in 'WF' else 1
+               for letra in texto)
+
+
+def _posicionar(linha, coluna=1):
+    """Move o cursor para a linha e coluna (contadas a partir de 1)"""
+    return f'\033[{linha};{coluna}H'
+
+
+class Janela:
+    """Parte visível de um tabuleiro grande demais para a tela"""
+
+    def __init__(self, altura, largura, linha=0, coluna=0):
+        self.altura = altura
+        self.largura = largura
+        self.linha = linha
+        self.coluna = coluna
+
+    def limitar(self, linhas, colunas):
+        """Mantém a janela inteira dentro do tabuleiro"""
+        self.altura = max(1, min(self.altura, linhas))
+        self.largura = max(1, min(self.largura, colunas))
+        self.linha = max(0, min(self.linha, linhas - self.altura))
+        self.coluna = max(0, min(self.coluna, colunas - self.largura))
+
+    def mover(self, dl, dc, linhas, colunas):
+        """Desloca a janela em frações do seu tamanho (dl=1 desce meia janela)"""
+        self.linha += dl * max(1, self.altura // 2)
+        self.coluna += dc * max(1, self.largura // 2)
+        self.limitar(linhas, colunas)
+
+    def centralizar(self, linha, coluna, linhas, colunas):
+        """Pula para deixar a célula no meio da janela"""
+        self.linha = linha - self.altura // 2
+        self.coluna = coluna - self.largura // 2
+        self.limitar(linhas, colunas)
+
+
+class Quadro:
+    """Um quadro completo da tela, montado em memória antes de ir para o terminal"""
+
+    def __init__(self):
+        self.linhas = []
+        # Índice da linha do quadro -> tupla com o estado de cada célula do grid
+        self.celulas = {}
+
+    def texto(self, texto):
+        """Acrescenta um texto como print() faria (cada '\\n' quebra a linha)"""
+        self.linhas.extend(texto.split('\n'))
+
+
+class RenderizadorTerminal:
+    """Desenha quadros com uma única escrita e redesenha só o que mudou"""
+
+    def __init__(self, cores, saida=None):
+        self.cores = cores
+        self.saida = saida if saida is not None else sys.stdout
+        self.interativo = hasattr(self.saida, 'isatty') and self.saida.isatty()
+        self.anterior = None
+        # Linhas de tela escritas abaixo do quadro (prompts, erros, mensagens) desde o último desenho
+        self.linhas_escritas = 0
+        # Strings ANSI prontas de cada célula, por (letra, estado)
+        self._celulas = {}
+
+    def celula(self, letra, marcada):
+        """Retorna a string ANSI de uma célula, construída uma única vez"""
+        chave = (letra, marcada)
+        texto = self._celulas.get(chave)
+        if texto is None:
+            c = self.cores
+            if marcada == DICA:
+                texto = f"{c.BG_YELLOW}{c.BOLD}{c.WHITE} {letra} {c.RESET}"
+            elif marcada:
+                texto = f"{c.BG_GREEN}{c.BOLD}{c.WHITE} {letra} {c.RESET}"
+            else:
+                texto = f" {c.WHITE}{letra}{c.RESET} "
+            self._celulas[chave] = texto
+        return texto
+
+    def colunas_visiveis(self):
+        """Quantas colunas do grid cabem na largura do terminal"""
+        return max(1, (shutil.get_terminal_size().columns - _LARGURA_PREFIXO - 1) // _LARGURA_CELULA)
+
+    def linhas_visiveis(self, linhas_fixas):
+        """Quantas linhas do grid cabem na tela junto com o resto do quadro e os prompts"""
+        return max(3, shutil.get_terminal_size().lines - linhas_fixas - _RESERVA_PROMPTS)
+
+    def adicionar_grid(self, quadro, jogo):
+        """Acrescenta o tabuleiro ao quadro, guardando o estado das células para o diff"""
+        if getattr(jogo, 'janela', None) is not None:
+            self.adicionar_janela(quadro, jogo, jogo.janela)
+            return
+        c = self.cores
+        tamanho = jogo.tamanho
+        quadro.texto(f"\n{c.RED}{c.BOLD}    ╔═══════════════ TABULEIRO ═══════════════╗{c.RESET}\n")
+
+        # Cabeçalho com números das colunas
+        quadro.linhas.append(f"    {c.YELLOW}    " + ''.join(f" {i:2}" for i in range(tamanho)) + c.RESET)
+        quadro.linhas.append(f"    {c.RED}    ╔{'═══' * tamanho}═╗{c.RESET}")
+
+        marcacoes = jogo.marcacoes
+        destaques = jogo.destaques_dica
+        for i in range(tamanho):
+            estados = tuple((letra, (i, j) in marcacoes or ((i, j) in destaques and DICA))
+                            for j, letra in enumerate(jogo.grid.ler_linha(i)))
+            quadro.celulas[len(quadro.linhas)] = estados
+            quadro.linhas.append(f"    {c.YELLOW} {i:2} {c.RED}║{c.RESET}"
+                                 + ''.join(self.celula(letra, marcada) for letra, marcada in estados)
+                                 + f"{c.RED}║{c.RESET}")
+
+        quadro.linhas.append(f"    {c.RED}    ╚{'═══' * tamanho}═╝{c.RESET}")
+
+    def adicionar_janela(self, quadro, jogo, janela):
+        """Acrescenta só a parte visível do tabuleiro; o custo depende da janela, não do grid"""
+        c = self.cores
+        janela.limitar(jogo.tamanho, jogo.tamanho)
+        linhas = range(janela.linha, janela.linha + janela.altura)
+        colunas = range(janela.coluna, janela.coluna + janela.largura)
+        quadro.texto(f"\n{c.RED}{c.BOLD}    ╔═══════════════ TABULEIRO ═══════════════╗{c.RESET}")
+        quadro.texto(f"    {c.YELLOW}Linhas {linhas[0]}-{linhas[-1]} e colunas {colunas[0]}-{colunas[-1]} "
+                     f"de {jogo.tamanho}x{jogo.tamanho}  {c.CYAN}(w/a/s/d move, 'ir linha,coluna' pula){c.RESET}\n")
+
+        # Cada coluna só tem espaço para 2 dígitos: o número completo está na linha acima
+        quadro.linhas.append(f"    {c.YELLOW}    " + ''.join(f" {j % 100:2}" for j in colunas) + c.RESET)
+        quadro.linhas.append(f"    {c.RED}    ╔{'═══' * len(colunas)}═╗{c.RESET}")
+
+        marcacoes = jogo.marcacoes
+        destaques = jogo.destaques_dica
+        for i in linhas:
+            texto = jogo.grid.ler(i, janela.coluna, 0, 1, janela.largura)
+            estados = tuple((letra, (i, j) in marcacoes or ((i, j) in destaques and DICA))
+                            for j, letra in zip(colunas, texto))
+            quadro.celulas[len(quadro.linhas)] = estados
+            quadro.linhas.append(f"    {c.YELLOW}{i % 10000:4}{c.RED}║{c.RESET}"
+                                 + ''.join(self.celula(letra, marcada) for letra, marcada in estados)
+                                 + f"{c.RED}║{c.RESET}")
+
+        quadro.linhas.append(f"    {c.RED}    ╚{'═══' * len(colunas)}═╝{c.RESET}")
+
+    def invalidar(self):
+        """Esquece o quadro anterior (a tela foi limpa ou alterada por fora)"""
+        self.anterior = None
+
+    def contar_linhas(self, texto):
+        """Registra um texto escrito abaixo do quadro, contando as quebras de linha do terminal"""
+        colunas = shutil.get_terminal_size().columns
+        for linha in texto.split('\n'):
+            self.linhas_escritas += max(1, -(-largura_visivel(linha) // colunas))
+
+    def limpar(self):
+        """Limpa a tela com sequências ANSI"""
+        self.invalidar()
+        if self.interativo:
+            self.saida.write(LIMPAR_TELA)
+            self.saida.flush()
+
+    def _cabe_na_tela(self, quadro):
+        """O diff usa posições absolutas, então o quadro não pode rolar a tela nem quebrar linhas"""
+        tela = shutil.get_terminal_size()
+        if len(quadro.linhas) >= tela.lines:
+            return False
+        for indice, linha in enumerate(quadro.linhas):
+            estados = quadro.celulas.get(indice)
+            if estados is not None:
+                # Linha do grid: a largura sai da conta, sem varrer os códigos de cor de cada célula
+                largura = _LARGURA_PREFIXO + len(estados) * _LARGURA_CELULA + 1
+            else:
+                largura = largura_visivel(linha)
+            if largura > tela.columns:
+                return False
+        return True
+
+    def _rolou(self, anterior):
+        """Se o que foi escrito abaixo do quadro anterior fez a tela rolar, as linhas dele mudaram de lugar"""
+        return len(anterior.linhas) + self.linhas_escritas >= shutil.get_terminal_size().lines
+
+    def desenhar(self, quadro):
+        """Escreve o quadro no terminal, atualizando só as diferenças quando possível"""
+        anterior = self.anterior
+        self.anterior = quadro
+        rolou = anterior is not None and self._rolou(anterior)
+        self.linhas_escritas = 0
+
+        if not self.interativo:
+            self.saida.write('\n'.join(quadro.linhas) + '\n')
+            self.saida.flush()
+            return
+
+        if (anterior is None or len(anterior.linhas) != len(quadro.linhas)
+                or anterior.celulas.keys() != quadro.celulas.keys() or rolou or not self._cabe_na_tela(quadro)):
+            self.saida.write(LIMPAR_TELA + '\n'.join(quadro.linhas) + '\n')
+            self.saida.flush()
+            return
+
+        partes = []
+        for indice, linha in enumerate(quadro.linhas):
+            if linha == anterior.linhas[indice]:
+                continue
+            estados = quadro.celulas.get(indice)
+            estados_anteriores = anterior.celulas.get(indice)
+            if estados is not None and len(estados) == len(estados_anteriores):
+                # Linha do grid: reescreve apenas as células alteradas
+                for j, (estado, estado_anterior) in enumerate(zip(estados, estados_anteriores)):
+                    if estado != estado_anterior:
+                        partes.append(_posicionar(indice + 1, _LARGURA_PREFIXO + 1 + j * _LARGURA_CELULA))
+                        partes.append(self.celula(*estado))
+            else:
+                partes.append(_posicionar(indice + 1) + linha + LIMPAR_ATE_FIM_LINHA)
+
+        # Volta para logo abaixo do quadro e apaga os prompts do turno anterior
+        partes.append(_posicionar(len(quadro.linhas) + 1) + LIMPAR_ATE_FIM_TELA)
+        self.saida.write(''.join(partes))
+        self.saida.flush()
+
+
+class IndicadorProgresso:
+    """Spinner alimentado pelos eventos reais do gerador (nada fora de um terminal).
+
+    Pode ser passado como progresso para gerar_caca_palavras. Eventos vindos
+    de outra thread só são guardados; o desenho acontece em aguardar() ou,
+    com desenhar_direto, dentro da própria chamada.
+    """
+
+    FRAMES = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
+    ETAPAS = {
+        'posicionando': 'posicionando palavras',
+        'preenchendo': 'preenchendo o grid',
+        'pronto': 'pronto',
+    }
+
+    def __init__(self, cores, saida=None, desenhar_direto=False, intervalo=0.05):
+        self.cores = cores
+        self.saida = saida if saida is not None else sys.stdout
+        self.ativo = hasattr(self.saida, 'isatty') and self.saida.isatty()
+        self.desenhar_direto = desenhar_direto
+        self.intervalo = intervalo
+        self.evento = ('posicionando', 0, 0)
+        self.quadro = 0
+        self.ultimo_desenho = 0.0
+        self.desenhou = False
+
+    def __call__(self, etapa, feito, total):
+        self.evento = (etapa, feito, total)
+        if self.desenhar_direto:
+            agora = time.perf_counter()
+            if agora - self.ultimo_desenho >= self.intervalo:
+                self.desenhar()
+
+    def desenhar(self):
+        """Redesenha a linha do spinner com o último evento recebido"""
+        if not self.ativo:
+            return
+        etapa, feito, total = self.evento
+        c = self.cores
+        contagem = f" {feito}/{total}" if total else ""
+        inicio = "\r" if self.desenhou else "\n"
+        self.saida.write(f"{inicio}    {c.RED}Gerando caça-palavras {self.FRAMES[self.quadro % len(self.FRAMES)]} "
+                         f"{self.ETAPAS.get(etapa, etapa)}{contagem}{c.RESET}{LIMPAR_ATE_FIM_LINHA}")
+        self.saida.flush()
+        self.quadro += 1
+        self.ultimo_desenho = time.perf_counter()
+        self.desenhou = True
+
+    def finalizar(self):
+        """Fecha a linha do spinner, se ele chegou a aparecer"""
+        if self.ativo and self.desenhou:
+            self.saida.write(f"\r    {self.cores.RED}Gerando caça-palavras ✓{self.cores.RESET}"
+                             f"{LIMPAR_ATE_FIM_LINHA}\n\n")
+            self.saida.flush()
+        self.desenhou = False
+
+    def aguardar(self, futuro):
+        """Espera uma geração em segundo plano, mostrando o progresso se ela ainda não acabou"""
+        if self.ativo:
+            while not futuro.done():
+                self.desenhar()
+                time.sleep(self.intervalo)
+            self.finalizar()
+        return futuro.result()
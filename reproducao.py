@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from main import CacaPalavras
+from metricas import mapear_em_processos
+
+# Resultado de verificar_selecao <-> uma letra no registro compacto
+CODIGOS_RESULTADO = {
+    'CORRETA': 'C',
+    'JÁ_ENCONTRADA': 'J',
+    'INVALIDA': 'I',
+    'INCORRETA': 'X',
+}
+RESULTADOS_POR_CODIGO = {codigo: resultado for resultado, codigo in CODIGOS_RESULTADO.items()}
+
+
+def compactar_jogadas(jogadas):
+    """[(l1, c1, l2, c2, resultado), ...] -> 'l1,c1,l2,c2,R;...'"""
+    return ';'.join(f'{l1},{c1},{l2},{c2},{CODIGOS_RESULTADO[resultado]}'
+                    for l1, c1, l2, c2, resultado in jogadas)
+
+
+def descompactar_jogadas(texto):
+    """Desfaz compactar_jogadas"""
+    jogadas = []
+    for jogada in texto.split(';') if texto else ():
+        l1, c1, l2, c2, codigo = jogada.split(',')
+        jogadas.append((int(l1), int(c1), int(l2), int(c2), RESULTADOS_POR_CODIGO[codigo]))
+    return jogadas
+
+
+def registrar_partida(jogo, backend=None):
+    """Tudo o que é preciso para refazer a partida: o puzzle (pela semente), o backend e as jogadas"""
+    registro = {
+        'nivel': jogo.nivel,
+        'semente': jogo.semente,
+        'tamanho': jogo.tamanho,
+        'palavras': jogo.palavras_solicitadas,
+        # Uma SessaoJogo não sabe o backend: quem a criou informa
+        'backend': backend or getattr(jogo, 'backend', 'bytes'),
+        'jogadas': compactar_jogadas(jogo.jogadas),
+    }
+    # Uma SessaoJogo não tem opções de preenchimento: foi gerada com as padrão
+    if getattr(jogo, 'preenchimento_unico', False):
+        registro['sem_duplicatas'] = True
+    if getattr(jogo, 'frequencias_letras', None):
+        registro['frequencias'] = jogo.frequencias_letras
+    return registro
+
+
+def recriar_jogo(registro, backend=None):
+    """Gera de novo o puzzle de um registro, com o backend dele se nenhum for dado"""
+    jogo = CacaPalavras(backend=backend or registro.get('backend', 'bytes'))
+    jogo.reiniciar_jogo(registro['nivel'], palavras=registro['palavras'], tamanho=registro['tamanho'],
+                        semente=registro['semente'])
+    jogo.preenchimento_unico = registro.get('sem_duplicatas', False)
+    jogo.frequencias_letras = registro.get('frequencias')
+    jogo.gerar_caca_palavras()
+    return jogo
+
+
+def reproduzir(registro, backend=None):
+    """Refaz as jogadas de um registro e compara cada resultado com o gravado.
+
+    Retorna quantas jogadas foram refeitas e a lista de divergências
+    (índice da jogada, resultado gravado, resultado obtido).
+    """
+    jogo = recriar_jogo(registro, backend)
+    divergencias = []
+    jogadas = descompactar_jogadas(registro['jogadas'])
+    for indice, (l1, c1, l2, c2, esperado) in enumerate(jogadas):
+        obtido = jogo.verificar_selecao((l1, c1), (l2, c2))[0]
+        if obtido != esperado:
+            divergencias.append((indice, esperado, obtido))
+    return len(jogadas), divergencias
+
+
+def _reproduzir_tarefa(tarefa):
+    indice, registro, backend = tarefa
+    jogadas, divergencias = reproduzir(registro, backend)
+    return indice, jogadas, divergencias
+
+
+def reproduzir_lote(registros, processos=None, backend=None):
+    """Reproduz vários registros em paralelo e resume vazão e divergências"""
+    tarefas = [(indice, registro, backend) for indice, registro in enumerate(registros)]
+    processos = processos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    if processos == 1 or len(tarefas) <= 1:
+        resultados = [_reproduzir_tarefa(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(mapear_em_processos(executor, _reproduzir_tarefa, tarefas,
+                                                  chunksize=max(1, len(tarefas) // (processos * 8))))
+    duracao = time.perf_counter() - inicio
+
+    divergentes = {indice: divergencias for indice, _, divergencias in resultados if divergencias}
+    return {
+        'partidas': len(tarefas),
+        'jogadas': sum(jogadas for _, jogadas, _ in resultados),
+        'partidas_divergentes': len(divergentes),
+        'divergencias': {str(indice): divergencias for indice, divergencias in sorted(divergentes.items())[:20]},
+        'segundos': round(duracao, 3),
+        'partidas_por_segundo': round(len(tarefas) / duracao, 1) if duracao else None,
+    }
+
+
+def simular_partida(nivel, semente, taxa_erros=0.3):
+    """Joga uma partida sozinho (com erros e repetições) e retorna o registro dela"""
+    jogo = CacaPalavras()
+    jogo.reiniciar_jogo(nivel, semente=semente)
+    jogo.gerar_caca_palavras()
+    # O jogador simulado tem seu próprio gerador, para não mexer no do jogo
+    rng = random.Random(semente ^ 0x5EED)
+    pendentes = list(jogo.posicoes_palavras.items())
+    rng.shuffle(pendentes)
+    while pendentes:
+        if rng.random() < taxa_erros:
+            inicio = (rng.randrange(jogo.tamanho), rng.randrange(jogo.tamanho))
+            fim = (rng.randrange(jogo.tamanho), rng.randrange(jogo.tamanho))
+            jogo.verificar_selecao(inicio, fim)
+            continue
+        palavra, posicoes = pendentes.pop() if rng.random() < 0.9 else rng.choice(pendentes)
+        if rng.random() < 0.5:
+            jogo.verificar_selecao(posicoes[0], posicoes[-1])
+        else:
+            jogo.verificar_selecao(posicoes[-1], posicoes[0])
+    return registrar_partida(jogo)
+
+
+def main_reproduzir(argv=None):
+    """Linha de comando do reprodutor de partidas"""
+    parser = argparse.ArgumentParser(
+        prog='main.py reproduzir',
+        description='Reproduz registros de partidas (JSONL) sem terminal e confere os resultados.')
+    parser.add_argument('arquivo', nargs='?', help='registros a reproduzir, um JSON por linha')
+    parser.add_argument('--simular', type=int, metavar='N',
+                        help='em vez de reproduzir, joga N partidas simuladas e grava os registros')
+    parser.add_argument('--nivel', type=int, default=1, help='nível das partidas simuladas')
+    parser.add_argument('--semente', type=int, default=0, help='semente base das partidas simuladas')
+    parser.add_argument('--processos', type=int, help='processos de trabalho (padrão: núcleos da CPU)')
+    parser.add_argument('--backend', help='backend do grid (bytes, numpy ou esparso; padrão: o de cada registro)')
+    parser.add_argument('-o', '--saida', help='arquivo de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    saida = open(args.saida, 'w', encoding='utf-8') if args.saida else sys.stdout
+    try:
+        if args.simular:
+            gerador_sementes = random.Random(args.semente)
+            for _ in range(args.simular):
+                registro = simular_partida(args.nivel, gerador_sementes.getrandbits(63))
+                saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            return 0
+
+        if not args.arquivo:
+            parser.error('informe o arquivo de registros ou use --simular')
+        with open(args.arquivo, encoding='utf-8') as arquivo:
+            registros = [json.loads(linha) for linha in arquivo if linha.strip()]
+        resumo = reproduzir_lote(registros, args.processos, args.backend)
+        saida.write(json.dumps(resumo, ensure_ascii=False) + '\n')
+        return 1 if resumo['partidas_divergentes'] else 0
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import uuid
+
+from diario import DiarioSessoes
+from metricas import METRICAS
+from motor import MotorJogo
+
+# Tamanho máximo de uma linha do protocolo (limite do StreamReader)
+LIMITE_LINHA = 1 << 16
+
+AJUDA = ("Comandos: NOVO [nivel] [semente] | RETOMAR sessao | SEL linha,coluna linha,coluna | "
+         "DICA [palavra] | ESTADO | REGISTRO | PLACAR | METRICAS | AJUDA | SAIR")
+
+
+def _ler_coordenadas(partes):
+    """Aceita 'SEL 3,5 3,9' ou 'SEL 3 5 3 9'"""
+    numeros = [int(numero) for parte in partes for numero in parte.split(',') if numero]
+    if len(numeros) != 4:
+        raise ValueError("Formato inválido! Use: SEL linha,coluna linha,coluna")
+    return (numeros[0], numeros[1]), (numeros[2], numeros[3])
+
+
+def processar_comando(motor, linha):
+    """Executa uma linha do protocolo e retorna (resposta, encerrar)"""
+    partes = linha.split()
+    if not partes:
+        return None, False
+    comando = partes[0].upper()
+    argumentos = partes[1:]
+
+    if comando == 'NOVO':
+        nivel = int(argumentos[0]) if argumentos else 1
+        semente = int(argumentos[1]) if len(argumentos) > 1 else None
+        return motor.novo_jogo(nivel, semente), False
+    if comando == 'RETOMAR':
+        if not argumentos:
+            raise ValueError("Informe a sessão: RETOMAR sessao")
+        return motor.retomar(argumentos[0]), False
+    if comando == 'PLACAR':
+        if motor.diario is None:
+            raise ValueError("O servidor não está guardando sessões (use --diario)")
+        return {'placar': motor.diario.placar()}, False
+    if comando == 'SEL':
+        return motor.enviar_selecao(*_ler_coordenadas(argumentos)), False
+    if comando == 'DICA':
+        return motor.dica(argumentos[0] if argumentos else None), False
+    if comando == 'ESTADO':
+        return motor.estado(), False
+    if comando == 'REGISTRO':
+        # O mesmo formato que main.py reproduzir lê (um por linha)
+        return {'registro': motor.registro()}, False
+    if comando == 'METRICAS':
+        return {'ativas': METRICAS.ativo, 'metricas': METRICAS.instantaneo()}, False
+    if comando == 'AJUDA':
+        return {'ajuda': AJUDA}, False
+    if comando == 'SAIR':
+        return {'tchau': True}, True
+    raise ValueError(f"Comando desconhecido: {partes[0]}. {AJUDA}")
+
+
+class ServidorJogos:
+    """Servidor asyncio: uma sessão de jogo por conexão, todas no mesmo processo"""
+
+    def __init__(self, backend='bytes', diario=None):
+        self.backend = backend
+        self.diario = diario
+        self.sessoes_ativas = 0
+        self.sessoes_total = 0
+
+    async def atender(self, leitor, escritor):
+        """Atende uma conexão, uma linha de comando por vez, respondendo em JSON"""
+        motor = MotorJogo(backend=self.backend, diario=self.diario, id_sessao=uuid.uuid4().hex[:12])
+        self.sessoes_ativas += 1
+        self.sessoes_total += 1
+        try:
+            while True:
+                try:
+                    dados = await leitor.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # Linha maior que o limite: o resto dela não dá para separar do próximo comando
+                    erro = {'ok': False, 'erro': f"Linha maior que {LIMITE_LINHA} bytes; conexão encerrada"}
+                    escritor.write(json.dumps(erro, ensure_ascii=False).encode('utf-8') + b'\n')
+                    await escritor.drain()
+                    break
+                if not dados:
+                    break
+                try:
+                    with METRICAS.cronometro('comando_segundos', 'Tempo de atender um comando do protocolo'):
+                        resposta, encerrar = processar_comando(motor, dados.decode('utf-8', 'replace'))
+                    if resposta is None:
+                        continue
+                    resposta = dict(resposta, ok=True)
+                except ValueError as erro:
+                    resposta, encerrar = {'ok': False, 'erro': str(erro)}, False
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode('utf-8') + b'\n')
+                await escritor.drain()
+                if encerrar:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessoes_ativas -= 1
+            escritor.close()
+
+    async def servir(self, host='127.0.0.1', porta=5050):
+        """Escuta conexões até ser interrompido"""
+        servidor = await asyncio.start_server(self.atender, host, porta, limit=LIMITE_LINHA, backlog=4096)
+        enderecos = ', '.join(str(socket.getsockname()) for socket in servidor.sockets)
+        print(f"Servidor do caça-palavras ouvindo em {enderecos}", flush=True)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main_servidor(argv=None):
+    """Linha de comando do servidor"""
+    parser = argparse.ArgumentParser(prog='main.py servidor',
+                                     description='Servidor TCP do caça-palavras (protocolo de linhas).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=5050)
+    parser.add_argument('--backend', default='bytes', help='backend do grid (bytes, numpy ou esparso)')
+    parser.add_argument('--diario', help='salva as sessões e pontuações neste arquivo (permite RETOMAR)')
+    args = parser.parse_args(argv)
+    diario = DiarioSessoes(args.diario) if args.diario else None
+    try:
+        asyncio.run(ServidorJogos(backend=args.backend, diario=diario).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if diario is not None:
+            diario.fechar()
+    return 0
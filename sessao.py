@@ -0,0 +1,226 @@
+from array import array
+from bisect import bisect_left
+
+from diario import posicoes_entre
+from dicas import NIVEL_MAXIMO, montar_dica
+from grid import CODIFICACAO
+from main import NOMES_NIVEIS, PALAVRAS_POR_NIVEL
+
+# Resultados de verificar_selecao, na ordem dos códigos guardados nas jogadas
+RESULTADOS = ('CORRETA', 'JÁ_ENCONTRADA', 'INVALIDA', 'INCORRETA')
+_CODIGO_RESULTADO = {resultado: codigo for codigo, resultado in enumerate(RESULTADOS)}
+
+# Listas de palavras dos níveis, para reaproveitar a mesma tupla em todas as sessões
+_PALAVRAS_COMPARTILHADAS = {config['palavras']: config['palavras'] for config in PALAVRAS_POR_NIVEL.values()}
+# E, para cada uma, o índice de cada palavra, também compartilhado
+_INDICES_COMPARTILHADOS = {palavras: {palavra: i for i, palavra in enumerate(palavras)}
+                           for palavras in _PALAVRAS_COMPARTILHADAS}
+
+
+class SessaoJogo:
+    """Estado enxuto de uma partida já gerada, para hospedar milhares por processo.
+
+    Guarda o grid como bytes, as pontas de cada palavra num array de índices
+    de célula (e, ordenadas, num array de chaves para busca binária), as
+    palavras encontradas e as células marcadas como bits de inteiros, e
+    reaproveita as tuplas de palavras dos níveis. Responde como
+    CacaPalavras.verificar_selecao.
+    """
+
+    __slots__ = ('nivel', 'semente', 'tamanho', 'grid', 'palavras', 'extremos',
+                 'encontradas', 'marcacoes', '_solicitadas', '_jogadas', '_dicas', '_dica_atual',
+                 '_chaves', '_ordem', '_indices')
+
+    def __init__(self, nivel, semente, tamanho, grid, palavras, extremos, solicitadas=None):
+        self.nivel = nivel
+        self.semente = semente
+        self.tamanho = tamanho
+        self.grid = grid
+        palavras = tuple(palavras)
+        self.palavras = _PALAVRAS_COMPARTILHADAS.get(palavras, palavras)
+        # Para a palavra i: extremos[2i] é a célula inicial e extremos[2i + 1] a final
+        self.extremos = extremos
+        # Chave (menor ponta * células + maior ponta) de cada palavra, em ordem, e o índice da palavra dela
+        celulas = tamanho * tamanho
+        pares = sorted((min(a, b) * celulas + max(a, b), i)
+                       for i, (a, b) in enumerate(zip(extremos[::2], extremos[1::2])))
+        self._chaves = array('Q', [chave for chave, _ in pares])
+        self._ordem = array('H' if len(self.palavras) <= 0xFFFF else 'I', [i for _, i in pares])
+        # palavra -> índice: o compartilhado das listas dos níveis ou, para as outras, montado no primeiro uso
+        self._indices = _INDICES_COMPARTILHADOS.get(self.palavras)
+        self.encontradas = 0
+        self.marcacoes = 0
+        # Só guardadas quando diferem das palavras (alguma não coube no grid)
+        self._solicitadas = None if solicitadas is None or tuple(solicitadas) == palavras else tuple(solicitadas)
+        # l1, c1, l2, c2 e o código do resultado de cada seleção
+        self._jogadas = array('i')
+        # Nível de dica já dado a cada palavra (criado no primeiro pedido) e a palavra da última dica
+        self._dicas = None
+        self._dica_atual = -1
+
+    @classmethod
+    def de_jogo(cls, jogo):
+        """Cria a sessão a partir de um CacaPalavras já gerado"""
+        tamanho = jogo.tamanho
+        extremos = array('I' if tamanho * tamanho > 0xFFFF else 'H')
+        for palavra in jogo.palavras:
+            (l1, c1), (l2, c2) = jogo.posicoes_palavras[palavra][0], jogo.posicoes_palavras[palavra][-1]
+            extremos.append(l1 * tamanho + c1)
+            extremos.append(l2 * tamanho + c2)
+        grid = ''.join(jogo.grid.ler_linha(linha) for linha in range(tamanho)).encode(CODIFICACAO)
+        return cls(jogo.nivel, jogo.semente, tamanho, grid, jogo.palavras, extremos, jogo.palavras_solicitadas)
+
+    @classmethod
+    def de_estado(cls, estado):
+        """Recria a sessão a partir de um retrato do diário (diario.estado_do_jogo)"""
+        tamanho = estado['tamanho']
+        extremos = array('I' if tamanho * tamanho > 0xFFFF else 'H')
+        for l1, c1, l2, c2 in estado['extremos']:
+            extremos.append(l1 * tamanho + c1)
+            extremos.append(l2 * tamanho + c2)
+        sessao = cls(estado['nivel'], estado['semente'], tamanho, ''.join(estado['grid']).encode(CODIFICACAO),
+                     estado['palavras'], extremos, estado['solicitadas'])
+        for palavra in estado['encontradas']:
+            indice = sessao.indice_palavra(palavra)
+            sessao.encontradas |= 1 << indice
+            for linha, coluna in posicoes_entre(*estado['extremos'][indice]):
+                sessao.marcacoes |= 1 << (linha * tamanho + coluna)
+        if any(estado.get('dicas', ())):
+            sessao._dicas = bytearray(estado['dicas'])
+        sessao._dica_atual = estado.get('dica_atual', -1)
+        return sessao
+
+    @property
+    def palavras_solicitadas(self):
+        """A lista pedida ao gerar, como em CacaPalavras"""
+        return list(self._solicitadas if self._solicitadas is not None else self.palavras)
+
+    @property
+    def jogadas(self):
+        """As seleções no mesmo formato de CacaPalavras.jogadas"""
+        dados = self._jogadas
+        return [(dados[i], dados[i + 1], dados[i + 2], dados[i + 3], RESULTADOS[dados[i + 4]])
+                for i in range(0, len(dados), 5)]
+
+    @property
+    def niveis_dica(self):
+        """Nível de dica já dado a cada palavra, na ordem da lista"""
+        return list(self._dicas) if self._dicas is not None else [0] * len(self.palavras)
+
+    @property
+    def dica_atual(self):
+        """Índice da palavra que está recebendo dicas (-1 se nenhuma)"""
+        return self._dica_atual
+
+    @property
+    def dicas_dadas(self):
+        """Quantos níveis de dica já foram dados, somando todas as palavras"""
+        return sum(self._dicas) if self._dicas is not None else 0
+
+    def indice_palavra(self, palavra):
+        """Posição da palavra na lista, ou -1 se ela não está no jogo"""
+        if self._indices is None:
+            self._indices = {palavra: i for i, palavra in enumerate(self.palavras)}
+        return self._indices.get(palavra, -1)
+
+    def get_nome_nivel(self):
+        """Retorna o nome do nível atual"""
+        return NOMES_NIVEIS.get(self.nivel, "DESCONHECIDO")
+
+    def ler_linha(self, linha):
+        """Lê uma linha do grid como texto"""
+        inicio = linha * self.tamanho
+        return self.grid[inicio:inicio + self.tamanho].decode(CODIFICACAO)
+
+    def lista_encontradas(self):
+        """As palavras já encontradas, na ordem da lista"""
+        return [palavra for i, palavra in enumerate(self.palavras) if self.encontradas >> i & 1]
+
+    def celulas_marcadas(self):
+        """As células marcadas como (linha, coluna), em ordem"""
+        marcadas = []
+        bits = self.marcacoes
+        while bits:
+            menor = bits & -bits
+            marcadas.append(divmod(menor.bit_length() - 1, self.tamanho))
+            bits ^= menor
+        return marcadas
+
+    def jogo_completo(self):
+        """Verifica se todas as palavras foram encontradas"""
+        return self.encontradas == (1 << len(self.palavras)) - 1
+
+    def dica(self, palavra=None):
+        """Próxima dica, como CacaPalavras.pedir_dica (sem a escolha por letra)"""
+        pendentes = ~self.encontradas & ((1 << len(self.palavras)) - 1)
+        if palavra is not None:
+            indice = self.indice_palavra(palavra.upper())
+        elif self._dica_atual >= 0 and pendentes >> self._dica_atual & 1:
+            indice = self._dica_atual
+        else:
+            # A primeira pendente é o bit 0 mais baixo de encontradas
+            indice = (pendentes & -pendentes).bit_length() - 1
+        if indice < 0 or not pendentes >> indice & 1:
+            return None
+        if self._dicas is None:
+            self._dicas = bytearray(len(self.palavras))
+        nivel = self._dicas[indice] = min(self._dicas[indice] + 1, NIVEL_MAXIMO)
+        self._dica_atual = indice
+        inicio = divmod(self.extremos[2 * indice], self.tamanho)
+        fim = divmod(self.extremos[2 * indice + 1], self.tamanho)
+        return montar_dica(nivel, self.palavras[indice], inicio, fim)
+
+    def verificar_selecao(self, coord_inicial, coord_final):
+        """Mesmas respostas de CacaPalavras.verificar_selecao"""
+        resposta = self._avaliar_selecao(coord_inicial, coord_final)
+        self._jogadas.extend((coord_inicial[0], coord_inicial[1], coord_final[0], coord_final[1],
+                              _CODIGO_RESULTADO[resposta[0]]))
+        return resposta
+
+    def _avaliar_selecao(self, coord_inicial, coord_final):
+        (l1, c1), (l2, c2) = coord_inicial, coord_final
+        tamanho = self.tamanho
+        if not (0 <= l1 < tamanho and 0 <= c1 < tamanho and 0 <= l2 < tamanho and 0 <= c2 < tamanho):
+            return "INVALIDA", None, []
+        inicio, fim = l1 * tamanho + c1, l2 * tamanho + c2
+        dl, dc = l2 - l1, c2 - c1
+        passos = max(abs(dl), abs(dc))
+        sl = (dl > 0) - (dl < 0)
+        sc = (dc > 0) - (dc < 0)
+
+        # Caso comum: as pontas de uma palavra escondida, por busca binária nas chaves
+        indice = -1
+        chaves = self._chaves
+        chave = min(inicio, fim) * tamanho * tamanho + max(inicio, fim)
+        posicao = bisect_left(chaves, chave)
+        while posicao < len(chaves) and chaves[posicao] == chave:
+            # Mesmas pontas só numa palavra e na sua inversa: vale a lida no sentido da seleção
+            indice = self._ordem[posicao]
+            if self.extremos[2 * indice] == inicio:
+                break
+            posicao += 1
+
+        if indice < 0:
+            if (dl == 0 and dc == 0) or (dl != 0 and dc != 0 and abs(dl) != abs(dc)):
+                return "INVALIDA", None, []
+            passo = sl * tamanho + sc
+            parada = fim + (1 if passo > 0 else -1)
+            palavra = self.grid[inicio:parada if parada >= 0 else None:passo].decode(CODIFICACAO)
+            indice = self.indice_palavra(palavra)
+            if indice < 0:
+                indice = self.indice_palavra(palavra[::-1])
+            if indice < 0:
+                return "INCORRETA", palavra, [(l1 + sl * i, c1 + sc * i) for i in range(passos + 1)]
+
+        palavra = self.palavras[indice]
+        posicoes = [(l1 + sl * i, c1 + sc * i) for i in range(passos + 1)]
+        if self.encontradas >> indice & 1:
+            return "JÁ_ENCONTRADA", palavra, posicoes
+        self.encontradas |= 1 << indice
+        # Monta os bits da palavra num inteiro pequeno e faz um único OR no das marcações
+        salto = abs(sl * tamanho + sc)
+        mascara = 0
+        for i in range(passos + 1):
+            mascara |= 1 << (salto * i)
+        self.marcacoes |= mascara << min(inicio, fim)
+        return "CORRETA", palavra, posicoes
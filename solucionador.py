@@ -0,0 +1,154 @@
+from bisect import bisect_right
+from collections import Counter, deque, namedtuple
+
+from posicionamento import DIRECOES_TODAS
+
+# Separa as linhas no texto varrido; não é letra, então o autômato volta à raiz
+_SEPARADOR = '\n'
+_NOME_DIRECAO = {passo: nome for nome, passo in DIRECOES_TODAS.items()}
+
+
+class Ocorrencia(namedtuple('Ocorrencia', 'palavra inicio fim direcao')):
+    """Uma palavra encontrada no grid, da primeira à última letra"""
+
+    __slots__ = ()
+
+    @property
+    def posicoes(self):
+        dl, dc = DIRECOES_TODAS[self.direcao]
+        l, c = self.inicio
+        return [(l + dl * i, c + dc * i) for i in range(len(self.palavra))]
+
+
+class AhoCorasick:
+    """Autômato de Aho-Corasick com a tabela de transições completa"""
+
+    def __init__(self, palavras):
+        self.palavras = list(dict.fromkeys(palavras))
+        transicoes = [{}]
+        saidas = [()]
+        for indice, palavra in enumerate(self.palavras):
+            estado = 0
+            for letra in palavra:
+                proximo = transicoes[estado].get(letra)
+                if proximo is None:
+                    proximo = len(transicoes)
+                    transicoes[estado][letra] = proximo
+                    transicoes.append({})
+                    saidas.append(())
+                estado = proximo
+            saidas[estado] += (indice,)
+
+        # Em largura: cada estado herda as transições e saídas do seu estado de falha
+        falha = [0] * len(transicoes)
+        self.delta = [None] * len(transicoes)
+        self.delta[0] = dict(transicoes[0])
+        fila = deque(transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            self.delta[estado] = dict(self.delta[falha[estado]])
+            self.delta[estado].update(transicoes[estado])
+            saidas[estado] += saidas[falha[estado]]
+            for letra, filho in transicoes[estado].items():
+                falha[filho] = self.delta[falha[estado]].get(letra, 0)
+                fila.append(filho)
+        self.saidas = saidas
+
+    def buscar(self, texto):
+        """Gera (índice da última letra, índice da palavra) para cada ocorrência no texto"""
+        delta = self.delta
+        saidas = self.saidas
+        estado = 0
+        for posicao, letra in enumerate(texto):
+            estado = delta[estado].get(letra, 0)
+            if saidas[estado]:
+                for indice in saidas[estado]:
+                    yield posicao, indice
+
+
+def _texto_grid(grid):
+    """Aceita um grid do módulo grid ou uma sequência de linhas (strings ou listas)"""
+    if hasattr(grid, 'texto'):
+        return grid.texto(), grid.linhas, grid.colunas
+    linhas = [''.join(linha) for linha in grid]
+    return ''.join(linhas), len(linhas), len(linhas[0]) if linhas else 0
+
+
+def _linhas_de_leitura(linhas, colunas):
+    """Gera (linha, coluna, dl, dc, comprimento) de cada linha, coluna e diagonal"""
+    for l in range(linhas):
+        yield l, 0, 0, 1, colunas
+    for c in range(colunas):
+        yield 0, c, 1, 0, linhas
+    # Diagonais descendo para a direita, começando na primeira linha e na primeira coluna
+    for c in range(colunas):
+        yield 0, c, 1, 1, min(linhas, colunas - c)
+    for l in range(1, linhas):
+        yield l, 0, 1, 1, min(linhas - l, colunas)
+    # Antidiagonais subindo para a direita, começando na primeira coluna e na última linha
+    for l in range(linhas):
+        yield l, 0, -1, 1, min(l + 1, colunas)
+    for c in range(1, colunas):
+        yield linhas - 1, c, -1, 1, min(linhas, colunas - c)
+
+
+class Solucionador:
+    """Encontra todas as palavras do grid nas 8 direções com uma única varredura"""
+
+    def __init__(self, palavras):
+        self.automato = AhoCorasick(palavras)
+        self.palavras = self.automato.palavras
+
+    def resolver(self, grid):
+        """Retorna todas as ocorrências das palavras no grid"""
+        texto, linhas, colunas = _texto_grid(grid)
+
+        # Junta todas as linhas de leitura (e seus reversos) num único texto
+        pedacos = []
+        inicios = []
+        origens = []
+        tamanho = 0
+        for l, c, dl, dc, comprimento in _linhas_de_leitura(linhas, colunas):
+            primeiro = l * colunas + c
+            salto = dl * colunas + dc
+            if comprimento == 1:
+                pedaco = texto[primeiro]
+            else:
+                fim = primeiro + salto * comprimento
+                pedaco = texto[primeiro:fim if fim >= 0 else None:salto]
+            for trecho, origem in ((pedaco, (l, c, dl, dc)),
+                                   (pedaco[::-1], (l + dl * (comprimento - 1),
+                                                   c + dc * (comprimento - 1), -dl, -dc))):
+                inicios.append(tamanho)
+                origens.append(origem)
+                pedacos.append(trecho)
+                pedacos.append(_SEPARADOR)
+                tamanho += comprimento + 1
+
+        ocorrencias = []
+        vistas = set()
+        for posicao, indice in self.automato.buscar(''.join(pedacos)):
+            palavra = self.palavras[indice]
+            trecho = bisect_right(inicios, posicao) - 1
+            l, c, dl, dc = origens[trecho]
+            deslocamento = posicao - inicios[trecho] - len(palavra) + 1
+            inicio = (l + dl * deslocamento, c + dc * deslocamento)
+            fim = (inicio[0] + dl * (len(palavra) - 1), inicio[1] + dc * (len(palavra) - 1))
+            # Palíndromos e palavras de uma letra aparecem em mais de uma leitura
+            chave = (palavra, min(inicio, fim), max(inicio, fim))
+            if chave in vistas:
+                continue
+            vistas.add(chave)
+            ocorrencias.append(Ocorrencia(palavra, inicio, fim, _NOME_DIRECAO[(dl, dc)]))
+        return ocorrencias
+
+
+def resolver(jogo):
+    """Resolve o caça-palavras de um jogo (CacaPalavras)"""
+    return Solucionador(jogo.palavras).resolver(jogo.grid)
+
+
+def validar(jogo):
+    """Retorna as palavras que não aparecem exatamente uma vez, com a contagem"""
+    contagem = Counter(ocorrencia.palavra for ocorrencia in resolver(jogo))
+    return {palavra: contagem[palavra] for palavra in jogo.palavras if contagem[palavra] != 1}
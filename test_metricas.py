@@ -0,0 +1,50 @@
+from lote import gerar_lote
+from metricas import METRICAS, PREFIXO
+from reproducao import reproduzir_lote, simular_partida
+
+
+def _contador(nome):
+    """Soma de todas as séries de um contador do registro"""
+    return sum(serie['valor'] for serie in METRICAS.instantaneo()['contadores'].get(PREFIXO + nome, []))
+
+
+def _medindo(funcao):
+    METRICAS.zerar()
+    METRICAS.ativar()
+    try:
+        funcao()
+        return METRICAS.instantaneo()
+    finally:
+        METRICAS.ativar(False)
+
+
+def test_lote_em_dois_processos_traz_as_metricas():
+    instantaneo = _medindo(lambda: list(gerar_lote(4, semente=7, processos=2, tamanho_bloco=1)))
+    assert instantaneo['contadores'] and instantaneo['histogramas']
+    # Cada puzzle conta uma vez: nada do processo principal é contado de novo pelos de trabalho
+    assert _contador('geracoes_total') == 4
+
+
+def test_reproducao_em_dois_processos_traz_as_metricas():
+    registros = [simular_partida(1, semente) for semente in range(3)]
+    instantaneo = _medindo(lambda: reproduzir_lote(registros, processos=2))
+    assert instantaneo['contadores']
+    assert _contador('geracoes_total') == 3
+
+
+def test_mesclar_soma_contadores_e_histogramas():
+    METRICAS.zerar()
+    METRICAS.ativar()
+    try:
+        METRICAS.incrementar('teste_total', 2)
+        METRICAS.observar('teste_segundos', 0.01)
+        parcial = METRICAS.retirar()
+        assert not METRICAS.instantaneo()['contadores']
+        METRICAS.mesclar(parcial)
+        METRICAS.mesclar(parcial)
+        instantaneo = METRICAS.instantaneo()
+    finally:
+        METRICAS.ativar(False)
+        METRICAS.zerar()
+    assert instantaneo['contadores'][PREFIXO + 'teste_total'][0]['valor'] == 4
+    assert instantaneo['histogramas'][PREFIXO + 'teste_segundos'][0]['total'] == 2